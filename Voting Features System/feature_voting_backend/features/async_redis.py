@@ -0,0 +1,59 @@
+# features/async_redis.py
+"""
+asyncio Redis client for the async views, pointing at the same server as the
+django-redis cache. Clients are bound to an event loop, so one is kept per loop.
+"""
+import asyncio
+import weakref
+
+from redis import BlockingConnectionPool, connection as sync_connection
+from redis.asyncio import Redis, connection as async_connection
+
+from .redis_client import get_connection
+
+# Sync connection class -> async equivalent, plus the connection options carried over
+_CONNECTION_CLASSES = {
+    sync_connection.Connection: async_connection.Connection,
+    sync_connection.SSLConnection: async_connection.SSLConnection,
+    sync_connection.UnixDomainSocketConnection: async_connection.UnixDomainSocketConnection,
+}
+_CONNECTION_OPTIONS = (
+    'host', 'port', 'path', 'db', 'username', 'password', 'socket_timeout', 'socket_connect_timeout',
+    'socket_keepalive', 'health_check_interval', 'ssl_keyfile', 'ssl_certfile', 'ssl_cert_reqs', 'ssl_ca_certs',
+)
+
+_clients = weakref.WeakKeyDictionary() # event loop -> Redis
+
+def get_async_connection():
+    """
+    Returns an asyncio Redis client for the running event loop, or None when the
+    cache is not django-redis or uses a connection class with no asyncio
+    equivalent (callers then use Django's async cache API).
+    """
+    conn = get_connection()
+    if conn is None:
+        return None
+    pool = conn.connection_pool
+    connection_class = _CONNECTION_CLASSES.get(pool.connection_class)
+    if connection_class is None:
+        return None
+
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        options = {key: value for key, value in pool.connection_kwargs.items() if key in _CONNECTION_OPTIONS}
+        if isinstance(pool, BlockingConnectionPool):
+            # Same wait for a free connection as the sync pool
+            options['timeout'] = pool.timeout
+            pool_class = async_connection.BlockingConnectionPool
+        else:
+            pool_class = async_connection.ConnectionPool
+        client = Redis(
+            connection_pool=pool_class(
+                connection_class=connection_class,
+                max_connections=pool.max_connections,
+                **options
+            )
+        )
+        _clients[loop] = client
+    return client
@@ -0,0 +1,302 @@
+# features/async_views.py
+"""
+Async (ASGI) variants of the feature list, retrieve, upvote and unvote endpoints,
+served under /api/async/features/ with the same payloads as FeatureViewSet.
+
+Reads use Django's async ORM and the asyncio Redis client, and a page's vote
+counts (MGET) and has_voted flags (the user's voted set) are fetched
+concurrently, so a worker keeps serving other requests while it waits on
+Postgres or Redis. Vote writes still need a transaction, which the async ORM
+can't open, so Vote.save/Vote.remove run through sync_to_async; everything
+around them stays on the event loop.
+
+Authentication is claims-only, like FeatureViewSet.stateless_auth_actions,
+and votes are throttled like FeatureViewSet's.
+Anonymous list responses are not served from the response cache. Reads go
+to a replica and writes pin the user to the primary, as in FeatureViewSet.
+The list supports ?status=, ?q= and ?ordering= with page numbers; cursor
+pagination (?pagination=cursor) is only served by /api/features/ and is
+answered with 400 here rather than silently paged by number.
+"""
+import asyncio
+import functools
+import math
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.db import IntegrityError
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, Throttled
+from rest_framework.settings import api_settings as drf_settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from users.authentication import ais_revoked
+from . import db_router, search, throttling, vote_queue, voted_sets
+from .async_redis import get_async_connection
+from .models import Feature, Vote
+from .pagination import FeatureCursorPagination
+from .redis_client import aguard
+from .serializers import FeatureSerializer, VoteResultSerializer
+from .views import FEATURE_LIST_ORDERINGS
+
+_jwt_authentication = JWTAuthentication()
+
+def _json(data, status_code=status.HTTP_200_OK, headers=None):
+    return JsonResponse(data, encoder=JSONEncoder, status=status_code, safe=False, headers=headers)
+
+def _not_found(detail='Not found.'):
+    return _json({'detail': detail}, status.HTTP_404_NOT_FOUND)
+
+async def _authenticate(request):
+    """
+    Returns a claims-only TokenUser for a valid bearer token, AnonymousUser without one.
+    """
+    header = _jwt_authentication.get_header(request)
+    raw_token = _jwt_authentication.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return AnonymousUser()
+    validated_token = _jwt_authentication.get_validated_token(raw_token)
+    user_id = validated_token.get(jwt_settings.USER_ID_CLAIM)
+    if user_id is None:
+        raise InvalidToken('Token contained no recognizable user identification')
+    if await ais_revoked(user_id, validated_token):
+        raise AuthenticationFailed('User is inactive', code='user_inactive')
+    return jwt_settings.TOKEN_USER_CLASS(validated_token)
+
+def _with_user(view):
+    """
+    Sets request.user from the bearer token, answering 401 for invalid tokens.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            request.user = await _authenticate(request)
+        except AuthenticationFailed as exc:
+            detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+            return _json(detail, exc.status_code, headers={
+                'WWW-Authenticate': _jwt_authentication.authenticate_header(request),
+            })
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+def _require_user(request):
+    if request.user.is_authenticated:
+        return None
+    return _json(
+        {'detail': 'Authentication credentials were not provided.'},
+        status.HTTP_401_UNAUTHORIZED,
+        headers={'WWW-Authenticate': _jwt_authentication.authenticate_header(request)}
+    )
+
+def _parse_feature_id(pk):
+    try:
+        return uuid.UUID(str(pk))
+    except ValueError:
+        return None
+
+async def _voted_feature_ids(user, features):
+    if not user.is_authenticated:
+        return None
+    feature_ids = [feature.id for feature in features]
+    conn = get_async_connection()
+    if conn is not None:
+        voted = await aguard(lambda: voted_sets.alookup(conn, user.pk, feature_ids), lambda: None)
+        if voted is not None:
+            return voted
+    rows = Vote.objects.filter(user_id=user.pk, feature_id__in=feature_ids).values_list('feature_id', flat=True)
+    return {feature_id async for feature_id in rows}
+
+async def _serializer_context(request, features):
+    """
+    Resolves the vote counts and the user's votes of the features concurrently.
+    """
+    vote_counts, voted_feature_ids = await asyncio.gather(
+        Feature.aget_vote_counts(features),
+        _voted_feature_ids(request.user, features)
+    )
+    context = {'request': request, 'vote_counts': vote_counts}
+    if voted_feature_ids is not None:
+        context['voted_feature_ids'] = voted_feature_ids
+    return context
+
+def _reads_from_replica(view):
+    """
+    Routes the view's ORM reads to a read replica (see features/db_router.py).
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        alias = await sync_to_async(db_router.replica_for)(request.user)
+        with db_router.reading_from(alias):
+            return await view(request, *args, **kwargs)
+    return wrapper
+
+def _pins_to_primary(view):
+    """
+    Keeps the user's reads on the primary for a while after a successful write.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        response = await view(request, *args, **kwargs)
+        if response.status_code < 400:
+            await sync_to_async(db_router.pin_to_primary)(request.user.pk)
+        return response
+    return wrapper
+
+def _throttled(action):
+    """
+    Answers 429 once the request's throttle buckets for action are empty (see
+    features/throttling.py). Anonymous requests go through to their 401.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.user.is_authenticated:
+                wait = await throttling.atake(throttling.get_buckets(action, request, kwargs.get('pk')))
+                if wait:
+                    return _json(
+                        {'detail': Throttled(wait).detail},
+                        status.HTTP_429_TOO_MANY_REQUESTS,
+                        headers={'Retry-After': str(math.ceil(wait))}
+                    )
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+@require_GET
+@_with_user
+@_reads_from_replica
+async def feature_list(request):
+    if FeatureCursorPagination.is_requested(request):
+        return _json(
+            {'pagination': ['Cursor pagination is only available on /api/features/.']},
+            status.HTTP_400_BAD_REQUEST
+        )
+    ordering = request.GET.get('ordering')
+    if ordering and ordering not in FEATURE_LIST_ORDERINGS:
+        return _json(
+            {'ordering': [f"Must be one of: {', '.join(FEATURE_LIST_ORDERINGS)}."]},
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    queryset = Feature.objects.select_related('created_by')
+    feature_status = request.GET.get('status')
+    if feature_status:
+        queryset = queryset.filter(status=feature_status)
+    query = request.GET.get('q', '').strip()
+    if query:
+        # The fallback ranking reads candidates and the Redis index up front
+        queryset = await sync_to_async(search.search)(queryset, query)
+    if ordering:
+        queryset = queryset.order_by(*FEATURE_LIST_ORDERINGS[ordering])
+
+    page_size = drf_settings.PAGE_SIZE
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        page = 0
+    if page < 1:
+        return _not_found('Invalid page.')
+    count = await queryset.acount()
+    features = [feature async for feature in queryset[(page - 1) * page_size:page * page_size]]
+    if page > 1 and not features:
+        return _not_found('Invalid page.')
+
+    serializer = FeatureSerializer(features, many=True, context=await _serializer_context(request, features))
+    url = request.build_absolute_uri()
+    previous = None
+    if page == 2:
+        previous = remove_query_param(url, 'page')
+    elif page > 2:
+        previous = replace_query_param(url, 'page', page - 1)
+    return _json({
+        'count': count,
+        'next': replace_query_param(url, 'page', page + 1) if page * page_size < count else None,
+        'previous': previous,
+        'results': serializer.data,
+    })
+
+@require_GET
+@_with_user
+@_reads_from_replica
+async def feature_detail(request, pk):
+    feature_id = _parse_feature_id(pk)
+    feature = None
+    if feature_id is not None:
+        feature = await Feature.objects.select_related('created_by').filter(pk=feature_id).afirst()
+    if feature is None:
+        return _not_found('No Feature matches the given query.')
+    serializer = FeatureSerializer(feature, context=await _serializer_context(request, [feature]))
+    return _json(serializer.data)
+
+async def _queue_vote(request, feature_id, vote_action):
+    """
+    Write-behind path (VOTE_INGESTION_MODE = 'queued'), as in FeatureViewSet._queue_vote.
+    """
+    if not await Feature.objects.filter(pk=feature_id).aexists():
+        return _not_found()
+    if vote_action == vote_queue.UPVOTE:
+        if not await sync_to_async(vote_queue.enqueue_upvote)(request.user.pk, feature_id):
+            return _json({'detail': 'You have already upvoted this feature.'}, status.HTTP_400_BAD_REQUEST)
+    else:
+        await sync_to_async(vote_queue.enqueue_unvote)(request.user.pk, feature_id)
+    return _json(
+        {'detail': 'Vote accepted.', 'feature': str(feature_id), 'action': vote_action},
+        status.HTTP_202_ACCEPTED
+    )
+
+@csrf_exempt
+@require_POST
+@_with_user
+@_throttled('vote')
+@_pins_to_primary
+async def feature_upvote(request, pk):
+    """
+    Responds with the compact VoteResultSerializer payload (no ?expand=feature).
+    """
+    error = _require_user(request)
+    if error is not None:
+        return error
+    feature_id = _parse_feature_id(pk)
+    if feature_id is None:
+        return _not_found('No Feature matches the given query.')
+    if vote_queue.is_enabled():
+        return await _queue_vote(request, feature_id, vote_queue.UPVOTE)
+
+    # The status is loaded so the vote only invalidates that status' cached responses
+    feature = await Feature.objects.only('pk', 'status').filter(pk=feature_id).afirst()
+    if feature is None:
+        return _not_found('No Feature matches the given query.')
+    try:
+        vote = await sync_to_async(Vote.objects.create)(user_id=request.user.pk, feature=feature)
+    except IntegrityError:
+        return _json({'detail': 'You have already upvoted this feature.'}, status.HTTP_400_BAD_REQUEST)
+    return _json(VoteResultSerializer(vote).data, status.HTTP_201_CREATED)
+
+@csrf_exempt
+@require_POST
+@_with_user
+@_throttled('vote')
+@_pins_to_primary
+async def feature_unvote(request, pk):
+    error = _require_user(request)
+    if error is not None:
+        return error
+    feature_id = _parse_feature_id(pk)
+    if feature_id is None:
+        return _not_found()
+    if vote_queue.is_enabled():
+        return await _queue_vote(request, feature_id, vote_queue.UNVOTE)
+
+    if not await sync_to_async(Vote.remove)(request.user, feature_id):
+        if not await Feature.objects.filter(pk=feature_id).aexists():
+            return _not_found()
+        return _json({'detail': 'You have not upvoted this feature.'}, status.HTTP_400_BAD_REQUEST)
+    return HttpResponse(status=status.HTTP_204_NO_CONTENT)
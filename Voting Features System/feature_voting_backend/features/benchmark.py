@@ -0,0 +1,325 @@
+# features/benchmark.py
+"""
+Load-test harness for the voting API, used by the benchmark_api and
+compare_benchmarks commands.
+
+seed() creates a configurable volume of users, features and votes under a
+unique username prefix, run_scenario() drives one endpoint with concurrent
+clients through Django's test client (the full middleware and view stack,
+without a network hop) and measures latency, throughput and SQL queries per
+request, and compare() checks a result set against a stored baseline.
+Everything seeded or registered carries the prefix, so cleanup() removes it.
+connection_mode() switches how database and Redis connections are handled,
+for the benchmark_connections command.
+"""
+import platform
+import random
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import close_old_connections, connection
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import Feature, Vote
+from .redis_client import get_connection
+
+PASSWORD = 'benchmark-password'
+SEED_CHUNK_SIZE = 5000
+PAGE_SIZE = 10
+
+# Scenario -> status code of a successful request. upvote casts votes that unvote then removes.
+SCENARIOS = {
+    'list': 200,
+    'retrieve': 200,
+    'upvote': 201,
+    'unvote': 204,
+    'register': 201,
+    'token': 200,
+}
+
+# Result fields compared against the baseline, and whether higher is better
+METRICS = {
+    'p50_ms': False,
+    'p95_ms': False,
+    'p99_ms': False,
+    'throughput_rps': True,
+    'queries_per_request': False,
+}
+
+# Database and Redis connection handling compared by benchmark_connections (see connection_mode)
+CONNECTION_MODES = ('per-request', 'persistent', 'pool')
+POOL_MAX_SIZE = 20
+UNLIMITED_RATE = '1000000000/s' # See run_scenario
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def seed(users, features, votes, rng=None):
+    """
+    Creates the dataset and returns a dict with its prefix, user ids, tokens,
+    feature ids and the set of seeded (user_id, feature_id) votes.
+    """
+    rng = rng or random.Random(0)
+    User = get_user_model()
+    prefix = f'bench-{uuid.uuid4().hex[:8]}'
+    password = make_password(PASSWORD) # Hashed once, shared by every seeded user
+
+    for chunk in _chunks(range(users), SEED_CHUNK_SIZE):
+        User.objects.bulk_create([
+            User(username=f'{prefix}-{index}', email=f'{prefix}-{index}@example.com', password=password)
+            for index in chunk
+        ])
+    user_ids = list(User.objects.filter(username__startswith=f'{prefix}-').order_by('pk').values_list('pk', flat=True))
+
+    author_id = user_ids[0]
+    for chunk in _chunks(range(features), SEED_CHUNK_SIZE):
+        Feature.objects.bulk_create([
+            Feature(title=f'{prefix} feature {index}', description='Benchmark feature.', created_by_id=author_id)
+            for index in chunk
+        ])
+    feature_ids = list(Feature.objects.filter(created_by_id=author_id).order_by('pk').values_list('pk', flat=True))
+
+    votes = min(votes, len(user_ids) * len(feature_ids))
+    seeded_votes = set()
+    while len(seeded_votes) < votes:
+        seeded_votes.add((rng.choice(user_ids), rng.choice(feature_ids)))
+    # bulk_apply also sets the denormalized counters the read paths rely on
+    for chunk in _chunks(sorted(seeded_votes, key=str), SEED_CHUNK_SIZE):
+        Vote.bulk_apply(chunk, [])
+
+    return {
+        'prefix': prefix,
+        'user_ids': user_ids,
+        'usernames': [f'{prefix}-{index}' for index in range(len(user_ids))],
+        'tokens': {user_id: str(AccessToken.for_user(User(pk=user_id))) for user_id in user_ids},
+        'feature_ids': feature_ids,
+        'votes': seeded_votes,
+    }
+
+def cleanup(dataset):
+    """
+    Deletes the seeded and registered users, which cascades to their features and votes.
+    """
+    get_user_model().objects.filter(username__startswith=f"{dataset['prefix']}-").delete()
+
+def _vote_pairs(dataset, count):
+    """
+    Returns up to count (user_id, feature_id) pairs that have no seeded vote.
+    """
+    pairs = []
+    user_ids, feature_ids = dataset['user_ids'], dataset['feature_ids']
+    for index in range(len(user_ids) * len(feature_ids)):
+        pair = (user_ids[index % len(user_ids)], feature_ids[(index // len(user_ids) + index) % len(feature_ids)])
+        if pair not in dataset['votes']:
+            pairs.append(pair)
+            if len(pairs) == count:
+                break
+    return pairs
+
+def build_requests(scenario, dataset, count):
+    """
+    Returns the scenario's requests as (method, path, data, token) tuples.
+    """
+    user_ids, feature_ids, tokens = dataset['user_ids'], dataset['feature_ids'], dataset['tokens']
+    if scenario == 'list':
+        pages = max(1, min(len(feature_ids) // PAGE_SIZE, 50))
+        return [
+            ('get', f'/api/features/?page={index % pages + 1}', None, tokens[user_ids[index % len(user_ids)]])
+            for index in range(count)
+        ]
+    if scenario == 'retrieve':
+        return [
+            ('get', f'/api/features/{feature_ids[index % len(feature_ids)]}/', None, tokens[user_ids[index % len(user_ids)]])
+            for index in range(count)
+        ]
+    if scenario in ('upvote', 'unvote'):
+        return [
+            ('post', f'/api/features/{feature_id}/{scenario}/', None, tokens[user_id])
+            for user_id, feature_id in _vote_pairs(dataset, count)
+        ]
+    if scenario == 'register':
+        run = uuid.uuid4().hex[:6] # Repeated runs on one dataset register new usernames
+        return [
+            ('post', '/api/users/register/', {
+                'username': f"{dataset['prefix']}-r{run}-{index}",
+                'email': f"{dataset['prefix']}-r{run}-{index}@example.com",
+                'password': PASSWORD,
+            }, None)
+            for index in range(count)
+        ]
+    if scenario == 'token':
+        usernames = dataset['usernames']
+        return [
+            ('post', '/api/token/', {'username': usernames[index % len(usernames)], 'password': PASSWORD}, None)
+            for index in range(count)
+        ]
+    raise ValueError(f'Unknown scenario: {scenario}')
+
+def _percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+def pool_available():
+    """
+    Whether the database supports Django's connection pool (PostgreSQL with psycopg 3 and psycopg_pool).
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    try:
+        import psycopg_pool # noqa: F401
+    except ImportError:
+        return False
+    return is_psycopg3
+
+@contextmanager
+def connection_mode(mode, max_age=60):
+    """
+    Runs the block with one of CONNECTION_MODES for the default database and
+    Redis, and yields the function to call after each request: what a server
+    does when a request finishes (the test client skips it), i.e. closing the
+    database connections that shouldn't be reused.
+    - 'per-request': new database and Redis connections for every request;
+    - 'persistent': database connections are kept max_age seconds (health-checked
+      before reuse), Redis connections are reused from the client's pool;
+    - 'pool': a psycopg 3 connection pool (see pool_available), Redis as above.
+    The database settings are restored and the connections closed afterwards.
+    """
+    if mode not in CONNECTION_MODES:
+        raise ValueError(f'Unknown connection mode: {mode}')
+    if mode == 'pool' and not pool_available():
+        raise ValueError('The pool mode needs PostgreSQL with psycopg 3 and psycopg_pool.')
+    # Shared by every thread's connection to the alias, so worker threads pick the mode up
+    settings_dict = connection.settings_dict
+    saved = {key: settings_dict[key] for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS')}
+    options = {key: value for key, value in saved['OPTIONS'].items() if key != 'pool'}
+    if mode == 'pool':
+        options['pool'] = saved['OPTIONS'].get('pool') or {'min_size': 2, 'max_size': POOL_MAX_SIZE}
+    redis = get_connection()
+
+    def after_request():
+        close_old_connections()
+        if mode == 'per-request' and redis is not None:
+            redis.connection_pool.disconnect(inuse_connections=False)
+
+    connection.close()
+    settings_dict.update(
+        CONN_MAX_AGE=max_age if mode == 'persistent' else 0,
+        CONN_HEALTH_CHECKS=mode == 'persistent',
+        OPTIONS=options
+    )
+    try:
+        yield after_request
+    finally:
+        connection.close()
+        if mode == 'pool':
+            connection.close_pool()
+        settings_dict.update(saved)
+
+def run_scenario(scenario, requests, clients, after_request=None):
+    """
+    Sends the requests from clients concurrent clients (threads, each with its
+    own test client and database connection) and returns the scenario's metrics.
+    after_request, if given, is called after each request (outside the timing).
+    """
+    expected_status = SCENARIOS[scenario]
+    local = threading.local()
+
+    def send(request):
+        method, path, data, token = request
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = Client()
+        extra = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        if data is not None:
+            extra.update(data=data, content_type='application/json')
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        # Counts the statements this thread runs while serving the request
+        with connection.execute_wrapper(count_query):
+            started = time.perf_counter()
+            response = getattr(client, method)(path, **extra)
+            latency = time.perf_counter() - started
+        if after_request is not None:
+            after_request()
+        return latency, len(queries), response.status_code == expected_status
+
+    # The test client sends Host: testserver. Every client shares one address and the seeded users
+    # vote fast, so throttles keep their checks (and Redis round trips) but get out-of-reach limits.
+    throttle_rates = {
+        action: {scope: rate and UNLIMITED_RATE for scope, rate in rates.items()}
+        for action, rates in getattr(settings, 'THROTTLE_RATES', {}).items()
+    }
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], THROTTLE_RATES=throttle_rates):
+        started = time.perf_counter()
+        if clients == 1:
+            results = [send(request) for request in requests]
+        else:
+            with ThreadPoolExecutor(max_workers=clients) as executor:
+                results = list(executor.map(send, requests))
+        elapsed = time.perf_counter() - started
+
+    if not results:
+        return {'requests': 0, 'errors': 0}
+    latencies = sorted(latency * 1000 for latency, _, _ in results)
+    return {
+        'requests': len(results),
+        'errors': sum(1 for _, _, ok in results if not ok),
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p95_ms': round(_percentile(latencies, 0.95), 3),
+        'p99_ms': round(_percentile(latencies, 0.99), 3),
+        'throughput_rps': round(len(results) / elapsed, 3),
+        'queries_per_request': round(sum(queries for _, queries, _ in results) / len(results), 3),
+    }
+
+def environment():
+    """
+    Describes where a result set was measured, so baselines are compared like for like.
+    """
+    return {
+        'database': connection.vendor,
+        'cache': settings.CACHES['default']['BACKEND'],
+        'python': platform.python_version(),
+        'django': django.get_version(),
+    }
+
+def compare(baseline, current, latency_tolerance=0.25, throughput_tolerance=0.25, query_tolerance=0.0):
+    """
+    Returns the regressions of current against baseline, as messages. Latencies
+    may grow and throughput may drop by the given fractions; queries per request
+    may grow by query_tolerance queries.
+    """
+    regressions = []
+    for scenario, expected in baseline['scenarios'].items():
+        measured = current['scenarios'].get(scenario)
+        if measured is None:
+            continue
+        if measured.get('errors', 0) > expected.get('errors', 0):
+            regressions.append(f"{scenario}: {measured['errors']} failed requests (baseline {expected.get('errors', 0)})")
+        for metric, higher_is_better in METRICS.items():
+            if metric not in expected or metric not in measured:
+                continue
+            old, new = expected[metric], measured[metric]
+            if metric == 'queries_per_request':
+                regressed = new > old + query_tolerance
+            elif higher_is_better:
+                regressed = new < old * (1 - throughput_tolerance)
+            else:
+                regressed = new > old * (1 + latency_tolerance)
+            if regressed:
+                regressions.append(f'{scenario}: {metric} {new} (baseline {old})')
+    return regressions
@@ -0,0 +1,87 @@
+# features/bulk_votes.py
+"""
+Bulk vote application, shared by the bulk-vote API action and the
+import_votes management command.
+
+A batch of (feature_id, action) pairs per user is applied as if each
+user's items ran in order, but with set-based SQL: one query for the
+features, one for the users' existing votes, then a single bulk
+insert/delete and one counter recomputation for every touched feature,
+however many users the batch spans.
+"""
+import uuid
+
+from .models import Feature, Vote
+
+UPVOTE = 'upvote'
+UNVOTE = 'unvote'
+ACTIONS = (UPVOTE, UNVOTE)
+
+# Per-item results
+CREATED = 'created'
+ALREADY_VOTED = 'already_voted'
+REMOVED = 'removed'
+NOT_VOTED = 'not_voted'
+NOT_FOUND = 'not_found'
+INVALID = 'invalid'
+
+def _parse_feature_id(value):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+def apply_bulk_votes(user_id, items):
+    """
+    Applies items, a sequence of (feature_id, action) pairs, for one user.
+    Returns one result dict per item, in order: {'feature', 'action', 'result'}.
+    """
+    return apply_bulk_votes_for_users({user_id: items})[user_id]
+
+def apply_bulk_votes_for_users(items_by_user):
+    """
+    Applies {user_id: [(feature_id, action), ...]} for several users in one
+    transaction. Returns {user_id: results}, results as in apply_bulk_votes.
+    """
+    parsed_by_user = {
+        user_id: [(_parse_feature_id(feature_id), action) for feature_id, action in items]
+        for user_id, items in items_by_user.items()
+    }
+    feature_ids = {
+        feature_id for parsed in parsed_by_user.values() for feature_id, action in parsed
+        if feature_id and action in ACTIONS
+    }
+    existing_features = set(Feature.objects.filter(pk__in=feature_ids).values_list('pk', flat=True))
+    initially_voted = {user_id: set() for user_id in items_by_user}
+    for user_id, feature_id in (
+        Vote.objects.filter(user_id__in=items_by_user, feature_id__in=existing_features)
+        .order_by().values_list('user_id', 'feature_id')
+    ):
+        initially_voted[user_id].add(feature_id)
+
+    results_by_user = {}
+    upvotes, unvotes = [], []
+    for user_id, items in items_by_user.items():
+        voted = set(initially_voted[user_id])
+
+        results = []
+        for (raw_feature_id, action), (feature_id, _) in zip(items, parsed_by_user[user_id]):
+            if feature_id is None or action not in ACTIONS:
+                result = INVALID
+            elif feature_id not in existing_features:
+                result = NOT_FOUND
+            elif action == UPVOTE:
+                result = ALREADY_VOTED if feature_id in voted else CREATED
+                voted.add(feature_id)
+            else:
+                result = REMOVED if feature_id in voted else NOT_VOTED
+                voted.discard(feature_id)
+            results.append({'feature': str(raw_feature_id), 'action': action, 'result': result})
+        results_by_user[user_id] = results
+
+        # Only the net change against the state before the batch reaches the database
+        upvotes.extend((user_id, feature_id) for feature_id in voted - initially_voted[user_id])
+        unvotes.extend((user_id, feature_id) for feature_id in initially_voted[user_id] - voted)
+
+    Vote.bulk_apply(upvotes, unvotes)
+    return results_by_user
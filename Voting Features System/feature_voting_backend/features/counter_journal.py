@@ -0,0 +1,86 @@
+# features/counter_journal.py
+"""
+Journal of vote changes and feature edits committed while Redis was unavailable.
+
+Votes are written to the database in their own transaction whatever the
+state of Redis; during an outage only their Redis side (cached counter, live
+counts, leaderboard, the voter's voted set, hot score queue, response cache)
+is skipped, and each skipped change is journaled. Feature creations and
+edits are journaled the same way, with a delta of 0 and no user. replay()
+resyncs the features and voters it touched from the database once Redis is
+back (for edits, their leaderboard set and duplicate index bands too): it
+runs when the circuit breaker closes again, and from the
+replay_counter_journal command. Cached counts are set from the persisted columns rather than
+re-applying the deltas, so a counter that expired and was reseeded meanwhile
+isn't counted twice.
+"""
+from django.db import transaction
+
+from . import duplicates, hot, leaderboard, response_cache, voted_sets
+from .redis_client import REDIS_ERRORS, breaker
+
+REPLAY_BATCH_SIZE = 500
+RECOVERY_MAX_BATCHES = 10 # Replayed inline by the request that finds Redis back; the command drains the rest
+
+def record(changes):
+    """
+    Journals vote changes given as (feature_id, user_id, delta) tuples
+    (feature edits: (feature_id, None, 0)).
+    """
+    from .models import CounterJournalEntry # Local import, models import this module
+
+    CounterJournalEntry.objects.bulk_create([
+        CounterJournalEntry(feature_id=feature_id, user_id=user_id, delta=delta)
+        for feature_id, user_id, delta in changes
+    ])
+
+def pending_count():
+    from .models import CounterJournalEntry
+
+    return CounterJournalEntry.objects.count()
+
+def replay(batch_size=REPLAY_BATCH_SIZE, max_batches=None):
+    """
+    Resyncs Redis for the journaled changes, oldest first, deleting each batch
+    once done. A Redis error propagates and leaves the batch journaled.
+    Returns the number of entries replayed.
+    """
+    from .models import CounterJournalEntry, Feature
+
+    replayed = batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            entries = list(
+                CounterJournalEntry.objects.select_for_update(skip_locked=True)
+                .order_by('id')
+                .values_list('id', 'feature_id', 'user_id', 'delta')[:batch_size]
+            )
+            if not entries:
+                break
+            feature_ids = {feature_id for _, feature_id, _, _ in entries}
+            edited = {feature_id for _, feature_id, _, delta in entries if delta == 0}
+            if edited:
+                # The status may have changed: out of every status' set, then back into the current one below
+                leaderboard.remove_features(edited)
+                duplicates.index_features(edited)
+            # Cached counts, leaderboard scores, live counts and the statuses' cached responses
+            Feature.refresh_cached_vote_counts(feature_ids)
+            voted_sets.invalidate({user_id for _, _, user_id, _ in entries if user_id is not None})
+            hot.mark_stale(feature_ids)
+            CounterJournalEntry.objects.filter(pk__in=[entry_id for entry_id, _, _, _ in entries]).delete()
+        replayed += len(entries)
+        batches += 1
+    return replayed
+
+def replay_after_outage():
+    """
+    Circuit breaker recovery hook. Cached responses from before the outage may
+    miss writes whose invalidation failed, so every status is invalidated too.
+    """
+    try:
+        response_cache.bump()
+        replay(max_batches=RECOVERY_MAX_BATCHES)
+    except REDIS_ERRORS:
+        breaker.record_failure()
+
+breaker.add_recovery_hook(replay_after_outage)
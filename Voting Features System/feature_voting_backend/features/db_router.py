@@ -0,0 +1,124 @@
+# features/db_router.py
+"""
+Read-replica routing for the feature list and retrieve endpoints.
+
+Only reads made inside a reading_from(alias) block go to a replica: the
+views pick one with replica_for(user) per request, so a page's count and
+rows come from the same replica and every other read (auth, vote writes,
+admin) stays on the primary. Writes always go to the primary.
+
+replica_for returns None, i.e. the primary, when:
+- no replica is configured (settings.REPLICA_DATABASES);
+- the user wrote in the last READ_YOUR_WRITES_SECONDS (pin_to_primary is
+  called after their upvotes, unvotes and feature edits), so they see
+  their own writes (read-your-writes);
+- a transaction is open on the primary (it may hold writes no replica has);
+- every replica lags more than REPLICA_MAX_LAG_SECONDS, or can't be reached.
+Lag is checked at most every LAG_CHECK_SECONDS per replica and process.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from .redis_client import guard
+
+LAG_CHECK_SECONDS = 1
+
+_read_alias = ContextVar('replica_read_alias', default=None)
+_lag_checks = {} # alias -> (checked at, lag in seconds)
+
+# On a standby: seconds since the last replayed transaction, or 0 when everything received is replayed
+# (an idle primary sends nothing, which must not read as lag)
+_POSTGRES_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+def get_replicas():
+    return list(getattr(settings, 'REPLICA_DATABASES', []))
+
+def _pin_key(user_id):
+    return f'db:primary:{user_id}'
+
+def pin_to_primary(user_id):
+    """
+    Sends the user's reads to the primary for READ_YOUR_WRITES_SECONDS,
+    e.g. after they voted, so their next page shows the vote.
+    """
+    guard(
+        lambda: cache.set(_pin_key(user_id), 1, timeout=settings.READ_YOUR_WRITES_SECONDS),
+        lambda: None
+    )
+
+def is_pinned(user):
+    if not user or not user.is_authenticated:
+        return False
+    # Without Redis the pin can't be checked; the primary is always up to date
+    return guard(lambda: cache.get(_pin_key(user.pk)) is not None, lambda: True)
+
+def replica_lag(alias):
+    """
+    Replication lag of a replica in seconds (0 for backends other than PostgreSQL).
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(_POSTGRES_LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+def _lag(alias):
+    now = time.monotonic()
+    checked = _lag_checks.get(alias)
+    if checked is not None and now - checked[0] < LAG_CHECK_SECONDS:
+        return checked[1]
+    try:
+        lag = replica_lag(alias)
+    except DatabaseError:
+        lag = float('inf') # Unreachable: skipped until the next check
+    _lag_checks[alias] = (now, lag)
+    return lag
+
+def replica_for(user=None):
+    """
+    The replica alias the request's reads can use, or None for the primary.
+    """
+    replicas = get_replicas()
+    if not replicas or connections[DEFAULT_DB_ALIAS].in_atomic_block or is_pinned(user):
+        return None
+    healthy = [alias for alias in replicas if _lag(alias) <= settings.REPLICA_MAX_LAG_SECONDS]
+    return random.choice(healthy) if healthy else None
+
+@contextmanager
+def reading_from(alias):
+    """
+    Routes the ORM reads made in the block to alias (None: the primary).
+    """
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+class ReplicaRouter:
+    """
+    Sends the reads of reading_from blocks to their replica and everything else to the primary.
+    """
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True # Replicas hold the same data as the primary
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in get_replicas() # Replicas get the schema through replication
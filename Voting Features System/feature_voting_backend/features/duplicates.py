@@ -0,0 +1,194 @@
+# features/duplicates.py
+"""
+Near-duplicate detection for new feature submissions, using MinHash/LSH in Redis.
+
+Each feature's title and description are reduced to a set of word shingles
+(the words and adjacent word pairs) and a MinHash signature of NUM_PERM
+slots. The signature is cut into BANDS bands of ROWS slots, and the feature
+id is added to one Redis set per band, keyed by the band's hash. Features
+sharing any band bucket with a submission are candidates (likely above
+~(1/BANDS) ** (1/ROWS) Jaccard similarity), which are then re-scored exactly
+against their stored text. A lookup is one pipelined SMEMBERS round trip
+plus one primary-key query, independent of the number of features.
+
+Archived features are kept out of the index. When Redis is not configured
+duplicate detection is disabled.
+"""
+import hashlib
+import random
+from collections import Counter
+
+from .redis_client import get_connection
+from .search import tokenize
+
+BANDS = 12
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+SIMILARITY_THRESHOLD = 0.5 # Minimum exact Jaccard similarity to report
+MAX_CANDIDATES = 100
+MAX_RESULTS = 5
+EXCLUDED_STATUSES = ('Archived',)
+REBUILD_CHUNK_SIZE = 2000
+KEY_PREFIX = 'duplicates:lsh'
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1729) # Fixed seed: signatures must be stable across processes and restarts
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+def shingles(title, description):
+    tokens = tokenize(f'{title} {description}')
+    return set(tokens) | {f'{first} {second}' for first, second in zip(tokens, tokens[1:])}
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+def signature(shingle_set):
+    hashes = [_hash(shingle) for shingle in shingle_set]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+def _band_keys(shingle_set):
+    if not shingle_set:
+        return []
+    slots = signature(shingle_set)
+    keys = []
+    for band in range(BANDS):
+        rows = ','.join(str(slot) for slot in slots[band * ROWS:(band + 1) * ROWS])
+        keys.append(f'{KEY_PREFIX}:{band}:{hashlib.blake2b(rows.encode(), digest_size=8).hexdigest()}')
+    return keys
+
+def jaccard(first, second):
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+def add_feature(feature_id, title, description, status, conn=None):
+    conn = conn or get_connection()
+    if conn is None or status in EXCLUDED_STATUSES:
+        return
+    pipe = conn.pipeline(transaction=False)
+    for key in _band_keys(shingles(title, description)):
+        pipe.sadd(key, str(feature_id))
+    pipe.execute()
+
+def remove_feature(feature_id, title, description):
+    """
+    Removes a feature using its indexed (i.e. previous) title and description.
+    """
+    conn = get_connection()
+    if conn is None:
+        return
+    pipe = conn.pipeline(transaction=False)
+    for key in _band_keys(shingles(title, description)):
+        pipe.srem(key, str(feature_id))
+    pipe.execute()
+
+def update_feature(feature_id, old, new):
+    """
+    Re-indexes a feature after an edit. old and new are (title, description, status).
+    """
+    if old == new:
+        return
+    if old[2] not in EXCLUDED_STATUSES:
+        remove_feature(feature_id, old[0], old[1])
+    add_feature(feature_id, *new)
+
+def index_features(feature_ids):
+    """
+    Indexes the current text of the given features, e.g. after edits made while
+    Redis was unavailable. Bands of a previous text are left behind: lookups
+    re-score their candidates against the stored text, so they only cost a slot.
+    """
+    from .models import Feature # Local import, models import this module
+
+    conn = get_connection()
+    if conn is None:
+        return
+    rows = (
+        Feature.objects.filter(pk__in=feature_ids)
+        .exclude(status__in=EXCLUDED_STATUSES)
+        .order_by()
+        .values_list('pk', 'title', 'description')
+    )
+    pipe = conn.pipeline(transaction=False)
+    for feature_id, title, description in rows:
+        for key in _band_keys(shingles(title, description)):
+            pipe.sadd(key, str(feature_id))
+    pipe.execute()
+
+def find_duplicates(title, description, exclude_id=None, limit=MAX_RESULTS):
+    """
+    Returns up to limit likely duplicates of the given text, most similar first,
+    as dicts with id, title, status and similarity.
+    """
+    from .models import Feature # Local import, models import this module
+
+    conn = get_connection()
+    submitted = shingles(title, description)
+    keys = _band_keys(submitted)
+    if conn is None or not keys:
+        return []
+
+    pipe = conn.pipeline(transaction=False)
+    for key in keys:
+        pipe.smembers(key)
+    # Features sharing more bands are more likely to be similar; re-score the best ones
+    collisions = Counter()
+    for members in pipe.execute():
+        collisions.update(member.decode() if isinstance(member, bytes) else member for member in members)
+    collisions.pop(str(exclude_id), None)
+    if not collisions:
+        return []
+
+    rows = (
+        Feature.objects.filter(pk__in=[feature_id for feature_id, _ in collisions.most_common(MAX_CANDIDATES)])
+        .exclude(status__in=EXCLUDED_STATUSES)
+        .order_by()
+        .values_list('pk', 'title', 'description', 'status')
+    )
+    matches = []
+    for feature_id, feature_title, feature_description, feature_status in rows:
+        similarity = jaccard(submitted, shingles(feature_title, feature_description))
+        if similarity >= SIMILARITY_THRESHOLD:
+            matches.append({
+                'id': feature_id,
+                'title': feature_title,
+                'status': feature_status,
+                'similarity': round(similarity, 3),
+            })
+    matches.sort(key=lambda match: match['similarity'], reverse=True)
+    return matches[:limit]
+
+def rebuild(chunk_size=REBUILD_CHUNK_SIZE):
+    """
+    Drops every LSH bucket and re-indexes all non-archived features in chunks.
+    Returns the number of features indexed (None when Redis is not configured).
+    """
+    from .models import Feature # Local import, models import this module
+
+    conn = get_connection()
+    if conn is None:
+        return None
+    stale = []
+    for key in conn.scan_iter(match=f'{KEY_PREFIX}:*', count=1000):
+        stale.append(key)
+        if len(stale) >= chunk_size:
+            conn.delete(*stale)
+            stale = []
+    if stale:
+        conn.delete(*stale)
+
+    indexed = 0
+    rows = (
+        Feature.objects.exclude(status__in=EXCLUDED_STATUSES)
+        .order_by()
+        .values_list('pk', 'title', 'description')
+    )
+    pipe = conn.pipeline(transaction=False)
+    for feature_id, title, description in rows.iterator(chunk_size=chunk_size):
+        for key in _band_keys(shingles(title, description)):
+            pipe.sadd(key, str(feature_id))
+        indexed += 1
+        if indexed % chunk_size == 0:
+            pipe.execute()
+    pipe.execute()
+    return indexed
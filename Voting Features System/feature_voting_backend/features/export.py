@@ -0,0 +1,211 @@
+# features/export.py
+"""
+Streaming export of the features and votes tables for analytics, used by
+/api/features/export/ (admins only) and the export_votes command.
+
+Rows are read with QuerySet.iterator(chunk_size), i.e. a server-side cursor
+on PostgreSQL, as plain value tuples (no model instances, no serializers),
+and encoded one chunk at a time. With server-side cursors disabled (e.g.
+behind PgBouncer) chunks are read as keyset pages on the primary key. Memory stays bounded by the chunk size
+whatever the size of the table. Feature rows carry their vote count
+aggregated in SQL by a correlated subquery over the votes table.
+
+Formats: NDJSON and CSV, and Parquet when pyarrow is installed (one row
+group per chunk).
+
+Under ASGI the view streams astream, which reads each chunk in the request's
+database thread, so chunks are sent as they are encoded instead of Django
+consuming the whole sync iterator first.
+"""
+import csv
+import io
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Feature, Vote
+
+EXPORT_CHUNK_SIZE = 2000
+
+# format -> (content type, file extension)
+FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# dataset -> [(column, type)]; types: string, int, timestamp
+COLUMNS = {
+    'features': [
+        ('id', 'string'), ('title', 'string'), ('description', 'string'), ('status', 'string'),
+        ('created_by_id', 'int'), ('created_by', 'string'), ('vote_count', 'int'),
+        ('created_at', 'timestamp'), ('updated_at', 'timestamp'),
+    ],
+    'votes': [
+        ('id', 'string'), ('feature_id', 'string'), ('user_id', 'int'), ('created_at', 'timestamp'),
+    ],
+}
+
+def parquet_available():
+    try:
+        import pyarrow # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _queryset(dataset):
+    """
+    The dataset's rows as value tuples in COLUMNS order. Ordering is dropped:
+    sorting millions of rows would cost more than the export itself.
+    """
+    if dataset == 'features':
+        vote_counts = (
+            Vote.objects.filter(feature=OuterRef('pk'))
+            .order_by()
+            .values('feature')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return (
+            Feature.objects.order_by()
+            .annotate(votes_total=Coalesce(Subquery(vote_counts, output_field=IntegerField()), 0))
+            .values_list(
+                'id', 'title', 'description', 'status', 'created_by_id', 'created_by__username',
+                'votes_total', 'created_at', 'updated_at'
+            )
+        )
+    return Vote.objects.order_by().values_list('id', 'feature_id', 'user_id', 'created_at')
+
+def rows(dataset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields lists of at most chunk_size value tuples.
+    """
+    queryset = _queryset(dataset)
+    if connections[queryset.db].settings_dict.get('DISABLE_SERVER_SIDE_CURSORS'):
+        # iterator() would fetch the whole result at once; the id is every dataset's first column
+        queryset = queryset.order_by('pk')
+        last_id = None
+        while True:
+            page = queryset if last_id is None else queryset.filter(pk__gt=last_id)
+            chunk = list(page[:chunk_size])
+            if chunk:
+                yield chunk
+            if len(chunk) < chunk_size:
+                return
+            last_id = chunk[-1][0]
+
+    chunk = []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _ndjson(dataset, chunks):
+    names = [name for name, _ in COLUMNS[dataset]]
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for chunk in chunks:
+        yield ''.join(encoder.encode(dict(zip(names, row))) + '\n' for row in chunk).encode()
+
+def _csv(dataset, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain():
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow([name for name, _ in COLUMNS[dataset]])
+    yield drain()
+    for chunk in chunks:
+        writer.writerows(
+            [value.isoformat() if hasattr(value, 'isoformat') else value for value in row] for row in chunk
+        )
+        yield drain()
+
+class _ChunkSink(io.RawIOBase):
+    """
+    A write-only file for pyarrow whose written bytes are taken back after each row group.
+    """
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data, self._parts = b''.join(self._parts), []
+        return data
+
+def _parquet(dataset, chunks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {'string': pa.string(), 'int': pa.int64(), 'timestamp': pa.timestamp('us', tz='UTC')}
+    schema = pa.schema([(name, types[kind]) for name, kind in COLUMNS[dataset]])
+    converters = [str if kind == 'string' else None for _, kind in COLUMNS[dataset]]
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for chunk in chunks:
+        columns = [
+            [None if value is None else convert(value) for value in column] if convert else list(column)
+            for convert, column in zip(converters, zip(*chunk))
+        ]
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema
+        ))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+_ENCODERS = {'ndjson': _ndjson, 'csv': _csv, 'parquet': _parquet}
+
+def stream(dataset, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the encoded export as byte strings, one per chunk of rows.
+    Raises ValueError for an unknown dataset or format.
+    """
+    if dataset not in COLUMNS:
+        raise ValueError(f"Unknown dataset '{dataset}', expected one of: {', '.join(COLUMNS)}.")
+    if export_format not in FORMATS:
+        raise ValueError(f"Unknown format '{export_format}', expected one of: {', '.join(FORMATS)}.")
+    if export_format == 'parquet' and not parquet_available():
+        raise ValueError('The parquet format requires pyarrow (pip install pyarrow).')
+    return _ENCODERS[export_format](dataset, rows(dataset, chunk_size))
+
+async def _aiterate(chunks):
+    # One thread hop per chunk; thread_sensitive keeps the cursor on its connection's thread
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)() # Closes the cursor when the client goes away
+
+def astream(dataset, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Async variant of stream for ASGI servers: an async iterator over the same
+    byte strings. Raises ValueError for an unknown dataset or format.
+    """
+    return _aiterate(stream(dataset, export_format, chunk_size))
+
+def filename(dataset, export_format):
+    return f'{dataset}.{FORMATS[export_format][1]}'
@@ -0,0 +1,121 @@
+# features/hot.py
+"""
+Time-decayed "hot" score for ?ordering=hot.
+
+A feature's hotness at time T is the sum, over its creation and each of its
+votes, of 2 ** -((T - t) / HALF_LIFE_SECONDS), i.e. every vote counts half as
+much after each half-life. Since the decay factor 2 ** (-T / HALF_LIFE) is
+shared by all features, the ranking never changes as time passes, so
+Feature.hot_score stores log2 of the undecayed sum,
+
+    log2(2 ** e(created_at) + sum(2 ** e(vote.created_at)))  with e(t) = (t - EPOCH) / HALF_LIFE_SECONDS
+
+which only changes when votes do. Upvotes fold their term in with an
+in-place log-add-exp UPDATE; unvotes and batch writes mark the feature stale
+and the refresh_hot_scores job recomputes it from Vote rows.
+
+Stale features are kept in a Redis hash of feature id -> times marked. The
+job reads it without dequeuing, and only removes a feature once its new
+score is committed and if it wasn't marked again in the meantime, so neither
+a failed run nor a concurrent unvote loses a mark.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Least, Log, Power
+
+from .redis_client import get_connection, run_script
+
+HALF_LIFE_SECONDS = 12 * 3600
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+STALE_KEY = 'hot:stale'
+RECOMPUTE_CHUNK_SIZE = 1000
+
+# KEYS: stale hash; ARGV: feature id, mark read, ... Dequeues features still at the mark read.
+_CLEAR_STALE_SCRIPT = """
+for i = 1, #ARGV, 2 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+return 0
+"""
+
+def exponent(moment):
+    return (moment - EPOCH).total_seconds() / HALF_LIFE_SECONDS
+
+def add_vote_expression(voted_at):
+    """
+    Expression adding a vote cast at voted_at to the stored score:
+    log2(2 ** s + 2 ** x) = max(s, x) + log2(1 + 2 ** (min(s, x) - max(s, x))).
+    """
+    x = Value(exponent(voted_at))
+    high = Greatest(F('hot_score'), x)
+    low = Least(F('hot_score'), x)
+    # Clamped: PostgreSQL raises on float underflow, and 2 ** -64 is already negligible
+    gap = Greatest(low - high, Value(-64.0))
+    return high + Log(Value(2.0), Value(1.0) + Power(Value(2.0), gap))
+
+def score(created_at, voted_at):
+    """
+    Computes a feature's stored score from its creation time and its votes' times.
+    """
+    exponents = [exponent(created_at)] + [exponent(moment) for moment in voted_at]
+    high = max(exponents)
+    return high + math.log2(sum(2 ** (value - high) for value in exponents))
+
+def mark_stale(feature_ids, pipe=None):
+    """
+    Queues features for the next refresh_hot_scores run. Without Redis, only
+    the periodic full refresh (refresh_hot_scores --all) corrects them.
+    """
+    conn = pipe if pipe is not None else get_connection()
+    if conn is not None and feature_ids:
+        for feature_id in feature_ids:
+            conn.hincrby(STALE_KEY, str(feature_id), 1)
+
+def stale_features():
+    """
+    Returns the queued features as {feature id: mark}, without dequeuing them (see clear_stale).
+    """
+    conn = get_connection()
+    if conn is None:
+        return {}
+    return {
+        (feature_id.decode() if isinstance(feature_id, bytes) else feature_id): int(mark)
+        for feature_id, mark in conn.hgetall(STALE_KEY).items()
+    }
+
+def clear_stale(marks):
+    """
+    Dequeues recomputed features, given as {feature id: mark read by stale_features()},
+    except those marked again since.
+    """
+    if marks:
+        args = [value for feature_id, mark in marks.items() for value in (str(feature_id), mark)]
+        run_script(_CLEAR_STALE_SCRIPT, [STALE_KEY], args)
+
+def recompute(feature_ids):
+    """
+    Recomputes the stored scores of the given features from their Vote rows,
+    with the features locked so an upvote can't fold its term into a score
+    that is being replaced. Returns the number of features updated.
+    """
+    from .models import Feature, Vote # Local import, models import this module
+
+    with transaction.atomic():
+        features = list(
+            Feature.objects.filter(pk__in=feature_ids).order_by('pk').select_for_update().only('pk', 'created_at')
+        )
+        if not features:
+            return 0
+        voted_at = {}
+        rows = Vote.objects.filter(feature_id__in=[feature.pk for feature in features]).order_by().values_list('feature_id', 'created_at')
+        for feature_id, created_at in rows.iterator(chunk_size=RECOMPUTE_CHUNK_SIZE):
+            voted_at.setdefault(feature_id, []).append(created_at)
+        for feature in features:
+            feature.hot_score = score(feature.created_at, voted_at.get(feature.pk, []))
+        Feature.objects.bulk_update(features, ['hot_score'])
+    return len(features)
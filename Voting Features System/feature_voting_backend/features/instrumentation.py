@@ -0,0 +1,287 @@
+# features/instrumentation.py
+"""
+Per-request instrumentation: SQL queries and their time, cache operations
+(with hits and misses), raw Redis commands and serializer time.
+
+RequestMetricsMiddleware measures a sampled share of requests
+(REQUEST_METRICS_SAMPLE_RATE): it opens a RequestMetrics collector in a
+context variable, which the database wrapper, the instrumented cache
+backends, the counting Redis client (redis_client.get_connection) and the
+serializers add to. The totals go out in a Server-Timing header and to the
+/metrics histograms (features/metrics.py). Unsampled requests only pay for
+one random() call and one context variable lookup per query or cache call.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django_redis.cache import RedisCache
+
+_current = ContextVar('request_metrics', default=None)
+_MISSING = object()
+
+def get_sample_rate():
+    return getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 0.05)
+
+def current():
+    """
+    Returns the RequestMetrics of the request being measured, or None.
+    """
+    return _current.get()
+
+class RequestMetrics:
+    """
+    Totals of one measured request. Durations are in seconds.
+    """
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_operations = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_time = 0.0
+        self.redis_commands = 0
+        self.redis_time = 0.0
+        self.serializer_time = 0.0
+        self._cache_depth = 0
+        self._serializer_depth = 0
+
+    def cache_call(self, operation, call, *args, **kwargs):
+        """
+        Runs a cache backend call, counting it unless it is made by another
+        measured call (e.g. the default get_many calling get per key).
+        """
+        if self._cache_depth:
+            return call(*args, **kwargs)
+        self._cache_depth += 1
+        started = time.perf_counter()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            self.cache_time += time.perf_counter() - started
+            self.cache_operations[operation] = self.cache_operations.get(operation, 0) + 1
+            self._cache_depth -= 1
+
+    def server_timing(self, total):
+        """
+        Formats the totals as a Server-Timing header value (durations in milliseconds).
+        """
+        lookups = self.cache_hits + self.cache_misses
+        cache_description = f'{sum(self.cache_operations.values())} ops'
+        if lookups:
+            cache_description += f' {self.cache_hits}/{lookups} hits'
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_queries} queries"',
+            f'cache;dur={self.cache_time * 1000:.1f};desc="{cache_description}"',
+            f'redis;dur={self.redis_time * 1000:.1f};desc="{self.redis_commands} commands"',
+            f'serialize;dur={self.serializer_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+# SQL queries
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - started
+        metrics.db_queries += 1
+
+def _install_query_wrapper(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+connection_created.connect(_install_query_wrapper, dispatch_uid='features.instrumentation.query_wrapper')
+
+def _install_on_open_connections():
+    """
+    Covers this thread's connections opened before the signal handler was connected.
+    """
+    for connection in connections.all(initialized_only=True):
+        _install_query_wrapper(connection)
+
+# Cache backends
+
+class InstrumentedCacheMixin:
+    """
+    Counts a measured request's cache operations, hits and misses.
+    """
+    def get(self, key, default=None, version=None, **kwargs):
+        metrics = _current.get()
+        if metrics is None:
+            return super().get(key, default, version=version, **kwargs)
+        value = metrics.cache_call('get', super().get, key, _MISSING, version=version, **kwargs)
+        if value is _MISSING:
+            metrics.cache_misses += 1
+            return default
+        metrics.cache_hits += 1
+        return value
+
+    def get_many(self, keys, version=None, **kwargs):
+        metrics = _current.get()
+        if metrics is None:
+            return super().get_many(keys, version=version, **kwargs)
+        keys = list(keys)
+        values = metrics.cache_call('get_many', super().get_many, keys, version=version, **kwargs)
+        metrics.cache_hits += len(values)
+        metrics.cache_misses += len(keys) - len(values)
+        return values
+
+def _instrument(operation):
+    def method(self, *args, **kwargs):
+        base = getattr(super(InstrumentedCacheMixin, self), operation)
+        metrics = _current.get()
+        if metrics is None:
+            return base(*args, **kwargs)
+        return metrics.cache_call(operation, base, *args, **kwargs)
+    method.__name__ = operation
+    return method
+
+for _operation in ('set', 'set_many', 'add', 'incr', 'decr', 'delete', 'delete_many', 'has_key', 'touch', 'clear'):
+    setattr(InstrumentedCacheMixin, _operation, _instrument(_operation))
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    pass
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+# Raw Redis commands (redis_client.get_connection)
+
+class _CountingCall:
+    def __init__(self, call, metrics):
+        self._call = call
+        self._metrics = metrics
+
+    def __call__(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._call(*args, **kwargs)
+        finally:
+            self._metrics.redis_time += time.perf_counter() - started
+            self._metrics.redis_commands += 1
+
+class _CountingPipeline:
+    """
+    A pipeline proxy; the whole pipeline counts as one command, sent on execute().
+    """
+    def __init__(self, pipeline, metrics):
+        self._pipeline = pipeline
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self._pipeline, name)
+
+    def execute(self, *args, **kwargs):
+        return _CountingCall(self._pipeline.execute, self._metrics)(*args, **kwargs)
+
+class CountingRedis:
+    """
+    A Redis client proxy counting the commands of a measured request.
+    """
+    def __init__(self, client, metrics):
+        self._client = client
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if name == 'pipeline':
+            return lambda *args, **kwargs: _CountingPipeline(attribute(*args, **kwargs), self._metrics)
+        if name == 'register_script':
+            # Scripts count when called, not when registered
+            return lambda script: _CountingCall(attribute(script), self._metrics)
+        if name == 'pubsub' or not callable(attribute):
+            return attribute
+        return _CountingCall(attribute, self._metrics)
+
+def wrap_redis(client):
+    metrics = _current.get()
+    return client if metrics is None or client is None else CountingRedis(client, metrics)
+
+# Serializers
+
+class SerializerTimingMixin:
+    """
+    Adds the time spent producing serializer.data to the measured request.
+    Nested serializers only run to_representation, so they aren't counted twice.
+    """
+    @property
+    def data(self):
+        metrics = _current.get()
+        if metrics is None or metrics._serializer_depth:
+            return super().data
+        metrics._serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+            metrics._serializer_depth -= 1
+
+# Middleware
+
+class RequestMetricsMiddleware:
+    """
+    Measures a sampled share of requests (sync and async views alike), adds a
+    Server-Timing header to their responses and records them for /metrics.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        _install_on_open_connections()
+
+    def _start(self):
+        rate = get_sample_rate()
+        if not rate or random.random() >= rate:
+            return None
+        _install_on_open_connections()
+        return _current.set(RequestMetrics()), time.perf_counter()
+
+    def _finish(self, request, response, token, started):
+        from . import metrics as metrics_registry # Local import, metrics imports this module
+
+        total = time.perf_counter() - started
+        request_metrics = _current.get()
+        _current.reset(token)
+        response['Server-Timing'] = request_metrics.server_timing(total)
+        metrics_registry.observe(request, response, request_metrics, total)
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        measurement = self._start()
+        if measurement is None:
+            return self.get_response(request)
+        token, started = measurement
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            _current.reset(token)
+            raise
+        return self._finish(request, response, token, started)
+
+    async def __acall__(self, request):
+        measurement = self._start()
+        if measurement is None:
+            return await self.get_response(request)
+        token, started = measurement
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            _current.reset(token)
+            raise
+        return self._finish(request, response, token, started)
@@ -0,0 +1,177 @@
+# features/leaderboard.py
+"""
+Top-voted features leaderboard, kept in Redis sorted sets (one per status).
+
+Scores are vote counts and members are feature ids. Updates are O(log N)
+ZINCRBY calls from the vote write paths, and reads are O(log N + k)
+ZREVRANGE calls. A status' sorted set is only updated once it has been
+built; the first read after a cold start (or a cache flush) rebuilds it
+from the persisted Feature.vote_count column.
+"""
+import uuid
+
+from .redis_client import get_connection, guard, run_script
+
+REBUILD_CHUNK_SIZE = 5000
+
+def _key(status):
+    return f'leaderboard:features:{status}'
+
+def _built_key(status):
+    return f'leaderboard:features:{status}:built'
+
+def is_built(status, conn=None):
+    conn = conn or get_connection()
+    return conn is not None and bool(conn.exists(_built_key(status)))
+
+def rebuild(status, conn=None):
+    """
+    Rebuilds the sorted set for a status from the DB, in chunks.
+    The new set is written to a temporary key and swapped in atomically.
+    """
+    from .models import Feature # Local import, models import this module
+
+    conn = conn or get_connection()
+    if conn is None:
+        return
+    tmp_key = f'{_key(status)}:rebuild'
+    conn.delete(tmp_key)
+    rows = Feature.objects.filter(status=status).values_list('pk', 'vote_count').order_by()
+    batch = {}
+    for feature_id, vote_count in rows.iterator(chunk_size=REBUILD_CHUNK_SIZE):
+        batch[str(feature_id)] = vote_count
+        if len(batch) >= REBUILD_CHUNK_SIZE:
+            conn.zadd(tmp_key, batch)
+            batch = {}
+    if batch:
+        conn.zadd(tmp_key, batch)
+
+    pipe = conn.pipeline(transaction=True)
+    if conn.exists(tmp_key):
+        pipe.rename(tmp_key, _key(status))
+    else:
+        pipe.delete(_key(status))
+    pipe.set(_built_key(status), 1)
+    pipe.execute()
+
+def invalidate(statuses):
+    """
+    Drops the built markers so the next read rebuilds from the DB.
+    """
+    conn = get_connection()
+    if conn is not None:
+        conn.delete(*[_built_key(status) for status in statuses])
+
+# Increments the member in whichever status set holds it; a feature belongs to exactly one
+_RECORD_VOTE_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('ZSCORE', key, ARGV[1]) then
+        redis.call('ZINCRBY', key, ARGV[2], ARGV[1])
+        return 1
+    end
+end
+return 0
+"""
+
+def record_vote(feature_id, delta, pipe=None):
+    """
+    Applies a vote delta to a feature's score in one round trip (or queued on
+    pipe), without the caller having to load the feature's status. Features
+    absent from every set (sets not built yet) are left for the next rebuild.
+    """
+    from .models import Feature # Local import, models import this module
+
+    run_script(_RECORD_VOTE_SCRIPT, [_key(status) for status, _ in Feature.STATUS_CHOICES], [str(feature_id), delta], pipe)
+
+def add_feature(feature_id, status, vote_count=0):
+    conn = get_connection()
+    if conn is not None and is_built(status, conn):
+        conn.zadd(_key(status), {str(feature_id): vote_count})
+
+def set_scores(scores_by_status):
+    """
+    Sets exact scores, e.g. after a batch write recomputed counts.
+    scores_by_status maps status -> {feature_id: vote_count}.
+    """
+    conn = get_connection()
+    if conn is None:
+        return
+    for status, scores in scores_by_status.items():
+        if scores and is_built(status, conn):
+            conn.zadd(_key(status), {str(feature_id): score for feature_id, score in scores.items()})
+
+def remove_feature(feature_id, status):
+    conn = get_connection()
+    if conn is not None:
+        conn.zrem(_key(status), str(feature_id))
+
+def remove_features(feature_ids):
+    """
+    Removes features from every status set in one round trip, e.g. when their
+    status may have changed while Redis was unavailable.
+    """
+    from .models import Feature # Local import, models import this module
+
+    conn = get_connection()
+    if conn is None or not feature_ids:
+        return
+    members = [str(feature_id) for feature_id in feature_ids]
+    pipe = conn.pipeline(transaction=False)
+    for status, _ in Feature.STATUS_CHOICES:
+        pipe.zrem(_key(status), *members)
+    pipe.execute()
+
+# Moves a member's score from the old status set (KEYS[1]) to the new one (KEYS[2], if built per KEYS[3])
+# in one step, so a vote's ZINCRBY can't fall in between; returns 0 when the old set doesn't hold it
+_MOVE_SCRIPT = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not score then
+    return 0
+end
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    redis.call('ZADD', KEYS[2], score, ARGV[1])
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+return 1
+"""
+
+def move_feature(feature_id, old_status, new_status):
+    """
+    Moves a feature between status sets after a status change, with the score
+    it has there. A feature missing from the old set (e.g. not built yet) gets
+    its vote_count read again from the database.
+    """
+    from .models import Feature # Local import, models import this module
+
+    if get_connection() is None:
+        return
+    if not run_script(_MOVE_SCRIPT, [_key(old_status), _key(new_status), _built_key(new_status)], [str(feature_id)]):
+        vote_count = Feature.objects.filter(pk=feature_id).values_list('vote_count', flat=True).first()
+        if vote_count is not None:
+            add_feature(feature_id, new_status, vote_count)
+
+def _top_from_database(status, limit):
+    from .models import Feature
+    return list(
+        Feature.objects.filter(status=status)
+        .order_by('-vote_count', '-created_at')
+        .values_list('pk', flat=True)[:limit]
+    )
+
+def top_feature_ids(status, limit):
+    """
+    Returns up to limit feature ids for a status, highest score first.
+    Falls back to an indexed ORDER BY on vote_count when Redis is not
+    configured or unavailable.
+    """
+    conn = get_connection()
+    if conn is None:
+        return _top_from_database(status, limit)
+
+    def from_redis():
+        if not is_built(status, conn):
+            rebuild(status, conn)
+        members = conn.zrevrange(_key(status), 0, limit - 1)
+        return [uuid.UUID(member.decode() if isinstance(member, bytes) else member) for member in members]
+
+    return guard(from_redis, lambda: _top_from_database(status, limit))
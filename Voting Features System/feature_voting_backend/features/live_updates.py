@@ -0,0 +1,242 @@
+# features/live_updates.py
+"""
+Live vote counts for open clients, pushed as server-sent events.
+
+The vote write paths publish the new counts of the features they touched on
+a Redis pub/sub channel. Publishing is coalesced too: each process sends at
+most one message per WINDOW_SECONDS, with the latest count of every feature
+its votes changed in the window. Each web process holds a single
+subscription and dispatches incoming counts to its open streams, which only
+listen to the feature ids they asked for. A stream coalesces updates per
+window as well: the first update opens the window and one event carries the
+latest count of every feature that changed in it, however many votes were cast.
+
+Streams are async generators under ASGI (astream), so an open stream holds
+no thread; under WSGI (stream) each one holds a worker thread for up to
+MAX_STREAM_SECONDS, so serve them from an ASGI server.
+
+Without Redis (or with LIVE_UPDATES_BROKER = 'local') counts are dispatched
+in-process, which only reaches streams served by the same process.
+"""
+import asyncio
+import json
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .redis_client import get_connection, guard
+
+CHANNEL = 'features:vote-counts'
+WINDOW_SECONDS = 0.25
+HEARTBEAT_SECONDS = 15 # Keeps proxies from closing idle streams
+MAX_STREAM_SECONDS = 300 # Frees the worker; EventSource clients reconnect automatically
+RETRY_MILLISECONDS = 3000
+MAX_SUBSCRIBED_IDS = 200
+
+def _use_redis():
+    return getattr(settings, 'LIVE_UPDATES_BROKER', 'redis') == 'redis' and get_connection() is not None
+
+class Subscriber:
+    """
+    One open stream: the feature ids it follows and the counts pending since its
+    last event. Async streams pass their event loop, which offers then wake up.
+    """
+    def __init__(self, feature_ids, loop=None):
+        self.feature_ids = frozenset(feature_ids)
+        self.pending = {}
+        self._condition = threading.Condition()
+        self._loop = loop
+        self._event = asyncio.Event() if loop is not None else None
+
+    def offer(self, feature_id, vote_count):
+        with self._condition:
+            self.pending[feature_id] = vote_count # Later counts replace earlier ones
+            self._condition.notify()
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._event.set) # Offers come from the listener thread
+            except RuntimeError:
+                pass # Loop closed: the stream is gone and about to unsubscribe
+
+    def wait(self, timeout):
+        """
+        Blocks until an update is pending or timeout elapses. Returns True if one is pending.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self.pending, timeout=timeout)
+
+    async def await_pending(self, timeout):
+        """
+        Async variant of wait, for subscribers created with a loop.
+        """
+        # A timer on the same event rather than wait_for, which can swallow a
+        # cancellation (client disconnect) on Python < 3.12
+        timer = self._loop.call_later(timeout, self._event.set)
+        try:
+            await self._event.wait()
+        finally:
+            timer.cancel()
+        self._event.clear()
+        with self._condition:
+            return bool(self.pending)
+
+    def drain(self):
+        with self._condition:
+            pending, self.pending = self.pending, {}
+            return pending
+
+class Hub:
+    """
+    Routes published counts to the subscribers of this process.
+    """
+    def __init__(self):
+        self._subscribers = {} # feature id -> set of subscribers
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def subscribe(self, feature_ids, loop=None):
+        subscriber = Subscriber(feature_ids, loop)
+        with self._lock:
+            for feature_id in subscriber.feature_ids:
+                self._subscribers.setdefault(feature_id, set()).add(subscriber)
+        if _use_redis():
+            self._ensure_listener()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            for feature_id in subscriber.feature_ids:
+                subscribers = self._subscribers.get(feature_id)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._subscribers[feature_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({subscriber for subscribers in self._subscribers.values() for subscriber in subscribers})
+
+    def dispatch(self, counts):
+        with self._lock:
+            targets = [
+                (subscriber, feature_id, vote_count)
+                for feature_id, vote_count in counts.items()
+                for subscriber in self._subscribers.get(feature_id, ())
+            ]
+        for subscriber, feature_id, vote_count in targets:
+            subscriber.offer(feature_id, vote_count)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='live-vote-counts', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = get_connection().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        self.dispatch(json.loads(message['data'])['counts'])
+            except Exception: # Connection lost: resubscribe after a pause
+                time.sleep(1)
+
+hub = Hub()
+
+class Publisher:
+    """
+    Coalesces this process' published counts per feature and sends them in one
+    pub/sub message per WINDOW_SECONDS, from a timer thread (live counts are
+    best effort: a window that can't be sent while Redis is unavailable is dropped).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def add(self, counts):
+        with self._lock:
+            self._pending.update(counts) # Later counts replace earlier ones
+            if self._timer is None:
+                self._timer = threading.Timer(WINDOW_SECONDS, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            counts, self._pending, self._timer = self._pending, {}, None
+        if counts:
+            guard(lambda: get_connection().publish(CHANNEL, json.dumps({'counts': counts})), lambda: None)
+
+publisher = Publisher()
+
+def publish(counts):
+    """
+    Publishes new vote counts, a dict mapping feature id -> count (None counts
+    are skipped). On Redis they are sent with the window's other counts.
+    """
+    counts = {str(feature_id): count for feature_id, count in counts.items() if count is not None}
+    if not counts:
+        return
+    if _use_redis():
+        publisher.add(counts)
+    else:
+        hub.dispatch(counts)
+
+def format_event(counts, event='votes'):
+    return f'event: {event}\ndata: {json.dumps(counts, cls=DjangoJSONEncoder)}\n\n'
+
+def _initial_event(load_counts):
+    initial_counts = {str(feature_id): count for feature_id, count in load_counts().items()}
+    return f'retry: {RETRY_MILLISECONDS}\n' + format_event(initial_counts)
+
+def stream(feature_ids, load_counts, window=None, heartbeat=None, lifetime=None):
+    """
+    Yields the SSE stream for a subscription: the current counts first (from
+    load_counts(), called once subscribed so no update falls in between), then one
+    'votes' event per window with the features that changed, and comment heartbeats.
+    """
+    window = WINDOW_SECONDS if window is None else window
+    heartbeat = HEARTBEAT_SECONDS if heartbeat is None else heartbeat
+    lifetime = MAX_STREAM_SECONDS if lifetime is None else lifetime
+    subscriber = hub.subscribe(str(feature_id) for feature_id in feature_ids)
+    try:
+        yield _initial_event(load_counts)
+        deadline = time.monotonic() + lifetime
+        while time.monotonic() < deadline:
+            if subscriber.wait(timeout=min(heartbeat, max(deadline - time.monotonic(), 0))):
+                time.sleep(window) # Let the window fill before sending
+                yield format_event(subscriber.drain())
+            else:
+                yield ': keep-alive\n\n'
+    finally:
+        hub.unsubscribe(subscriber)
+
+async def astream(feature_ids, load_counts, window=None, heartbeat=None, lifetime=None):
+    """
+    Async variant of stream, for ASGI servers: waiting for updates holds no
+    thread. load_counts is a regular function (it runs in a thread).
+    """
+    window = WINDOW_SECONDS if window is None else window
+    heartbeat = HEARTBEAT_SECONDS if heartbeat is None else heartbeat
+    lifetime = MAX_STREAM_SECONDS if lifetime is None else lifetime
+    subscriber = hub.subscribe((str(feature_id) for feature_id in feature_ids), asyncio.get_running_loop())
+    try:
+        yield await sync_to_async(_initial_event)(load_counts)
+        deadline = time.monotonic() + lifetime
+        idle_until = time.monotonic() + heartbeat
+        while time.monotonic() < deadline:
+            if await subscriber.await_pending(timeout=max(min(idle_until, deadline) - time.monotonic(), 0)):
+                await asyncio.sleep(window) # Let the window fill before sending
+                yield format_event(subscriber.drain())
+                idle_until = time.monotonic() + heartbeat
+            elif time.monotonic() >= idle_until:
+                yield ': keep-alive\n\n'
+                idle_until = time.monotonic() + heartbeat
+    finally:
+        hub.unsubscribe(subscriber)
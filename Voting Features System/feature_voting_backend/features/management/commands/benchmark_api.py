@@ -0,0 +1,74 @@
+# features/management/commands/benchmark_api.py
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from features import benchmark
+
+class Command(BaseCommand):
+    """
+    Seeds users, features and votes, then drives each scenario (list, retrieve,
+    upvote, unvote, register, token) with concurrent clients and reports p50/p95/p99
+    latency, throughput and SQL queries per request. --output stores the results
+    as JSON, to serve as the baseline of compare_benchmarks. Runs against whatever
+    database and cache the settings point at (SQLite or PostgreSQL, Redis or locmem).
+    The seeded data is deleted afterwards unless --keep-data is given.
+    """
+    help = 'Benchmark the voting API endpoints on seeded data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Users to seed.')
+        parser.add_argument('--features', type=int, default=500, help='Features to seed.')
+        parser.add_argument('--votes', type=int, default=5000, help='Votes to seed.')
+        parser.add_argument('--requests', type=int, default=300, help='Requests per scenario.')
+        parser.add_argument('--clients', type=int, default=4, help='Concurrent clients.')
+        parser.add_argument(
+            '--scenarios', nargs='+', choices=list(benchmark.SCENARIOS), default=list(benchmark.SCENARIOS),
+            help='Scenarios to run (upvote runs before unvote, which removes its votes).'
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the seeded votes.')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--keep-data', action='store_true', help='Keep the seeded data.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['features'] < 1:
+            raise CommandError('--users and --features must be at least 1.')
+
+        dataset = benchmark.seed(
+            options['users'], options['features'], options['votes'], rng=random.Random(options['seed'])
+        )
+        self.stdout.write(
+            f"Seeded {len(dataset['user_ids'])} users, {len(dataset['feature_ids'])} features "
+            f"and {len(dataset['votes'])} votes ({dataset['prefix']})."
+        )
+        results = {}
+        try:
+            # Fixed order, so unvote always follows upvote
+            for scenario in [name for name in benchmark.SCENARIOS if name in options['scenarios']]:
+                requests = benchmark.build_requests(scenario, dataset, options['requests'])
+                results[scenario] = metrics = benchmark.run_scenario(scenario, requests, options['clients'])
+                if not metrics['requests']:
+                    self.stdout.write(f'{scenario}: no requests')
+                    continue
+                self.stdout.write(
+                    f"{scenario}: {metrics['requests']} requests, {metrics['errors']} failed, "
+                    f"p50 {metrics['p50_ms']:.1f} ms, p95 {metrics['p95_ms']:.1f} ms, p99 {metrics['p99_ms']:.1f} ms, "
+                    f"{metrics['throughput_rps']:.0f} req/s, {metrics['queries_per_request']:.1f} queries/request"
+                )
+        finally:
+            if not options['keep_data']:
+                benchmark.cleanup(dataset)
+
+        if options['output']:
+            report = {
+                'created_at': timezone.now().isoformat(),
+                'environment': benchmark.environment(),
+                'config': {key: options[key] for key in ('users', 'features', 'votes', 'requests', 'clients', 'seed')},
+                'scenarios': results,
+            }
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}.")
+        self.stdout.write(self.style.SUCCESS('Benchmark complete.'))
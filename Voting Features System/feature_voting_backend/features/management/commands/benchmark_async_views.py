@@ -0,0 +1,133 @@
+# features/management/commands/benchmark_async_views.py
+import asyncio
+import statistics
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from features.models import Feature
+
+# Request mix, cycled: list page, retrieve, upvote, then unvote of the same (user, feature) pair
+OPERATIONS = ('list', 'retrieve', 'upvote', 'unvote')
+
+class Command(BaseCommand):
+    """
+    Load-tests the sync (WSGI) feature endpoints against their async (ASGI)
+    variants under /api/async/features/, with the same request mix on the same
+    seeded data. The sync path gets --workers threads, one request in flight
+    each, like a pool of sync workers; the async path serves --concurrency
+    requests in flight on a single event loop. Peak traced memory is reported
+    for both, so the worker count and the concurrency can be set to compare the
+    paths at equal memory. The seeded users and features are deleted afterwards.
+    """
+    help = 'Compare latency, throughput and memory of the sync and async feature endpoints.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per path.')
+        parser.add_argument('--workers', type=int, default=8, help='Threads driving the sync path.')
+        parser.add_argument('--concurrency', type=int, default=64, help='Requests in flight on the async path.')
+        parser.add_argument('--features', type=int, default=200, help='Features to seed.')
+        parser.add_argument('--users', type=int, default=50, help='Voting users to seed.')
+
+    def handle(self, *args, **options):
+        users, features = self._seed(options['features'], options['users'])
+        plan = self._plan(options['requests'], users, features)
+        try:
+            # The test clients send Host: testserver
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                for label, run in (
+                    (f'sync ({options["workers"]} workers)', lambda: self._run_sync(plan, options['workers'])),
+                    (f'async ({options["concurrency"]} in flight)', lambda: asyncio.run(self._run_async(plan, options['concurrency']))),
+                ):
+                    tracemalloc.start()
+                    started = time.perf_counter()
+                    latencies, errors = run()
+                    elapsed = time.perf_counter() - started
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                    self._report(label, latencies, errors, elapsed, peak)
+        finally:
+            get_user_model().objects.filter(pk__in=[user.pk for user, _ in users]).delete() # Cascades to features and votes
+        self.stdout.write(self.style.SUCCESS('Benchmark complete.'))
+
+    def _seed(self, feature_count, user_count):
+        User = get_user_model()
+        prefix = f'async-benchmark-{uuid.uuid4().hex[:8]}'
+        users = [
+            User.objects.create_user(username=f'{prefix}-{index}', password=uuid.uuid4().hex)
+            for index in range(user_count)
+        ]
+        features = Feature.objects.bulk_create([
+            Feature(title=f'{prefix} feature {index}', description='Benchmark feature.', created_by=users[0])
+            for index in range(feature_count)
+        ])
+        return [(user, str(AccessToken.for_user(user))) for user in users], features
+
+    def _plan(self, count, users, features):
+        """
+        Returns (method, path suffix, token) per request; the path suffix is
+        appended to /api/features/ or /api/async/features/.
+        """
+        plan = []
+        for index in range(count):
+            operation = OPERATIONS[index % len(OPERATIONS)]
+            pair = index // len(OPERATIONS)
+            _, token = users[pair % len(users)]
+            feature = features[(pair // len(users) + pair) % len(features)]
+            if operation == 'list':
+                plan.append(('get', f'?page={pair % 5 + 1}', token))
+            elif operation == 'retrieve':
+                plan.append(('get', f'{feature.id}/', token))
+            else:
+                plan.append(('post', f'{feature.id}/{operation}/', token))
+        return plan
+
+    def _run_sync(self, plan, workers):
+        local = threading.local()
+
+        def send(request):
+            method, suffix, token = request
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = Client()
+            started = time.perf_counter()
+            response = getattr(client, method)(f'/api/features/{suffix}', HTTP_AUTHORIZATION=f'Bearer {token}')
+            latency = time.perf_counter() - started
+            return latency, response.status_code
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(send, plan))
+        return [latency for latency, _ in results], sum(1 for _, code in results if code >= 500)
+
+    async def _run_async(self, plan, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(request):
+            method, suffix, token = request
+            async with semaphore:
+                started = time.perf_counter()
+                response = await getattr(client, method)(
+                    f'/api/async/features/{suffix}', headers={'Authorization': f'Bearer {token}'}
+                )
+                return time.perf_counter() - started, response.status_code
+
+        results = await asyncio.gather(*(send(request) for request in plan))
+        return [latency for latency, _ in results], sum(1 for _, code in results if code >= 500)
+
+    def _report(self, label, latencies, errors, elapsed, peak):
+        latencies = sorted(latency * 1000 for latency in latencies)
+        percentile = lambda fraction: latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+        self.stdout.write(
+            f'{label}: {len(latencies) / elapsed:.0f} req/s, median {statistics.median(latencies):.1f} ms, '
+            f'p95 {percentile(0.95):.1f} ms, p99 {percentile(0.99):.1f} ms, '
+            f'peak memory {peak / 2 ** 20:.1f} MiB, {errors} server errors'
+        )
@@ -0,0 +1,95 @@
+# features/management/commands/benchmark_connections.py
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from features import benchmark
+
+class Command(BaseCommand):
+    """
+    Measures request latency with each way of handling database and Redis
+    connections (benchmark.CONNECTION_MODES): new connections per request,
+    persistent connections, and a psycopg 3 pool (PostgreSQL only). Requests
+    go through the full stack as in benchmark_api, and connections are closed
+    after each request as a server would. Run it against the real database
+    and Redis: with local in-memory stand-ins connecting costs next to nothing.
+    """
+    help = 'Benchmark request latency with per-request, persistent and pooled connections.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Users to seed.')
+        parser.add_argument('--features', type=int, default=500, help='Features to seed.')
+        parser.add_argument('--votes', type=int, default=5000, help='Votes to seed.')
+        parser.add_argument('--requests', type=int, default=300, help='Requests per scenario and mode.')
+        parser.add_argument('--clients', type=int, default=4, help='Concurrent clients.')
+        parser.add_argument(
+            '--scenarios', nargs='+', choices=list(benchmark.SCENARIOS), default=['list', 'retrieve', 'upvote', 'unvote'],
+            help='Scenarios to run (register and token are dominated by password hashing).'
+        )
+        parser.add_argument(
+            '--modes', nargs='+', choices=benchmark.CONNECTION_MODES, default=list(benchmark.CONNECTION_MODES),
+            help='Connection modes to compare (pool is skipped when unavailable).'
+        )
+        parser.add_argument('--max-age', type=int, default=60, help='CONN_MAX_AGE of the persistent mode, in seconds.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the seeded votes.')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--keep-data', action='store_true', help='Keep the seeded data.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['features'] < 1:
+            raise CommandError('--users and --features must be at least 1.')
+        modes = [mode for mode in benchmark.CONNECTION_MODES if mode in options['modes']]
+        if 'pool' in modes and not benchmark.pool_available():
+            self.stdout.write('pool: skipped (needs PostgreSQL with psycopg 3 and psycopg_pool)')
+            modes.remove('pool')
+
+        dataset = benchmark.seed(
+            options['users'], options['features'], options['votes'], rng=random.Random(options['seed'])
+        )
+        self.stdout.write(
+            f"Seeded {len(dataset['user_ids'])} users, {len(dataset['feature_ids'])} features "
+            f"and {len(dataset['votes'])} votes ({dataset['prefix']})."
+        )
+        results = {}
+        try:
+            for mode in modes:
+                results[mode] = {}
+                with benchmark.connection_mode(mode, max_age=options['max_age']) as after_request:
+                    # Fixed order, so unvote removes the votes upvote cast and every mode votes on the same pairs
+                    for scenario in [name for name in benchmark.SCENARIOS if name in options['scenarios']]:
+                        requests = benchmark.build_requests(scenario, dataset, options['requests'])
+                        results[mode][scenario] = metrics = benchmark.run_scenario(
+                            scenario, requests, options['clients'], after_request=after_request
+                        )
+                        if metrics['requests']:
+                            self.stdout.write(self._describe(mode, scenario, metrics, modes[0], results[modes[0]].get(scenario)))
+        finally:
+            if not options['keep_data']:
+                benchmark.cleanup(dataset)
+
+        if options['output']:
+            report = {
+                'created_at': timezone.now().isoformat(),
+                'environment': benchmark.environment(),
+                'config': {
+                    key: options[key] for key in ('users', 'features', 'votes', 'requests', 'clients', 'max_age', 'seed')
+                },
+                'modes': results,
+            }
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}.")
+        self.stdout.write(self.style.SUCCESS('Benchmark complete.'))
+
+    def _describe(self, mode, scenario, metrics, reference_mode, reference):
+        line = (
+            f"{mode} {scenario}: {metrics['requests']} requests, {metrics['errors']} failed, "
+            f"p50 {metrics['p50_ms']:.1f} ms, p95 {metrics['p95_ms']:.1f} ms, p99 {metrics['p99_ms']:.1f} ms, "
+            f"{metrics['throughput_rps']:.0f} req/s"
+        )
+        # Speedup over the first mode run (per-request by default)
+        if mode != reference_mode and reference and reference['requests'] and metrics['p50_ms']:
+            line += f", p50 {reference['p50_ms'] / metrics['p50_ms']:.2f}x faster than {reference_mode}"
+        return line
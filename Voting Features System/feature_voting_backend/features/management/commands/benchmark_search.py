@@ -0,0 +1,94 @@
+# features/management/commands/benchmark_search.py
+import random
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from features import search
+from features.models import Feature
+
+WORDS = [
+    'dark', 'mode', 'export', 'csv', 'calendar', 'sync', 'offline', 'notifications', 'search',
+    'filter', 'tags', 'comments', 'mentions', 'attachments', 'keyboard', 'shortcuts', 'mobile',
+    'widget', 'report', 'dashboard', 'integration', 'slack', 'email', 'digest', 'theme', 'import',
+    'permissions', 'roles', 'audit', 'log', 'api', 'webhooks', 'archive', 'bulk', 'edit', 'undo',
+]
+DEFAULT_QUERIES = ['dark mode', 'calendar sync', 'webhooks', 'keyboard shortcuts undo']
+PAGE_SIZE = 10
+
+class Command(BaseCommand):
+    """
+    Compares ?q= search with the icontains scan clients would otherwise need,
+    on synthetic feature tables of the given sizes. Each size is seeded inside
+    a transaction that is rolled back afterwards, so existing data is untouched.
+    Each measurement mirrors a list request: COUNT(*) plus the first page.
+    """
+    help = 'Benchmark full-text search against icontains scans on seeded feature tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000], help='Feature counts to seed.')
+        parser.add_argument('--queries', nargs='+', default=DEFAULT_QUERIES, help='Search terms to time.')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query.')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Features per bulk insert.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic text.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        for size in options['sizes']:
+            with transaction.atomic():
+                self._seed(size, options['chunk_size'], rng)
+
+                started = time.perf_counter()
+                search.rebuild()
+                if not search.USE_POSTGRES_SEARCH:
+                    search.search(Feature.objects.all(), DEFAULT_QUERIES[0]).count() # Builds the in-process index
+                self.stdout.write(f'{size} features: index built in {(time.perf_counter() - started) * 1000:.0f} ms')
+
+                for query in options['queries']:
+                    ranked = self._time(lambda: search.search(Feature.objects.all(), query), options['repeat'])
+                    scan = self._time(
+                        lambda: Feature.objects.filter(Q(title__icontains=query) | Q(description__icontains=query)),
+                        options['repeat']
+                    )
+                    self.stdout.write(
+                        f'  q={query!r}: search median {ranked[0]:.1f} ms, p95 {ranked[1]:.1f} ms | '
+                        f'icontains median {scan[0]:.1f} ms, p95 {scan[1]:.1f} ms'
+                    )
+                transaction.set_rollback(True)
+            search.rebuild() # The fallback index still holds the rolled-back rows
+        self.stdout.write(self.style.SUCCESS('Benchmark complete.'))
+
+    def _seed(self, size, chunk_size, rng):
+        author = get_user_model().objects.create_user(
+            username=f'search-benchmark-{uuid.uuid4().hex[:8]}', password=uuid.uuid4().hex
+        )
+        # bulk_create skips Feature.save, so the index is built in one pass by search.rebuild()
+        for start in range(0, size, chunk_size):
+            Feature.objects.bulk_create([
+                Feature(
+                    title=' '.join(rng.choices(WORDS, k=4)),
+                    description=' '.join(rng.choices(WORDS, k=30)),
+                    created_by=author,
+                    vote_count=rng.randint(0, 500),
+                )
+                for _ in range(min(chunk_size, size - start))
+            ])
+
+    def _time(self, build_queryset, repeat):
+        """
+        Returns (median, p95) milliseconds of COUNT(*) plus the first page.
+        """
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset = build_queryset()
+            queryset.count()
+            list(queryset[:PAGE_SIZE])
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.95))]
@@ -0,0 +1,116 @@
+# features/management/commands/benchmark_vote_storage.py
+import json
+import random
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from features import partitioning
+from features.ids import uuid7
+from features.models import Feature, Vote
+
+ID_SCHEMES = {'uuid4': uuid.uuid4, 'uuid7': uuid7}
+
+class Command(BaseCommand):
+    """
+    Measures vote insert throughput and lookup latency for each id scheme
+    (random uuid4 vs time-ordered uuid7) against the current votes table layout.
+    Run it before and after partition_votes to compare layouts. Each scheme
+    runs in a transaction that is rolled back, so nothing is left behind.
+    """
+    help = 'Benchmark vote inserts and lookups with uuid4 vs uuid7 ids on the current table layout.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--votes', type=int, default=200000, help='Votes inserted per id scheme.')
+        parser.add_argument('--users', type=int, default=2000, help='Users seeded.')
+        parser.add_argument('--features', type=int, default=500, help='Features seeded.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Votes per bulk insert.')
+        parser.add_argument('--lookups', type=int, default=1000, help='Timed lookups of each kind.')
+        parser.add_argument('--ids', nargs='+', choices=list(ID_SCHEMES), default=list(ID_SCHEMES), help='Id schemes to compare.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed.')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+
+    def handle(self, *args, **options):
+        # At most one vote per (user, feature)
+        options['votes'] = min(options['votes'], options['users'] * options['features'])
+        layout = 'partitioned' if partitioning.is_partitioned() else 'plain'
+        self.stdout.write(f"Votes table: {layout}; {options['votes']} votes per scheme.")
+
+        results = {'layout': layout, 'votes': options['votes'], 'schemes': {}}
+        for scheme in options['ids']:
+            with transaction.atomic():
+                result = self._run(ID_SCHEMES[scheme], random.Random(options['seed']), options)
+                transaction.set_rollback(True)
+            results['schemes'][scheme] = result
+            line = (
+                f"  {scheme}: {result['inserts_per_second']:.0f} inserts/s | "
+                f"has-voted median {result['has_voted_ms'][0]:.2f} ms, p95 {result['has_voted_ms'][1]:.2f} ms | "
+                f"feature count median {result['feature_count_ms'][0]:.2f} ms, p95 {result['feature_count_ms'][1]:.2f} ms | "
+                f"user votes median {result['user_votes_ms'][0]:.2f} ms, p95 {result['user_votes_ms'][1]:.2f} ms"
+            )
+            if result['index_bytes'] is not None:
+                line += f" | index growth {result['index_bytes'] / 1024 / 1024:.1f} MiB"
+            self.stdout.write(line)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+        self.stdout.write(self.style.SUCCESS('Benchmark complete.'))
+
+    def _run(self, make_id, rng, options):
+        prefix = f'vote-benchmark-{uuid.uuid4().hex[:8]}'
+        users = get_user_model().objects.bulk_create([
+            get_user_model()(username=f'{prefix}-{i}', password='!') for i in range(options['users'])
+        ])
+        features = Feature.objects.bulk_create([
+            Feature(title=f'{prefix} {i}', description='Vote storage benchmark.', created_by=users[0])
+            for i in range(options['features'])
+        ])
+        pairs = [
+            (users[index // len(features)].pk, features[index % len(features)].pk)
+            for index in rng.sample(range(len(users) * len(features)), options['votes'])
+        ]
+
+        index_before = partitioning.index_size()
+        started = time.perf_counter()
+        for start in range(0, len(pairs), options['batch_size']):
+            Vote.objects.bulk_create([
+                Vote(id=make_id(), user_id=user_id, feature_id=feature_id)
+                for user_id, feature_id in pairs[start:start + options['batch_size']]
+            ])
+        elapsed = time.perf_counter() - started
+        index_after = partitioning.index_size()
+
+        sample = rng.sample(pairs, min(options['lookups'], len(pairs)))
+        return {
+            'inserts_per_second': len(pairs) / elapsed if elapsed else 0,
+            'index_bytes': None if index_before is None else index_after - index_before,
+            'has_voted_ms': self._time(
+                lambda user_id, feature_id: Vote.objects.filter(feature_id=feature_id, user_id=user_id).exists(), sample
+            ),
+            'feature_count_ms': self._time(
+                lambda user_id, feature_id: Vote.objects.filter(feature_id=feature_id).count(), sample
+            ),
+            'user_votes_ms': self._time(
+                lambda user_id, feature_id: list(
+                    Vote.objects.filter(user_id=user_id).order_by().values_list('feature_id', flat=True)
+                ),
+                sample
+            ),
+        }
+
+    def _time(self, lookup, sample):
+        """
+        Returns the (median, p95) latency in milliseconds of lookup over the sample.
+        """
+        timings = []
+        for user_id, feature_id in sample:
+            started = time.perf_counter()
+            lookup(user_id, feature_id)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.95))]
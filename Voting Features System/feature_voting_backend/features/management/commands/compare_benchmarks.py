@@ -0,0 +1,45 @@
+# features/management/commands/compare_benchmarks.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from features import benchmark
+
+class Command(BaseCommand):
+    """
+    Compares a benchmark_api result file with a baseline one and exits with an
+    error if any scenario regressed beyond the tolerances, for use in CI.
+    """
+    help = 'Fail if benchmark results regressed against a baseline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline', help='Baseline JSON written by benchmark_api --output.')
+        parser.add_argument('current', help='Results JSON to check.')
+        parser.add_argument('--latency-tolerance', type=float, default=0.25, help='Allowed latency growth, as a fraction.')
+        parser.add_argument('--throughput-tolerance', type=float, default=0.25, help='Allowed throughput drop, as a fraction.')
+        parser.add_argument('--query-tolerance', type=float, default=0.0, help='Allowed growth of queries per request.')
+
+    def handle(self, *args, **options):
+        baseline, current = self._load(options['baseline']), self._load(options['current'])
+        if baseline.get('environment') != current.get('environment'):
+            self.stdout.write(self.style.WARNING(
+                f"Environments differ: baseline {baseline.get('environment')}, current {current.get('environment')}."
+            ))
+        regressions = benchmark.compare(
+            baseline, current,
+            latency_tolerance=options['latency_tolerance'],
+            throughput_tolerance=options['throughput_tolerance'],
+            query_tolerance=options['query_tolerance']
+        )
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(regression))
+        if regressions:
+            raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}.')
+        self.stdout.write(self.style.SUCCESS('No regressions.'))
+
+    def _load(self, path):
+        try:
+            with open(path) as results:
+                return json.load(results)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
@@ -0,0 +1,38 @@
+# features/management/commands/export_votes.py
+from django.core.management.base import BaseCommand, CommandError
+
+from features import export
+
+class Command(BaseCommand):
+    """
+    Streams the votes (or the features with their vote counts) to a file or
+    stdout, reading the table in chunks through a server-side cursor, so memory
+    stays flat however many rows there are. See features/export.py.
+    """
+    help = 'Export votes or features (with vote counts) as NDJSON, CSV or Parquet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', choices=list(export.COLUMNS), default='votes', help='Table to export.')
+        parser.add_argument('--format', choices=list(export.FORMATS), default='ndjson', dest='export_format', help='Output format.')
+        parser.add_argument('--output', default='-', help="Output file, '-' for stdout (text formats only).")
+        parser.add_argument('--chunk-size', type=int, default=export.EXPORT_CHUNK_SIZE, help='Rows fetched and encoded at a time.')
+
+    def handle(self, *args, **options):
+        dataset, export_format, output = options['dataset'], options['export_format'], options['output']
+        if output == '-' and export_format == 'parquet':
+            raise CommandError('Parquet is binary; use --output to write it to a file.')
+        try:
+            chunks = export.stream(dataset, export_format, chunk_size=options['chunk_size'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if output == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending='')
+            return
+        written = 0
+        with open(output, 'wb') as destination:
+            for chunk in chunks:
+                destination.write(chunk)
+                written += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f'Exported {dataset} to {output} ({written} bytes).'))
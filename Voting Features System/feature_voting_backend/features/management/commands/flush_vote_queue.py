@@ -0,0 +1,36 @@
+# features/management/commands/flush_vote_queue.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from features import vote_queue
+
+class Command(BaseCommand):
+    """
+    Worker that drains the write-behind vote stream into the database.
+    Runs until interrupted, or until the stream is empty with --once.
+    """
+    help = "Flush votes accepted in VOTE_INGESTION_MODE = 'queued' from the Redis stream to the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Stream entries per batch.')
+        parser.add_argument('--block-ms', type=int, default=1000, help='How long to wait for new entries.')
+        parser.add_argument('--consumer', default='flusher', help='Consumer name within the stream group.')
+        parser.add_argument('--once', action='store_true', help='Exit once the stream is drained.')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = vote_queue.flush(
+                batch_size=options['batch_size'],
+                block_ms=None if options['once'] else options['block_ms'],
+                consumer=options['consumer'],
+            )
+            total += processed
+            if processed == 0 and options['once']:
+                break
+            if processed and options['verbosity'] > 1:
+                self.stdout.write(f'Flushed {processed} votes.')
+            if processed == 0:
+                time.sleep(0.05) # Avoid a hot loop if the backend does not honour BLOCK
+        self.stdout.write(self.style.SUCCESS(f'Flushed {total} votes.'))
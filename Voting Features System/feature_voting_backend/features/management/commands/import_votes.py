@@ -0,0 +1,86 @@
+# features/management/commands/import_votes.py
+import csv
+import json
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from features.bulk_votes import apply_bulk_votes_for_users
+
+class Command(BaseCommand):
+    """
+    Imports votes from a CSV or JSONL file with columns/keys user, feature and action
+    ('upvote' or 'unvote'). The file is streamed and applied in chunks, so memory
+    stays bounded regardless of its size; each chunk is one transaction, with a
+    single bulk insert and one counter update per touched feature.
+    """
+    help = 'Import votes from a CSV or JSONL file (user, feature, action) in chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file to import.')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension.')
+        parser.add_argument('--user', help='Username to apply every vote to, ignoring the user column.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows applied per chunk.')
+
+    def _rows(self, handle, file_format):
+        if file_format == 'csv':
+            yield from csv.DictReader(handle)
+            return
+        for line_number, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                raise CommandError(f'Invalid JSON on line {line_number}.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        User = get_user_model()
+
+        fixed_user_id = None
+        if options['user']:
+            fixed_user_id = User.objects.filter(username=options['user']).values_list('pk', flat=True).first()
+            if fixed_user_id is None:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        totals = Counter()
+        with open(path, newline='') as handle:
+            chunk = []
+            for row in self._rows(handle, file_format):
+                chunk.append(row)
+                if len(chunk) >= options['chunk_size']:
+                    totals.update(self._apply_chunk(chunk, fixed_user_id, User))
+                    chunk = []
+            if chunk:
+                totals.update(self._apply_chunk(chunk, fixed_user_id, User))
+
+        summary = ', '.join(f'{result}: {count}' for result, count in sorted(totals.items()))
+        self.stdout.write(self.style.SUCCESS(f'Imported {sum(totals.values())} rows ({summary or "nothing to do"}).'))
+
+    def _apply_chunk(self, rows, fixed_user_id, User):
+        """
+        Applies one chunk, grouped by user while keeping each user's rows in file order.
+        Returns a Counter of per-item results.
+        """
+        items_by_user = {}
+        for row in rows:
+            user_id = fixed_user_id if fixed_user_id is not None else row.get('user')
+            items_by_user.setdefault(str(user_id), []).append((row.get('feature'), row.get('action')))
+
+        valid_ids = [user_id for user_id in items_by_user if user_id.isdigit()]
+        existing_users = {str(pk) for pk in User.objects.filter(pk__in=valid_ids).values_list('pk', flat=True)}
+
+        results = Counter()
+        known_items = {}
+        for user_id, items in items_by_user.items():
+            if user_id in existing_users:
+                known_items[int(user_id)] = items
+            else:
+                results['unknown_user'] += len(items)
+        for items in apply_bulk_votes_for_users(known_items).values():
+            results.update(item['result'] for item in items)
+        return results
@@ -0,0 +1,34 @@
+# features/management/commands/partition_votes.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from features import partitioning
+
+class Command(BaseCommand):
+    """
+    Converts the votes table into hash partitions by feature (PostgreSQL only).
+    Optional, for very large vote tables; see features/partitioning.py.
+    """
+    help = 'Partition the votes table by hash of feature_id (PostgreSQL).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--partitions', type=int, default=partitioning.DEFAULT_PARTITIONS, help='Number of hash partitions.')
+        parser.add_argument('--dry-run', action='store_true', help='Only print the SQL.')
+
+    def handle(self, *args, **options):
+        if not partitioning.is_supported():
+            raise CommandError('Partitioning needs PostgreSQL.')
+        if options['partitions'] < 2:
+            raise CommandError('--partitions must be at least 2.')
+        if partitioning.is_partitioned():
+            raise CommandError('The votes table is already partitioned.')
+
+        sql = partitioning.statements(options['partitions'])
+        if options['dry_run']:
+            for statement in sql:
+                self.stdout.write(f'{statement};')
+            return
+        with transaction.atomic(), connection.cursor() as cursor:
+            for statement in sql:
+                cursor.execute(statement)
+        self.stdout.write(self.style.SUCCESS(f"Partitioned the votes table into {options['partitions']} partitions."))
@@ -0,0 +1,20 @@
+# features/management/commands/rebuild_duplicate_index.py
+from django.core.management.base import BaseCommand, CommandError
+
+from features import duplicates
+
+class Command(BaseCommand):
+    """
+    Rebuilds the MinHash/LSH buckets used to flag duplicate submissions, e.g. after
+    a Redis flush or after features were edited outside the API.
+    """
+    help = 'Rebuild the Redis index used for duplicate-feature detection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=duplicates.REBUILD_CHUNK_SIZE, help='Features per Redis pipeline.')
+
+    def handle(self, *args, **options):
+        indexed = duplicates.rebuild(chunk_size=options['chunk_size'])
+        if indexed is None:
+            raise CommandError('Duplicate detection requires the django-redis cache backend.')
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} features.'))
@@ -0,0 +1,18 @@
+# features/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from features import search
+
+class Command(BaseCommand):
+    """
+    Recomputes the stored search vectors, e.g. after adding the column to an
+    existing database or after bulk writes that bypassed Feature.save.
+    """
+    help = 'Rebuild the full-text search index over feature titles and descriptions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=search.REBUILD_CHUNK_SIZE, help='Features per UPDATE.')
+
+    def handle(self, *args, **options):
+        indexed = search.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} features.'))
@@ -0,0 +1,79 @@
+# features/management/commands/reconcile_vote_counts.py
+from django.core.management.base import BaseCommand
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from features import leaderboard
+from features.models import Feature, Vote, vote_count_cache_key, VOTE_COUNT_CACHE_TIMEOUT
+
+class Command(BaseCommand):
+    """
+    Recomputes Feature.vote_count from Vote aggregates and reports any drift.
+    Features are processed in primary-key chunks so memory stays bounded.
+    """
+    help = 'Recompute the denormalized Feature.vote_count column from Vote rows and report drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Number of features per chunk.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report drift, do not fix it.')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        checked = drifted = 0
+        last_pk = None
+
+        while True:
+            chunk = Feature.objects.order_by('pk')
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            chunk_pks = list(chunk.values_list('pk', flat=True)[:chunk_size])
+            if not chunk_pks:
+                break
+            last_pk = chunk_pks[-1]
+            checked += len(chunk_pks)
+
+            with transaction.atomic():
+                # Lock the chunk so concurrent F() updates queue behind the fix instead of being overwritten
+                locked = Feature.objects.filter(pk__in=chunk_pks).order_by('pk')
+                if not dry_run:
+                    locked = locked.select_for_update()
+                stored = dict(locked.values_list('pk', 'vote_count'))
+
+                actual = dict.fromkeys(stored, 0)
+                rows = (
+                    Vote.objects.filter(feature_id__in=chunk_pks)
+                    .order_by() # Drop Vote's default ordering so GROUP BY stays on feature_id
+                    .values('feature_id')
+                    .annotate(total=Count('id'))
+                )
+                for row in rows:
+                    actual[row['feature_id']] = row['total']
+
+                fixes = [
+                    Feature(pk=feature_id, vote_count=count)
+                    for feature_id, count in actual.items() if count != stored[feature_id]
+                ]
+                if fixes and not dry_run:
+                    Feature.objects.bulk_update(fixes, ['vote_count'])
+
+            for feature in fixes:
+                self.stdout.write(
+                    f'Feature {feature.pk}: stored {stored[feature.pk]}, actual {feature.vote_count}'
+                )
+            drifted += len(fixes)
+            if fixes and not dry_run:
+                cache.set_many(
+                    {vote_count_cache_key(feature.pk): feature.vote_count for feature in fixes},
+                    timeout=VOTE_COUNT_CACHE_TIMEOUT
+                )
+
+        if drifted and not dry_run:
+            # Scores in the leaderboard were built from the drifted counts
+            leaderboard.invalidate(dict(Feature.STATUS_CHOICES))
+
+        action = 'Found' if dry_run else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} features. {action} {drifted} with drifted vote counts.'
+        ))
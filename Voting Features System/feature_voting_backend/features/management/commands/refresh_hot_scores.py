@@ -0,0 +1,41 @@
+# features/management/commands/refresh_hot_scores.py
+from django.core.management.base import BaseCommand
+
+from features import hot
+from features.models import Feature
+
+class Command(BaseCommand):
+    """
+    Recomputes Feature.hot_score from Vote rows for the features queued by unvotes
+    and batch writes, or for every feature with --all (e.g. after a bulk import
+    or when Redis is not configured). Meant to run periodically, e.g. every minute.
+    """
+    help = 'Recompute time-decayed hot scores for stale features (or all with --all).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Recompute every feature, not just the queued ones.')
+        parser.add_argument('--chunk-size', type=int, default=hot.RECOMPUTE_CHUNK_SIZE, help='Features per chunk.')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        updated = 0
+        if options['all']:
+            last_pk = None
+            while True:
+                chunk = Feature.objects.order_by('pk')
+                if last_pk is not None:
+                    chunk = chunk.filter(pk__gt=last_pk)
+                chunk_pks = list(chunk.values_list('pk', flat=True)[:chunk_size])
+                if not chunk_pks:
+                    break
+                last_pk = chunk_pks[-1]
+                updated += hot.recompute(chunk_pks)
+        else:
+            marks = hot.stale_features()
+            feature_ids = list(marks)
+            for start in range(0, len(feature_ids), chunk_size):
+                chunk = feature_ids[start:start + chunk_size]
+                updated += hot.recompute(chunk)
+                # Dequeued once committed: a failed run leaves them for the next one
+                hot.clear_stale({feature_id: marks[feature_id] for feature_id in chunk})
+        self.stdout.write(self.style.SUCCESS(f'Recomputed hot scores for {updated} features.'))
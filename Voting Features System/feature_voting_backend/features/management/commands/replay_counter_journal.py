@@ -0,0 +1,23 @@
+# features/management/commands/replay_counter_journal.py
+from django.core.management.base import BaseCommand, CommandError
+
+from features import counter_journal
+from features.redis_client import REDIS_ERRORS
+
+class Command(BaseCommand):
+    """
+    Resyncs Redis (cached vote counts, leaderboard, voted sets, ...) for the vote
+    changes journaled while it was unavailable. The first request that finds Redis
+    back replays a few batches; this drains the rest. Safe to run periodically.
+    """
+    help = 'Replay vote changes journaled during a Redis outage.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=counter_journal.REPLAY_BATCH_SIZE, help='Entries per batch.')
+
+    def handle(self, *args, **options):
+        try:
+            replayed = counter_journal.replay(batch_size=options['batch_size'])
+        except REDIS_ERRORS as exc:
+            raise CommandError(f'Redis is still unavailable ({exc}); {counter_journal.pending_count()} entries left.')
+        self.stdout.write(self.style.SUCCESS(f'Replayed {replayed} journaled vote changes.'))
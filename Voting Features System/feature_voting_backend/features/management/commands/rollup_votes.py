@@ -0,0 +1,34 @@
+# features/management/commands/rollup_votes.py
+from django.core.management.base import BaseCommand, CommandError
+
+from features import rollups
+from features.models import DailyVoteRollup
+
+class Command(BaseCommand):
+    """
+    Folds new vote events into the hourly/daily rollups behind the trend endpoint,
+    advancing the watermark. Meant to run periodically, e.g. every minute.
+    """
+    help = 'Roll up vote events past the watermark into hourly and daily per-feature totals.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=rollups.BATCH_SIZE, help='Events per transaction.')
+        parser.add_argument(
+            '--backfill', action='store_true',
+            help='Seed the rollups from votes cast before the event log existed (run once).'
+        )
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            if DailyVoteRollup.objects.exists():
+                raise CommandError('Rollups already exist; backfilling again would double count votes.')
+            counted = rollups.backfill()
+            self.stdout.write(f'Backfilled {counted} existing votes.')
+
+        total = 0
+        while True:
+            processed = rollups.roll_up(batch_size=options['batch_size'])
+            total += processed
+            if processed < options['batch_size']:
+                break
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {total} vote events.'))
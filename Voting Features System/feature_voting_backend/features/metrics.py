@@ -0,0 +1,195 @@
+# features/metrics.py
+"""
+Prometheus-format histograms of the requests measured by
+RequestMetricsMiddleware, served on /metrics.
+
+Each process buffers its observations and adds them to a Redis hash at most
+every FLUSH_INTERVAL_SECONDS (one pipelined round trip), so /metrics reports
+the totals of every process whichever one serves the scrape. Without Redis
+the totals are per process. While Redis is unavailable observations stay
+buffered until a flush succeeds. Only sampled requests are observed: histogram
+counts are scaled down by feature_voting_request_metrics_sample_rate, while
+the distributions are representative.
+"""
+import hmac
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from .instrumentation import get_sample_rate
+from .redis_client import get_connection, guard
+
+REDIS_KEY = 'metrics:requests'
+FLUSH_INTERVAL_SECONDS = 5
+PREFIX = 'feature_voting'
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# name -> (help, buckets); histograms are labelled by view and method
+HISTOGRAMS = {
+    'request_duration_seconds': ('Time to produce the response.', SECONDS_BUCKETS),
+    'request_db_queries': ('SQL queries per request.', COUNT_BUCKETS),
+    'request_db_seconds': ('Time spent in SQL queries per request.', SECONDS_BUCKETS),
+    'request_cache_operations': ('Cache operations per request.', COUNT_BUCKETS),
+    'request_redis_commands': ('Raw Redis commands (pipelines count once) per request.', COUNT_BUCKETS),
+    'request_serializer_seconds': ('Time spent serializing per request.', SECONDS_BUCKETS),
+}
+# name -> help; counters are labelled by view (and operation for cache_operations_total)
+COUNTERS = {
+    'cache_operations_total': 'Cache operations of measured requests.',
+    'cache_hits_total': 'Cache lookups of measured requests that found the key.',
+    'cache_misses_total': 'Cache lookups of measured requests that missed.',
+}
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+class Registry:
+    """
+    Sums of observations keyed by (metric, labels, suffix); histogram buckets
+    are stored per bucket and made cumulative when rendered.
+    """
+    def __init__(self):
+        self._pending = {}
+        self._totals = {} # Used when there is no Redis
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def add(self, increments):
+        with self._lock:
+            for key, amount in increments.items():
+                self._pending[key] = self._pending.get(key, 0) + amount
+            due = time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECONDS
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        conn = get_connection()
+        if conn is None:
+            with self._lock:
+                for key, amount in pending.items():
+                    self._totals[key] = self._totals.get(key, 0) + amount
+            return
+
+        def send():
+            pipe = conn.pipeline(transaction=False)
+            for key, amount in pending.items():
+                pipe.hincrbyfloat(REDIS_KEY, '|'.join(key), amount)
+            pipe.execute()
+
+        def keep():
+            # Redis is unavailable: retried with the next flush
+            with self._lock:
+                for key, amount in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + amount
+
+        guard(send, keep)
+
+    def totals(self):
+        self.flush()
+        conn = get_connection()
+        if conn is None:
+            with self._lock:
+                return dict(self._totals)
+
+        def load():
+            totals = {}
+            for field, amount in conn.hgetall(REDIS_KEY).items():
+                field = field.decode() if isinstance(field, bytes) else field
+                totals[tuple(field.split('|'))] = float(amount)
+            return totals
+
+        return guard(load, dict) # Nothing to report while Redis is unavailable
+
+    def reset(self):
+        with self._lock:
+            self._pending, self._totals = {}, {}
+        conn = get_connection()
+        if conn is not None:
+            guard(lambda: conn.delete(REDIS_KEY), lambda: None)
+
+registry = Registry()
+
+def _histogram_increments(increments, name, labels, value):
+    buckets = HISTOGRAMS[name][1]
+    bucket = next((str(bound) for bound in buckets if value <= bound), '+Inf')
+    increments[(name, labels, f'bucket:{bucket}')] = 1
+    increments[(name, labels, 'sum')] = value
+    increments[(name, labels, 'count')] = 1
+
+def observe(request, response, request_metrics, total):
+    """
+    Records a measured request.
+    """
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match is not None and match.view_name else 'unresolved'
+    labels = _labels(view=view, method=request.method)
+    increments = {}
+    for name, value in (
+        ('request_duration_seconds', total),
+        ('request_db_queries', request_metrics.db_queries),
+        ('request_db_seconds', request_metrics.db_time),
+        ('request_cache_operations', sum(request_metrics.cache_operations.values())),
+        ('request_redis_commands', request_metrics.redis_commands),
+        ('request_serializer_seconds', request_metrics.serializer_time),
+    ):
+        _histogram_increments(increments, name, labels, value)
+    for operation, count in request_metrics.cache_operations.items():
+        increments[('cache_operations_total', _labels(view=view, operation=operation), '')] = count
+    if request_metrics.cache_hits:
+        increments[('cache_hits_total', _labels(view=view), '')] = request_metrics.cache_hits
+    if request_metrics.cache_misses:
+        increments[('cache_misses_total', _labels(view=view), '')] = request_metrics.cache_misses
+    registry.add(increments)
+
+def _format(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def render():
+    """
+    Renders the totals in the Prometheus text exposition format.
+    """
+    totals = registry.totals()
+    lines = [
+        f'# HELP {PREFIX}_request_metrics_sample_rate Share of requests measured.',
+        f'# TYPE {PREFIX}_request_metrics_sample_rate gauge',
+        f'{PREFIX}_request_metrics_sample_rate {_format(get_sample_rate())}',
+    ]
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {PREFIX}_{name} {help_text}', f'# TYPE {PREFIX}_{name} histogram']
+        label_sets = sorted({labels for metric, labels, _ in totals if metric == name})
+        for labels in label_sets:
+            cumulative = 0
+            for bound in [str(bound) for bound in buckets] + ['+Inf']:
+                cumulative += totals.get((name, labels, f'bucket:{bound}'), 0)
+                lines.append(f'{PREFIX}_{name}_bucket{{{labels},le="{bound}"}} {_format(cumulative)}')
+            lines.append(f'{PREFIX}_{name}_sum{{{labels}}} {_format(totals.get((name, labels, "sum"), 0))}')
+            lines.append(f'{PREFIX}_{name}_count{{{labels}}} {_format(totals.get((name, labels, "count"), 0))}')
+    for name, help_text in COUNTERS.items():
+        lines += [f'# HELP {PREFIX}_{name} {help_text}', f'# TYPE {PREFIX}_{name} counter']
+        for (metric, labels, _), amount in sorted(totals.items()):
+            if metric == name:
+                lines.append(f'{PREFIX}_{name}{{{labels}}} {_format(amount)}')
+    return '\n'.join(lines) + '\n'
+
+@require_GET
+def metrics_view(request):
+    """
+    GET /metrics. Requires 'Authorization: Bearer <METRICS_AUTH_TOKEN>' when that setting is set.
+    """
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', None)
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:27
+
+from django.db import migrations, models
+
+
+def count_existing_votes(apps, schema_editor):
+    """
+    Fills vote_count for the features that already have votes, in one UPDATE.
+    """
+    Feature = apps.get_model('features', 'Feature')
+    Vote = apps.get_model('features', 'Vote')
+    vote_counts = (
+        Vote.objects.filter(feature=models.OuterRef('pk'))
+        .order_by()
+        .values('feature')
+        .annotate(total=models.Count('pk'))
+        .values('total')
+    )
+    Feature.objects.filter(pk__in=Vote.objects.values('feature')).update(
+        vote_count=models.Subquery(vote_counts, output_field=models.PositiveIntegerField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feature',
+            name='vote_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(count_existing_votes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0002_feature_vote_count'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='feature',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='feature',
+            index=models.Index(fields=['-created_at', '-id'], name='feature_created_at_id_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:27
+
+from django.db import migrations
+
+from features.search import USE_POSTGRES_SEARCH
+
+if USE_POSTGRES_SEARCH:
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVectorField
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0003_feature_created_at_id_index'),
+    ]
+
+    operations = []
+
+if USE_POSTGRES_SEARCH:
+    # Feature.search_vector only exists on PostgreSQL (see features/search.py);
+    # fill it afterwards with `python manage.py rebuild_search_index`
+    Migration.operations += [
+        migrations.AddField(
+            model_name='feature',
+            name='search_vector',
+            field=SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='feature',
+            index=GinIndex(fields=['search_vector'], name='feature_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0004_feature_search_vector'),
+    ]
+
+    operations = [
+        # Filled afterwards with `python manage.py refresh_hot_scores --all`
+        migrations.AddField(
+            model_name='feature',
+            name='hot_score',
+            field=models.FloatField(db_index=True, default=0, editable=False),
+        ),
+    ]
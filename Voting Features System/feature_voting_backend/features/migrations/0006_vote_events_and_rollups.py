@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0005_feature_hot_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_event_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VoteEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('delta', models.SmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('feature', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='features.feature')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyVoteRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('votes', models.PositiveIntegerField(default=0)),
+                ('unvotes', models.PositiveIntegerField(default=0)),
+                ('feature', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='features.feature')),
+            ],
+            options={
+                'ordering': ['bucket_start'],
+                'abstract': False,
+                'unique_together': {('feature', 'bucket_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlyVoteRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('votes', models.PositiveIntegerField(default=0)),
+                ('unvotes', models.PositiveIntegerField(default=0)),
+                ('feature', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='features.feature')),
+            ],
+            options={
+                'ordering': ['bucket_start'],
+                'abstract': False,
+                'unique_together': {('feature', 'bucket_start')},
+            },
+        ),
+    ]
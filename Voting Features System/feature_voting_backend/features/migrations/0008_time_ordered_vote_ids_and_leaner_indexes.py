@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:27
+
+import django.db.models.deletion
+import features.ids
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0007_counterjournalentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Built before the single-column FK indexes it replaces are dropped
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['feature', 'user'], include=('created_at',), name='vote_feature_user_idx'),
+        ),
+        migrations.AlterField(
+            model_name='vote',
+            name='feature',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='features.feature'),
+        ),
+        migrations.AlterField(
+            model_name='vote',
+            name='id',
+            field=models.UUIDField(default=features.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='vote',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='votes', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
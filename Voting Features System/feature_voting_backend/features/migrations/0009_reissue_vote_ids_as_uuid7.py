@@ -0,0 +1,72 @@
+# features/migrations/0009_reissue_vote_ids_as_uuid7.py
+from django.db import migrations, models, transaction
+from django.db.models.functions import Cast, Substr
+
+from features.ids import uuid7_at
+
+BATCH_SIZE = 1000
+
+
+def _votes_to_reissue(Vote, connection):
+    """
+    Votes whose id is not a version 7 UUID, filtered in SQL so a resumed run doesn't read the reissued ones.
+    """
+    # The version is the 13th hex digit: position 15 of a native uuid's dashed text, 13 of a char(32) hex column
+    position = 15 if connection.features.has_native_uuid_field else 13
+    return Vote.objects.annotate(
+        id_version=Substr(Cast('id', output_field=models.CharField()), position, 1)
+    ).exclude(id_version='7')
+
+
+def _reissue_batch(Vote, connection, new_ids):
+    """
+    Gives each vote of new_ids, a list of (old_id, new_id) pairs, its new id.
+    """
+    if connection.vendor == 'postgresql':
+        # One statement per batch, joined to the old -> new id mapping
+        table = connection.ops.quote_name(Vote._meta.db_table)
+        rows = ', '.join(['(%s::uuid, %s::uuid)'] * len(new_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET id = m.new_id FROM (VALUES {rows}) AS m(old_id, new_id) WHERE {table}.id = m.old_id',
+                [str(vote_id) for pair in new_ids for vote_id in pair]
+            )
+    else:
+        # SQLite, for development databases: one UPDATE per row
+        for old_id, new_id in new_ids:
+            Vote.objects.filter(pk=old_id).update(id=new_id)
+
+
+def reissue_vote_ids(apps, schema_editor):
+    """
+    Gives the votes created with uuid4 ids a UUIDv7 id for their created_at, so
+    the primary key index is in creation order for old votes too (nothing
+    references a vote by id). Runs in keyset batches of one transaction and
+    one UPDATE each; ids that are already version 7 are never read, so it can
+    be resumed.
+    """
+    Vote = apps.get_model('features', 'Vote')
+    connection = schema_editor.connection
+    pending = _votes_to_reissue(Vote, connection).order_by('pk')
+    last_id = None
+    while True:
+        batch = pending if last_id is None else pending.filter(pk__gt=last_id)
+        batch = list(batch.values_list('pk', 'created_at')[:BATCH_SIZE])
+        if not batch:
+            return
+        last_id = batch[-1][0]
+        with transaction.atomic(using=connection.alias):
+            _reissue_batch(Vote, connection, [(vote_id, uuid7_at(created_at)) for vote_id, created_at in batch])
+
+
+class Migration(migrations.Migration):
+
+    atomic = False # One transaction per batch instead of one over the whole table
+
+    dependencies = [
+        ('features', '0008_time_ordered_vote_ids_and_leaner_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(reissue_vote_ids, migrations.RunPython.noop, elidable=True),
+    ]
@@ -1,9 +1,25 @@
 # features/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from django.conf import settings
+from django.utils import timezone
 from django.core.cache import cache # Import Django's cache
 import uuid
 
+from . import counter_journal, hot, leaderboard, live_updates, response_cache, search, voted_sets
+from .ids import uuid7
+from .redis_client import aguard, guard, pipelined
+
+if search.USE_POSTGRES_SEARCH:
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVectorField
+
+VOTE_COUNT_CACHE_TIMEOUT = 3600 # Seconds; the persisted Feature.vote_count is the source of truth
+
+def vote_count_cache_key(feature_id):
+    return f'feature:{feature_id}:votes'
+
 class Feature(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=255)
@@ -26,63 +42,445 @@ class Feature(models.Model):
         choices=STATUS_CHOICES,
         default='Open'
     )
+    # Denormalized number of votes, kept in step with Vote inserts/deletes using F() expressions.
+    # Indexed so features can be sorted and filtered by votes in SQL.
+    vote_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
+    # Time-decayed popularity for ?ordering=hot, kept in log space (see features/hot.py)
+    hot_score = models.FloatField(default=0, db_index=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True) # auto_now updates on every save
+    if search.USE_POSTGRES_SEARCH:
+        # Weighted title/description tsvector for ?q= search, refreshed in save()
+        search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
-        ordering = ['-created_at'] # Order by most recent features first
+        ordering = ['-created_at', '-id'] # Order by most recent features first, id breaks ties
+        indexes = [
+            # Supports the (created_at, id) keyset used by cursor pagination
+            models.Index(fields=['-created_at', '-id'], name='feature_created_at_id_idx'),
+        ]
+        if search.USE_POSTGRES_SEARCH:
+            indexes.append(GinIndex(fields=['search_vector'], name='feature_search_vector_idx'))
 
     def __str__(self):
         return self.title
 
+    # Columns written by the vote paths and search indexing with F()/SQL updates,
+    # never by a save of a possibly stale instance
+    DERIVED_FIELDS = ('vote_count', 'hot_score', 'search_vector')
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            # Creation counts as the first vote, so new features start out hot
+            self.hot_score = hot.exponent(timezone.now())
+        elif kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # A vote committed between loading this instance and saving it must survive the save
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+        search.index_feature(self, kwargs.get('update_fields'))
+
+    def delete(self, *args, **kwargs):
+        feature_id = self.pk
+        result = super().delete(*args, **kwargs)
+        search.unindex_feature(feature_id)
+        return result
+
     def get_vote_count(self):
         """
         Retrieves vote count from Redis cache. If not in cache,
-        calculates from DB and stores in cache.
+        reads the persisted vote_count column and stores it in cache.
+        While Redis is unavailable the column is read directly.
+        """
+        def load_count():
+            # This instance may be stale, so reload just the counter column (a primary key lookup)
+            self.refresh_from_db(fields=['vote_count'])
+            return self.vote_count
+
+        def cached_count():
+            cache_key = vote_count_cache_key(self.id)
+            count = cache.get(cache_key)
+            if count is None:
+                count = load_count()
+                cache.set(cache_key, count, timeout=VOTE_COUNT_CACHE_TIMEOUT)
+            return count
+
+        return guard(cached_count, load_count)
+
+    @classmethod
+    def get_vote_counts(cls, features):
+        """
+        Bulk variant of get_vote_count for a page of features.
+        Resolves every count with a single cache.get_many; features missing
+        from the cache use the vote_count column loaded with the page, so
+        no extra query is needed. While Redis is unavailable every count
+        comes from the loaded column.
+        Returns a dict mapping feature id -> vote count.
+        """
+        keys = {vote_count_cache_key(feature.id): feature for feature in features}
+
+        def cached_counts():
+            cached = cache.get_many(list(keys))
+            counts = {keys[key].id: count for key, count in cached.items()}
+
+            missing = {key: feature.vote_count for key, feature in keys.items() if key not in cached}
+            if missing:
+                cache.set_many(missing, timeout=VOTE_COUNT_CACHE_TIMEOUT)
+                counts.update({keys[key].id: count for key, count in missing.items()})
+            return counts
+
+        return guard(cached_counts, lambda: {feature.id: feature.vote_count for feature in features})
+
+    @classmethod
+    async def aget_vote_counts(cls, features):
+        """
+        Async variant of get_vote_counts: one MGET on the asyncio Redis client
+        (Django's async cache API when it isn't available), misses are filled
+        from the loaded column and written back.
+        """
+        from .async_redis import get_async_connection # Local import, only the async views need it
+
+        keys = {vote_count_cache_key(feature.id): feature for feature in features}
+
+        async def cached_counts():
+            conn = get_async_connection()
+            if conn is None:
+                cached = await cache.aget_many(list(keys))
+            else:
+                cached = {}
+                for key, value in zip(keys, await conn.mget([cache.make_key(key) for key in keys])):
+                    if value is not None:
+                        cached[key] = int(value) # django-redis stores integers unpickled
+            counts = {keys[key].id: count for key, count in cached.items()}
+
+            missing = {key: feature.vote_count for key, feature in keys.items() if key not in cached}
+            if missing:
+                if conn is None:
+                    await cache.aset_many(missing, timeout=VOTE_COUNT_CACHE_TIMEOUT)
+                else:
+                    pipe = conn.pipeline(transaction=False)
+                    for key, count in missing.items():
+                        pipe.set(cache.make_key(key), count, ex=VOTE_COUNT_CACHE_TIMEOUT)
+                    await pipe.execute()
+                counts.update({keys[key].id: count for key, count in missing.items()})
+            return counts
+
+        return await aguard(cached_counts, lambda: {feature.id: feature.vote_count for feature in features})
+
+    @classmethod
+    def adjust_vote_count(cls, feature_id, delta, voted_at=None):
+        """
+        Applies delta to the persisted vote_count with an F() expression, and folds
+        a vote cast at voted_at into hot_score in the same UPDATE.
+        Must run in the same transaction as the Vote insert/delete it accounts for.
+        """
+        # Clamp at zero so a drifted counter can't violate the positive check constraint
+        updates = {'vote_count': Greatest(F('vote_count') + delta, 0)}
+        if voted_at is not None:
+            updates['hot_score'] = hot.add_vote_expression(voted_at)
+        cls.objects.filter(pk=feature_id).update(**updates)
+
+    @classmethod
+    def recompute_vote_counts(cls, feature_ids):
+        """
+        Recomputes vote_count from Vote rows for the given features with a single
+        set-based UPDATE, for batch writes that bypass Vote.save/delete.
+        Must run in the same transaction as those writes.
+        """
+        totals = (
+            Vote.objects.filter(feature_id=OuterRef('pk'))
+            .order_by()
+            .values('feature_id')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        cls.objects.filter(pk__in=feature_ids).update(vote_count=Coalesce(Subquery(totals), 0))
+
+    @classmethod
+    def refresh_cached_vote_counts(cls, feature_ids):
+        """
+        Pushes the persisted counts of the given features to the cache and the
+        leaderboard in one pass, after a batch write.
+        Returns a dict mapping feature id -> vote count.
+        """
+        counts = {}
+        scores_by_status = {}
+        for feature_id, status, vote_count in cls.objects.filter(pk__in=feature_ids).values_list('pk', 'status', 'vote_count'):
+            counts[feature_id] = vote_count
+            scores_by_status.setdefault(status, {})[feature_id] = vote_count
+        cache.set_many(
+            {vote_count_cache_key(feature_id): count for feature_id, count in counts.items()},
+            timeout=VOTE_COUNT_CACHE_TIMEOUT
+        )
+        leaderboard.set_scores(scores_by_status)
+        live_updates.publish(counts)
+        if scores_by_status:
+            response_cache.bump(list(scores_by_status))
+        return counts
+
+    @classmethod
+    def adjust_cached_vote_count(cls, feature_id, delta):
+        """
+        Applies delta to the cached counter. If the key expired or was evicted
+        (incr/decr raise ValueError), it is reseeded from the persisted column
+        instead of being left out of step.
+        Returns the new count (None if the feature no longer exists).
         """
-        cache_key = f'feature:{self.id}:votes'
-        count = cache.get(cache_key)
-        if count is None:
-            count = self.votes.count() # Count related Vote objects
-            # Cache for a reasonable duration (e.g., 1 hour), or indefinitely if managed by save/delete hooks
-            cache.set(cache_key, count, timeout=3600)
-        return count
+        cache_key = vote_count_cache_key(feature_id)
+        try:
+            if delta >= 0:
+                return cache.incr(cache_key, delta)
+            return cache.decr(cache_key, -delta)
+        except ValueError:
+            count = cls.objects.filter(pk=feature_id).values_list('vote_count', flat=True).first()
+            if count is not None:
+                cache.set(cache_key, count, timeout=VOTE_COUNT_CACHE_TIMEOUT)
+            return count
 
 class Vote(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Time-ordered (UUIDv7): inserts append to the primary key index instead of splitting random pages.
+    # The column type is unchanged; migration 0009 reissues older uuid4 ids for their created_at.
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    # No single-column FK indexes: the (user, feature) unique constraint and the
+    # (feature, user) index below lead with each column, one less index per insert
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='votes'
+        related_name='votes',
+        db_index=False
     )
     feature = models.ForeignKey(
         Feature,
         on_delete=models.CASCADE,
-        related_name='votes'
+        related_name='votes',
+        db_index=False
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        # Ensures a user can only vote once per feature
+        # Ensures a user can only vote once per feature (also the index behind per-user lookups)
         unique_together = ('user', 'feature')
         ordering = ['-created_at']
+        indexes = [
+            # Per-feature counts and (feature, user) has-voted checks. It covers created_at
+            # too (hot scores), so they are index-only scans; backends without covering
+            # indexes ignore include (models.W040 is silenced in settings)
+            models.Index(fields=['feature', 'user'], name='vote_feature_user_idx', include=['created_at']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} voted for {self.feature.title}"
 
+    @classmethod
+    def voted_feature_ids(cls, user, features):
+        """
+        Returns the set of ids, among the given features, that the user has voted for.
+        Answered from the user's cached voted set in one round trip when possible,
+        otherwise with a single feature_id IN (...) query regardless of the number of features.
+        """
+        feature_ids = [feature.id for feature in features]
+        if not feature_ids:
+            return set()
+
+        # Filters use user_id so a claims-only TokenUser works as well as a CustomUser
+        def load_voted_ids(limit):
+            return list(cls.objects.filter(user_id=user.pk).order_by().values_list('feature_id', flat=True)[:limit])
+
+        voted = guard(lambda: voted_sets.lookup(user.pk, feature_ids, load_voted_ids), lambda: None)
+        if voted is not None:
+            return voted
+        return set(
+            cls.objects.filter(user_id=user.pk, feature_id__in=feature_ids)
+            .values_list('feature_id', flat=True)
+        )
+
+    @classmethod
+    def bulk_apply(cls, upvotes, unvotes):
+        """
+        Adds and removes votes given as (user_id, feature_id) pairs with set-based SQL,
+        bypassing save/delete, then recomputes the touched features' counters in one pass.
+        Existing votes in upvotes are ignored, missing ones in unvotes are no-ops.
+        Returns a dict mapping touched feature id -> new vote count.
+        """
+        touched = {feature_id for _, feature_id in upvotes} | {feature_id for _, feature_id in unvotes}
+        if not touched:
+            return {}
+
+        unvotes_by_user = {}
+        for user_id, feature_id in unvotes:
+            unvotes_by_user.setdefault(user_id, []).append(feature_id)
+
+        with transaction.atomic():
+            # Which pairs already exist decides which rows actually change, for the event log
+            existing = set(
+                cls.objects.filter(
+                    user_id__in={user_id for user_id, _ in upvotes + unvotes},
+                    feature_id__in=touched
+                ).order_by().values_list('user_id', 'feature_id')
+            )
+            if upvotes:
+                cls.objects.bulk_create(
+                    [cls(user_id=user_id, feature_id=feature_id) for user_id, feature_id in upvotes],
+                    ignore_conflicts=True
+                )
+            if unvotes_by_user:
+                # One DELETE for every user's unvotes
+                removed = Q()
+                for user_id, feature_ids in unvotes_by_user.items():
+                    removed |= Q(user_id=user_id, feature_id__in=feature_ids)
+                cls.objects.filter(removed).delete()
+            VoteEvent.objects.bulk_create(
+                [VoteEvent(feature_id=feature_id, delta=1) for user_id, feature_id in upvotes if (user_id, feature_id) not in existing]
+                + [VoteEvent(feature_id=feature_id, delta=-1) for user_id, feature_id in unvotes if (user_id, feature_id) in existing]
+            )
+            Feature.recompute_vote_counts(touched)
+
+        def refresh():
+            voted_sets.invalidate({user_id for user_id, _ in upvotes} | set(unvotes_by_user))
+            hot.mark_stale(touched)
+            return Feature.refresh_cached_vote_counts(touched)
+
+        def journal():
+            counter_journal.record(
+                [(feature_id, user_id, 1) for user_id, feature_id in upvotes]
+                + [(feature_id, user_id, -1) for user_id, feature_id in unvotes]
+            )
+            return dict(Feature.objects.filter(pk__in=touched).values_list('pk', 'vote_count'))
+
+        return guard(refresh, journal)
+
+    @classmethod
+    def remove(cls, user, feature_id):
+        """
+        Removes the user's vote for a feature with a single filtered DELETE, and
+        decrements the counters only when a row was actually removed, so
+        concurrent double-taps can't decrement twice.
+        Returns True if a vote was removed.
+        """
+        with transaction.atomic():
+            deleted, _ = cls.objects.filter(user_id=user.pk, feature_id=feature_id).delete()
+            if not deleted:
+                return False
+            Feature.adjust_vote_count(feature_id, -1)
+            VoteEvent.objects.create(feature_id=feature_id, delta=-1)
+        # The feature's status isn't loaded on this path, so every status' cached responses are invalidated
+        cls._propagate(feature_id, user.pk, -1, statuses=None)
+        return True
+
     def save(self, *args, **kwargs):
         is_new = self._state.adding # Check if this is a new object being created
-        super().save(*args, **kwargs)
-        if is_new:
-            # Increment vote count in Redis only for new votes
-            cache_key = f'feature:{self.feature.id}:votes'
-            cache.incr(cache_key) # Atomically increment the count in Redis
+        if not is_new:
+            return super().save(*args, **kwargs)
+
+        # Insert the vote and bump the persisted counter atomically
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Feature.adjust_vote_count(self.feature_id, 1, voted_at=self.created_at)
+            VoteEvent.objects.create(feature_id=self.feature_id, delta=1)
+        # Only touch the cache and the leaderboard once the DB write succeeded.
+        # The new count is kept on the instance so callers can report it without another lookup.
+        self.feature_vote_count = self._propagate(self.feature_id, self.user_id, 1, self._response_statuses())
 
     def delete(self, *args, **kwargs):
-        # Decrement vote count in Redis when a vote is deleted
-        cache_key = f'feature:{self.feature.id}:votes'
-        # Check if the key exists before attempting to decrement, to prevent errors
-        # if the cache was cleared but the DB entry still exists.
-        if cache.get(cache_key) is not None:
-            cache.decr(cache_key)
-        super().delete(*args, **kwargs)
\ No newline at end of file
+        # Delete the vote and decrement the persisted counter atomically.
+        # Bulk QuerySet.delete() bypasses this; see the reconcile_vote_counts command.
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            Feature.adjust_vote_count(self.feature_id, -1)
+            VoteEvent.objects.create(feature_id=self.feature_id, delta=-1)
+        self.feature_vote_count = self._propagate(self.feature_id, self.user_id, -1, self._response_statuses())
+        return result
+
+    def _response_statuses(self):
+        """
+        The voted feature's status, whose cached responses a vote invalidates, or
+        None (every status) when the feature isn't loaded (avoids a query just for it).
+        """
+        if self._meta.get_field('feature').is_cached(self):
+            return [self.feature.status]
+        return None
+
+    @classmethod
+    def _propagate(cls, feature_id, user_id, delta, statuses):
+        """
+        Mirrors a committed vote change in Redis: cached counter, live counts,
+        leaderboard, the user's voted set, hot score queue and the cached
+        responses of statuses. While Redis is unavailable the change is journaled
+        instead (see counter_journal) and the count is read from the database.
+        Returns the feature's new vote count.
+        """
+        def apply():
+            count = Feature.adjust_cached_vote_count(feature_id, delta)
+            live_updates.publish({feature_id: count}) # Sent with the window's other counts
+            # The other updates don't depend on each other's results: one round trip
+            with pipelined() as pipe:
+                leaderboard.record_vote(feature_id, delta, pipe)
+                if delta > 0:
+                    voted_sets.add(user_id, feature_id, pipe)
+                else:
+                    voted_sets.remove(user_id, feature_id, pipe)
+                    hot.mark_stale([feature_id], pipe) # The removed vote's time isn't known without another query
+                response_cache.bump(statuses, pipe)
+            return count
+
+        def journal():
+            counter_journal.record([(feature_id, user_id, delta)])
+            return Feature.objects.filter(pk=feature_id).values_list('vote_count', flat=True).first()
+
+        return guard(apply, journal)
+
+class VoteEvent(models.Model):
+    """
+    Append-only log of vote changes (+1 for an upvote, -1 for an unvote), written in
+    the same transaction as the change. The rollup_votes job folds it into the
+    hourly/daily rollups and prunes it once processed.
+    """
+    id = models.BigAutoField(primary_key=True) # Monotonic, used as the rollup watermark
+    feature = models.ForeignKey(Feature, on_delete=models.CASCADE, related_name='+')
+    delta = models.SmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+class VoteRollup(models.Model):
+    """
+    Votes and unvotes of a feature within one time bucket.
+    """
+    feature = models.ForeignKey(Feature, on_delete=models.CASCADE, related_name='+')
+    bucket_start = models.DateTimeField()
+    votes = models.PositiveIntegerField(default=0)
+    unvotes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+        # Also the index behind the trend query (feature, bucket_start range)
+        unique_together = ('feature', 'bucket_start')
+        ordering = ['bucket_start']
+
+class HourlyVoteRollup(VoteRollup):
+    class Meta(VoteRollup.Meta):
+        pass
+
+class DailyVoteRollup(VoteRollup):
+    class Meta(VoteRollup.Meta):
+        pass
+
+class RollupWatermark(models.Model):
+    """
+    Id of the last VoteEvent folded into the rollups.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    last_event_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+class CounterJournalEntry(models.Model):
+    """
+    A committed vote change (delta +1/-1) or feature edit (delta 0, no user)
+    whose Redis side was skipped because Redis was unavailable.
+    counter_journal.replay resyncs it and deletes the entry.
+    """
+    id = models.BigAutoField(primary_key=True)
+    feature = models.ForeignKey(Feature, on_delete=models.CASCADE, related_name='+')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, related_name='+')
+    delta = models.SmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,26 @@
+# features/pagination.py
+from rest_framework.pagination import CursorPagination
+
+class FeatureCursorPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination for feature listings, ordered by (created_at, id).
+    Avoids the COUNT(*) and OFFSET scan of page-number pagination, and the id
+    tie-breaker keeps the order stable for features created at the same instant.
+    Backed by the composite (created_at, id) index on Feature.
+    """
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = None # Uses PAGE_SIZE from REST_FRAMEWORK settings
+
+    # Query parameter (and value) clients send to opt into cursor pagination
+    mode_query_param = 'pagination'
+    mode_query_value = 'cursor'
+
+    @classmethod
+    def is_requested(cls, request):
+        """
+        Clients opt in with ?pagination=cursor; following a 'next'/'previous'
+        link (which carries ?cursor=) keeps them in cursor mode.
+        """
+        params = request.GET # DRF's query_params, also available on plain Django requests (async views)
+        return params.get(cls.mode_query_param) == cls.mode_query_value or cls.cursor_query_param in params
@@ -0,0 +1,107 @@
+# features/partitioning.py
+"""
+Optional PostgreSQL declarative partitioning of the votes table, by hash of
+feature_id (applied with the partition_votes command).
+
+Votes are partitioned by feature rather than by time: a unique constraint
+on a partitioned table has to include the partition key, so (user, feature)
+uniqueness couldn't be enforced across time partitions, while it holds as
+is with feature_id as the key. Per-feature reads (counts, has-voted checks,
+hot scores) touch one partition; per-user reads (voted sets) probe every
+partition's (user, feature) index, which stays cheap with a moderate number
+of partitions. The database primary key becomes (id, feature_id); Django
+keeps treating id as the primary key, and it stays unique (UUIDv7 ids).
+
+The conversion copies the table under a lock that lets reads through but
+makes writes wait, so run it in a maintenance window on large tables.
+"""
+from django.db import connection
+
+from .models import Vote
+
+DEFAULT_PARTITIONS = 16
+
+def is_supported():
+    return connection.vendor == 'postgresql'
+
+def is_partitioned():
+    if not is_supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [Vote._meta.db_table])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+def _constraint_names():
+    """
+    The current names of the votes table's primary key, (user, feature) unique
+    constraint and foreign keys (keyed by column), as Django generated them.
+    """
+    name = Vote._meta.db_table
+    names = {
+        'pkey': f'{name}_pkey', 'unique': f'{name}_user_id_feature_id_uniq',
+        'user_id': f'{name}_user_id_fk', 'feature_id': f'{name}_feature_id_fk',
+    }
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, name)
+    for constraint, info in constraints.items():
+        if info['primary_key']:
+            names['pkey'] = constraint
+        elif info['unique'] and info['columns'] == ['user_id', 'feature_id']:
+            names['unique'] = constraint
+        elif info['foreign_key'] and info['columns'][0] in names:
+            names[info['columns'][0]] = constraint
+    return names
+
+def statements(partitions=DEFAULT_PARTITIONS):
+    """
+    The SQL converting the votes table into partitions hash partitions, to run
+    in one transaction. The constraints and indexes Django created for Vote
+    are recreated under their names, so later migrations still find them.
+    """
+    qn = connection.ops.quote_name
+    name = Vote._meta.db_table
+    table, new_table = qn(name), qn(f'{name}_partitioned')
+    user_table = qn(Vote._meta.get_field('user').related_model._meta.db_table)
+    feature_table = qn(Vote._meta.get_field('feature').related_model._meta.db_table)
+    (index,) = Vote._meta.indexes
+    names = _constraint_names()
+
+    sql = [
+        f'LOCK TABLE {table} IN EXCLUSIVE MODE',
+        f'CREATE TABLE {new_table} (LIKE {table} INCLUDING DEFAULTS) PARTITION BY HASH (feature_id)',
+    ]
+    sql += [
+        f'CREATE TABLE {qn(f"{name}_p{remainder}")} PARTITION OF {new_table} '
+        f'FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})'
+        for remainder in range(partitions)
+    ]
+    sql += [
+        f'INSERT INTO {new_table} SELECT * FROM {table}',
+        f'DROP TABLE {table}', # Frees the constraint and index names
+        f'ALTER TABLE {new_table} RENAME TO {table}',
+        f'ALTER TABLE {table} ADD CONSTRAINT {qn(names["pkey"])} PRIMARY KEY (id, feature_id)',
+        f'ALTER TABLE {table} ADD CONSTRAINT {qn(names["unique"])} UNIQUE (user_id, feature_id)',
+        f'CREATE INDEX {qn(index.name)} ON {table} (feature_id, user_id) INCLUDE (created_at)',
+        # As Django creates them: deferred checks, the cascades are done by the ORM
+        f'ALTER TABLE {table} ADD CONSTRAINT {qn(names["user_id"])} FOREIGN KEY (user_id) '
+        f'REFERENCES {user_table} (id) DEFERRABLE INITIALLY DEFERRED',
+        f'ALTER TABLE {table} ADD CONSTRAINT {qn(names["feature_id"])} FOREIGN KEY (feature_id) '
+        f'REFERENCES {feature_table} (id) DEFERRABLE INITIALLY DEFERRED',
+        f'ANALYZE {table}',
+    ]
+    return sql
+
+def index_size():
+    """
+    Total size in bytes of the votes table's indexes (all partitions), on PostgreSQL.
+    """
+    if not is_supported():
+        return None
+    if is_partitioned():
+        sql = 'SELECT COALESCE(SUM(pg_indexes_size(relid)), 0) FROM pg_partition_tree(%s)'
+    else:
+        sql = 'SELECT pg_indexes_size(%s)'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [Vote._meta.db_table])
+        return int(cursor.fetchone()[0])
@@ -0,0 +1,157 @@
+# features/redis_client.py
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django_redis.exceptions import ConnectionInterrupted
+from redis.exceptions import RedisError
+
+from .instrumentation import wrap_redis
+
+# Errors meaning Redis is unreachable or too slow (see the socket timeouts in settings.CACHES)
+REDIS_ERRORS = (RedisError, ConnectionInterrupted)
+FAILURE_THRESHOLD = 3 # Consecutive failures that open the circuit
+RESET_SECONDS = 5 # Seconds the circuit stays open before a probe call is let through
+
+def get_connection():
+    """
+    Returns the raw Redis client behind the default cache, or None when the
+    configured cache backend is not django-redis (e.g. locmem in development).
+    """
+    if not hasattr(cache, 'client'):
+        return None
+    from django_redis import get_redis_connection
+    # Counts the commands of requests measured by RequestMetricsMiddleware
+    return wrap_redis(get_redis_connection('default'))
+
+@contextmanager
+def pipelined():
+    """
+    Yields a non-transactional pipeline on the default Redis client (None without
+    Redis) and sends the commands queued in the block in one round trip.
+    """
+    conn = get_connection()
+    pipe = conn.pipeline(transaction=False) if conn is not None else None
+    yield pipe
+    if pipe is not None:
+        pipe.execute()
+
+def run_script(script, keys, args, pipe=None):
+    """
+    Runs a Lua script on the default Redis client (EVALSHA, loaded on first use),
+    or queues it on pipe. Queued scripts are sent with EVAL: a pipeline holding
+    registered scripts checks they are loaded first, one more round trip.
+    """
+    if pipe is not None:
+        pipe.eval(script, len(keys), *keys, *args)
+        return None
+    conn = get_connection()
+    if conn is None:
+        return None
+    return conn.register_script(script)(keys=keys, args=args)
+
+class CircuitBreaker:
+    """
+    Process-wide circuit breaker for Redis calls. After FAILURE_THRESHOLD
+    consecutive failures it opens: calls go straight to their fallback for
+    RESET_SECONDS instead of each waiting for a socket timeout. Then one call
+    probes Redis; success closes the circuit and runs the recovery hooks
+    (e.g. replaying the counter journal), failure opens it again.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._recovery_hooks = []
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < RESET_SECONDS:
+                return False
+            self._probing = True # Half-open: only this call goes through
+            return True
+
+    def record_success(self):
+        """
+        Closes the circuit. Returns True if it was open, i.e. Redis just recovered.
+        """
+        with self._lock:
+            recovered = self._opened_at is not None
+            self._failures, self._opened_at, self._probing = 0, None, False
+        return recovered
+
+    def run_recovery_hooks(self):
+        for hook in list(self._recovery_hooks):
+            hook()
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= FAILURE_THRESHOLD:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release_probe(self):
+        """
+        Ends a probe that failed for a reason other than Redis (e.g. a bug in the
+        call or a database error), leaving the circuit as it was: the next call
+        after the reset timeout probes again.
+        """
+        with self._lock:
+            self._probing = False
+
+    def add_recovery_hook(self, hook):
+        if hook not in self._recovery_hooks:
+            self._recovery_hooks.append(hook)
+
+    def reset(self):
+        with self._lock:
+            self._failures, self._opened_at, self._probing = 0, None, False
+
+breaker = CircuitBreaker()
+
+def guard(call, fallback):
+    """
+    Returns call(), or fallback() when Redis is unavailable: the circuit is
+    open, or call raised a Redis error (which counts toward opening it).
+    """
+    if not breaker.allow():
+        return fallback()
+    try:
+        result = call()
+    except REDIS_ERRORS:
+        breaker.record_failure()
+        return fallback()
+    except BaseException:
+        breaker.release_probe()
+        raise
+    if breaker.record_success():
+        breaker.run_recovery_hooks()
+    return result
+
+async def aguard(call, fallback):
+    """
+    guard for a coroutine function call; fallback is a regular function.
+    """
+    if not breaker.allow():
+        return fallback()
+    try:
+        result = await call()
+    except REDIS_ERRORS:
+        breaker.record_failure()
+        return fallback()
+    except BaseException: # Includes the request being cancelled mid-probe
+        breaker.release_probe()
+        raise
+    if breaker.record_success():
+        await sync_to_async(breaker.run_recovery_hooks)() # Hooks use the sync ORM
+    return result
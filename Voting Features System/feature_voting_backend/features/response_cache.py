@@ -0,0 +1,98 @@
+# features/response_cache.py
+"""
+Response cache for anonymous feature list/retrieve requests.
+
+Entries are keyed by host, path, query parameters and the generation
+token of every status the response can contain. Writes (create, update,
+delete, votes) replace the generation token of the affected statuses, so
+stale entries are never read again and simply expire. Only anonymous
+requests are cached, so per-user fields such as has_voted can't leak.
+"""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+HITS_KEY = 'features:response:hits'
+MISSES_KEY = 'features:response:misses'
+
+def get_timeout():
+    return getattr(settings, 'FEATURE_RESPONSE_CACHE_TIMEOUT', 60)
+
+def is_enabled():
+    return bool(get_timeout())
+
+def _all_statuses():
+    from .models import Feature # Local import, models import this module
+    return [status for status, _ in Feature.STATUS_CHOICES]
+
+def _generation_key(status):
+    return f'features:generation:{status}'
+
+def bump(statuses=None, pipe=None):
+    """
+    Invalidates cached responses for the given statuses (all of them by default)
+    in one round trip, by giving each a new generation token. With pipe (a
+    pipeline on the cache's Redis client) the writes are queued on it instead.
+    """
+    statuses = _all_statuses() if statuses is None else statuses
+    tokens = {_generation_key(status): uuid.uuid4().hex for status in statuses}
+    if pipe is None:
+        cache.set_many(tokens, timeout=None)
+        return
+    for key, token in tokens.items():
+        # Encoded like cache.set does, so cache.get_many reads them back
+        pipe.set(cache.make_key(key), cache.client.encode(token))
+
+def _generations(statuses):
+    keys = [_generation_key(status) for status in statuses]
+    generations = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in generations}
+    if missing:
+        # A random first token (instead of e.g. 0) keeps entries from before a cache flush unreachable
+        cache.set_many(missing, timeout=None)
+        generations.update(missing)
+    return [generations[key] for key in keys]
+
+def build_key(request, statuses=None):
+    statuses = _all_statuses() if statuses is None else statuses
+    params = sorted((key, tuple(values)) for key, values in request.query_params.lists())
+    raw = json.dumps([request.get_host(), request.path, params, _generations(statuses)])
+    return f'features:response:{hashlib.md5(raw.encode()).hexdigest()}'
+
+def get(key):
+    """
+    Returns the cached {'data', 'etag'} entry, or None. Records the hit or miss.
+    """
+    entry = cache.get(key)
+    _record(HITS_KEY if entry is not None else MISSES_KEY)
+    return entry
+
+def make_entry(data):
+    """
+    Builds the {'data', 'etag'} entry of response data.
+    """
+    body = json.dumps(data, sort_keys=True, default=str)
+    return {'data': data, 'etag': f'"{hashlib.md5(body.encode()).hexdigest()}"'}
+
+def store(key, data):
+    """
+    Caches response data with its ETag and returns the entry.
+    """
+    entry = make_entry(data)
+    cache.set(key, entry, timeout=get_timeout())
+    return entry
+
+def _record(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+def stats():
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = counters.get(HITS_KEY, 0), counters.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else 0.0}
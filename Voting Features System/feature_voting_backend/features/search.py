@@ -0,0 +1,274 @@
+# features/search.py
+"""
+Full-text search over feature titles and descriptions (?q= on the feature list).
+
+On PostgreSQL, Feature.search_vector stores a weighted tsvector (title 'A',
+description 'B') that is refreshed on every save and covered by a GIN index,
+so a search is an index lookup instead of a sequential ILIKE scan.
+Other backends (the SQLite test setup) fall back to an in-process inverted
+index, rebuilt from the DB whenever another process changed a feature. The
+fallback ranks in Python and returns the best MAX_FALLBACK_RESULTS matches.
+
+Either way results are ranked by text relevance, boosted by the feature's
+vote count: rank * (1 + VOTE_BOOST * ln(1 + vote_count)).
+"""
+import heapq
+import math
+import re
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import ExpressionWrapper, F, FloatField, Max, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Ln
+
+from .redis_client import breaker, guard
+
+USE_POSTGRES_SEARCH = settings.DATABASES['default']['ENGINE'].endswith(('postgresql', 'postgis'))
+
+if USE_POSTGRES_SEARCH:
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+SEARCH_CONFIG = 'english' # Text search configuration (stemming and stop words)
+VOTE_BOOST = 0.1 # Weight of ln(1 + vote_count) in the final rank
+REBUILD_CHUNK_SIZE = 2000
+# Fallback only: ranked matches returned (ordering by position costs O(results) per row),
+# and ids per vote count lookup
+MAX_FALLBACK_RESULTS = 200
+LOOKUP_CHUNK_SIZE = 500
+
+# Fallback index: field weights mirror the tsvector weights
+TITLE_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+GENERATION_KEY = 'search:index:generation'
+TOKEN_RE = re.compile(r'\w+')
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'with',
+})
+
+def document_vector():
+    """
+    Expression computing a feature's stored search vector (PostgreSQL only).
+    """
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) > 1 and token not in STOP_WORDS]
+
+class InvertedIndex:
+    """
+    Maps each token to the features containing it, with a per-feature weight
+    (TITLE_WEIGHT per occurrence in the title, DESCRIPTION_WEIGHT in the description).
+    """
+    def __init__(self):
+        self.postings = defaultdict(dict) # token -> {feature_id: weight}
+        self.documents = {} # feature_id -> tokens, so a feature can be removed
+
+    def add(self, feature_id, title, description):
+        self.remove(feature_id)
+        weights = defaultdict(int)
+        for token in tokenize(title):
+            weights[token] += TITLE_WEIGHT
+        for token in tokenize(description):
+            weights[token] += DESCRIPTION_WEIGHT
+        for token, weight in weights.items():
+            self.postings[token][feature_id] = weight
+        self.documents[feature_id] = tuple(weights)
+
+    def remove(self, feature_id):
+        for token in self.documents.pop(feature_id, ()):
+            postings = self.postings[token]
+            postings.pop(feature_id, None)
+            if not postings:
+                del self.postings[token]
+
+    def search(self, terms):
+        """
+        Returns {feature_id: score} for the features containing every term.
+        """
+        if not terms:
+            return {}
+        postings = sorted((self.postings.get(term, {}) for term in set(terms)), key=len)
+        # Intersect starting from the rarest term
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches &= posting.keys()
+            if not matches:
+                return {}
+        return {feature_id: sum(posting[feature_id] for posting in postings) for feature_id in matches}
+
+_index = None
+_index_generation = None
+_lock = threading.Lock()
+
+def _build_index():
+    from .models import Feature # Local import, models import this module
+
+    index = InvertedIndex()
+    rows = Feature.objects.order_by().values_list('pk', 'title', 'description')
+    for feature_id, title, description in rows.iterator(chunk_size=REBUILD_CHUNK_SIZE):
+        index.add(feature_id, title, description)
+    return index
+
+def _current_index():
+    """
+    Returns the process-local index, rebuilding it when the shared generation
+    shows another process (or a bulk write) changed features since it was built.
+    While Redis is unavailable the generation can't be checked, so the local
+    index is used as is.
+    """
+    global _index, _index_generation
+
+    def shared_generation():
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            cache.set(GENERATION_KEY, generation, timeout=None)
+        return generation
+
+    with _lock:
+        generation = guard(shared_generation, lambda: None)
+        if _index is None or (generation is not None and _index_generation != generation):
+            _index = _build_index()
+            _index_generation = generation
+        return _index
+
+def _update_index(apply):
+    """
+    Applies an incremental change to the local index when it is current, and
+    bumps the shared generation so other processes rebuild theirs. While Redis
+    is unavailable the change is applied locally; other processes catch up
+    once it is back (see _invalidate_index).
+    """
+    global _index_generation
+
+    def bump():
+        current = _index is not None and cache.get(GENERATION_KEY) == _index_generation
+        generation = uuid.uuid4().hex
+        cache.set(GENERATION_KEY, generation, timeout=None)
+        return current, generation
+
+    with _lock:
+        current, generation = guard(bump, lambda: (_index is not None, None))
+        if current:
+            apply(_index)
+            _index_generation = generation
+
+def _invalidate_index():
+    """
+    Forces every process, this one included, to rebuild its index on the next search.
+    """
+    global _index
+    with _lock:
+        _index = None
+        cache.set(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+
+def index_feature(feature, update_fields=None):
+    """
+    Refreshes a saved feature's entry in the search index.
+    """
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+    if USE_POSTGRES_SEARCH:
+        type(feature).objects.filter(pk=feature.pk).update(search_vector=document_vector())
+    else:
+        _update_index(lambda index: index.add(feature.pk, feature.title, feature.description))
+
+def unindex_feature(feature_id):
+    """
+    Drops a deleted feature from the fallback index (the stored vector goes with the row).
+    """
+    if not USE_POSTGRES_SEARCH:
+        _update_index(lambda index: index.remove(feature_id))
+
+def rebuild(chunk_size=REBUILD_CHUNK_SIZE):
+    """
+    Recomputes every stored search vector, e.g. after the column is added or
+    after bulk writes that bypassed Feature.save. Returns the number of features.
+    """
+    from .models import Feature # Local import, models import this module
+
+    if not USE_POSTGRES_SEARCH:
+        _invalidate_index()
+        return Feature.objects.count()
+
+    updated = 0
+    last_pk = None
+    while True:
+        chunk = Feature.objects.order_by('pk')
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        chunk_pks = list(chunk.values_list('pk', flat=True)[:chunk_size])
+        if not chunk_pks:
+            return updated
+        last_pk = chunk_pks[-1]
+        updated += Feature.objects.filter(pk__in=chunk_pks).update(search_vector=document_vector())
+
+def search(queryset, query):
+    """
+    Filters a Feature queryset down to the features matching query, ordered by
+    vote-boosted relevance (newest first among equal ranks).
+    """
+    if USE_POSTGRES_SEARCH:
+        search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+        rank = ExpressionWrapper(
+            SearchRank(F('search_vector'), search_query) * (Value(1.0) + VOTE_BOOST * Ln(F('vote_count') + 1)),
+            output_field=FloatField()
+        )
+        return (
+            queryset.filter(search_vector=search_query)
+            .annotate(search_rank=rank)
+            .order_by('-search_rank', '-created_at', '-id')
+        )
+
+    scores = _current_index().search(tokenize(query))
+    if not scores:
+        return queryset.none()
+    # A vote count can raise a text score by at most the boost of the highest count, so candidates
+    # are ranked best text score first and the rest are skipped once they can't make the results
+    top_count = queryset.order_by().aggregate(top=Max('vote_count'))['top'] or 0
+    max_boost = 1 + VOTE_BOOST * math.log1p(top_count)
+    candidates = sorted(scores, key=scores.get, reverse=True)
+    ranks = {}
+    for start in range(0, len(candidates), LOOKUP_CHUNK_SIZE):
+        chunk = candidates[start:start + LOOKUP_CHUNK_SIZE]
+        if len(ranks) >= MAX_FALLBACK_RESULTS and scores[chunk[0]] * max_boost < threshold[0]:
+            break
+        # Features deleted by another process may still be in the index; the filter drops them
+        rows = queryset.filter(pk__in=chunk).order_by().values_list('pk', 'vote_count', 'created_at')
+        # Newest first among equal ranks, the id breaks ties
+        ranks.update(
+            (feature_id, (scores[feature_id] * (1 + VOTE_BOOST * math.log1p(vote_count)), created_at, feature_id))
+            for feature_id, vote_count, created_at in rows
+        )
+        if len(ranks) >= MAX_FALLBACK_RESULTS:
+            threshold = heapq.nlargest(MAX_FALLBACK_RESULTS, ranks.values())[-1]
+    ranked = heapq.nlargest(MAX_FALLBACK_RESULTS, ranks, key=ranks.get)
+    if not ranked:
+        return queryset.none()
+    # One simple CASE over the primary key column: compiled as is, where a When per id is resolved one by one
+    connection = connections[queryset.db]
+    pk = queryset.model._meta.pk
+    column = f'{connection.ops.quote_name(queryset.model._meta.db_table)}.{connection.ops.quote_name(pk.column)}'
+    position = RawSQL(
+        f"CASE {column} {' '.join(['WHEN %s THEN %s'] * len(ranked))} END",
+        [value for i, feature_id in enumerate(ranked) for value in (pk.get_db_prep_value(feature_id, connection), i)]
+    )
+    return queryset.filter(pk__in=ranked).order_by(position.asc(), '-created_at', '-id')
+
+def _invalidate_after_outage():
+    """
+    Circuit breaker recovery hook: index changes made while Redis was down
+    didn't reach the other processes' indexes.
+    """
+    guard(_invalidate_index, lambda: None)
+
+breaker.add_recovery_hook(_invalidate_after_outage)
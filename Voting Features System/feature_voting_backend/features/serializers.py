@@ -1,11 +1,14 @@
 # features/serializers.py
 from rest_framework import serializers
 from .models import Feature, Vote
+from .instrumentation import SerializerTimingMixin
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 User = get_user_model() # Get the currently active user model
 
+BULK_VOTE_MAX_ITEMS = 5000 # Upper bound on items per bulk vote request
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Custom serializer to include username and email in JWT payload.
@@ -15,9 +18,10 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token = super().get_token(user)
         token['username'] = user.username
         token['email'] = user.email
+        token['is_staff'] = user.is_staff # Read by TokenUser on stateless requests
         return token
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SerializerTimingMixin, serializers.ModelSerializer):
     """
     Serializer for basic user information.
     """
@@ -56,7 +60,24 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         )
         return user
 
-class FeatureSerializer(serializers.ModelSerializer):
+class FeatureListSerializer(SerializerTimingMixin, serializers.ListSerializer):
+    """
+    List serializer for features that resolves vote counts and the current
+    user's votes for the whole page in bulk, instead of once per feature.
+    The results are shared with the child serializer through the context.
+    """
+    def to_representation(self, data):
+        features = list(data.all() if hasattr(data, 'all') else data)
+        # Callers that resolved them already (the async views) pass them in the context
+        if 'vote_counts' not in self._context:
+            self._context['vote_counts'] = Feature.get_vote_counts(features)
+
+        request = self.context.get('request')
+        if request and request.user.is_authenticated and 'voted_feature_ids' not in self._context:
+            self._context['voted_feature_ids'] = Vote.voted_feature_ids(request.user, features)
+        return super().to_representation(features)
+
+class FeatureSerializer(SerializerTimingMixin, serializers.ModelSerializer):
     """
     Serializer for Feature objects, including vote count and user's vote status.
     """
@@ -68,11 +89,16 @@ class FeatureSerializer(serializers.ModelSerializer):
         model = Feature
         fields = ['id', 'title', 'description', 'status', 'created_by', 'created_at', 'updated_at', 'vote_count', 'has_voted']
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at', 'vote_count', 'has_voted']
+        list_serializer_class = FeatureListSerializer
 
     def get_vote_count(self, obj):
         """
         Returns the cached vote count for the feature.
+        Uses the bulk-resolved counts when serializing a list.
         """
+        vote_counts = self.context.get('vote_counts')
+        if vote_counts is not None and obj.id in vote_counts:
+            return vote_counts[obj.id]
         return obj.get_vote_count()
 
     def get_has_voted(self, obj):
@@ -82,11 +108,15 @@ class FeatureSerializer(serializers.ModelSerializer):
         """
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            # Check if a Vote object exists for the current user and feature
-            return Vote.objects.filter(feature=obj, user=request.user).exists()
+            voted_feature_ids = self.context.get('voted_feature_ids')
+            if voted_feature_ids is not None:
+                # Resolved in bulk by FeatureListSerializer
+                return obj.id in voted_feature_ids
+            # Check the user's cached voted set, or the DB if it can't answer
+            return obj.id in Vote.voted_feature_ids(request.user, [obj])
         return False
 
-class VoteSerializer(serializers.ModelSerializer):
+class VoteSerializer(SerializerTimingMixin, serializers.ModelSerializer):
     """
     Serializer for Vote objects. Read-only as votes are handled via custom actions.
     """
@@ -96,4 +126,38 @@ class VoteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Vote
         fields = ['id', 'user', 'feature', 'created_at']
-        read_only_fields = ['id', 'user', 'feature', 'created_at']
\ No newline at end of file
+        read_only_fields = ['id', 'user', 'feature', 'created_at']
+
+class VoteResultSerializer(SerializerTimingMixin, serializers.ModelSerializer):
+    """
+    Compact serializer for upvote responses: vote id, feature id, the new vote count
+    (as returned by the counter update of the write itself) and has_voted.
+    Avoids the nested user/feature serialization and its extra queries.
+    """
+    feature = serializers.UUIDField(source='feature_id', read_only=True)
+    vote_count = serializers.IntegerField(source='feature_vote_count', read_only=True)
+    has_voted = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Vote
+        fields = ['id', 'feature', 'vote_count', 'has_voted']
+        read_only_fields = fields
+
+    def get_has_voted(self, obj):
+        """
+        A serialized vote is always the caller's own, persisted vote.
+        """
+        return True
+
+class BulkVoteSerializer(serializers.Serializer):
+    """
+    Input for the bulk vote action: a list of {'feature': <id>, 'action': 'upvote'|'unvote'}
+    items, applied for the authenticated user or, for admins, the user given in 'user'.
+    Items are validated one by one when applied, so a bad item doesn't reject the batch.
+    """
+    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
+    votes = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=BULK_VOTE_MAX_ITEMS
+    )
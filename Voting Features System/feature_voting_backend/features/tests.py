@@ -1,11 +1,39 @@
 # features/tests.py
-from django.test import TestCase
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.test import TestCase, TransactionTestCase, AsyncClient, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.core.cache import cache
-from .models import Feature, Vote
+from django.db import connection, connections, transaction, DatabaseError, IntegrityError
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from .models import Feature, Vote, VoteEvent, HourlyVoteRollup, DailyVoteRollup, CounterJournalEntry
+from . import benchmark, counter_journal, db_router, duplicates, export, hot, leaderboard, live_updates, metrics, partitioning, redis_client, rollups, search, throttling, vote_queue, voted_sets
+from .bulk_votes import apply_bulk_votes
+from .ids import uuid7
+from users import authentication
+from .redis_client import get_connection
+from unittest import mock, skipIf, skipUnless
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.tokens import AccessToken
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from io import StringIO
+from datetime import timedelta
+import asyncio
+import csv
+import importlib
+import io
 import json
+import math
+import os
+import redis
+import tempfile
+import tracemalloc
+import uuid
 
 User = get_user_model()
 
@@ -33,6 +61,10 @@ class FeatureModelTest(TestCase):
     def test_feature_str_representation(self):
         self.assertEqual(str(self.feature), 'Test Feature')
 
+    def test_migrations_match_the_models(self):
+        # Fails with the pending changes listed when a model change has no migration
+        call_command('makemigrations', 'users', 'features', check=True, dry_run=True, stdout=StringIO())
+
     def test_feature_get_vote_count_no_votes(self):
         self.assertEqual(self.feature.get_vote_count(), 0)
         # Verify cache was populated
@@ -305,4 +337,2295 @@ class FeatureAPITest(TestCase):
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.user2_access_token}')
         self.client.post(self.unvote_url(self.feature1.id))
         self.assertEqual(self.feature1.get_vote_count(), 0)
-        self.assertEqual(cache.get(f'feature:{self.feature1.id}:votes'), 0)
\ No newline at end of file
+        self.assertEqual(cache.get(f'feature:{self.feature1.id}:votes'), 0)
+
+class FeatureListQueryCountTest(TestCase):
+    """
+    Testes de regressão para o número de queries da listagem de features.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='counter', email='counter@example.com', password='password')
+        login_response = self.client.post('/api/token/', {'username': 'counter', 'password': 'password'}, format='json')
+        self.access_token = login_response.data['access']
+        self.feature_list_url = '/api/features/'
+        cache.clear()
+
+    def _create_features(self, total):
+        start = Feature.objects.count()
+        creators = [
+            User.objects.create_user(username=f'creator{i}', email=f'creator{i}@example.com', password='password')
+            for i in range(start, start + total)
+        ]
+        features = Feature.objects.bulk_create([
+            Feature(title=f'Feature {i}', description='Desc.', created_by=creator)
+            for i, creator in enumerate(creators)
+        ])
+        # Vote on every other feature so each page has counts and has_voted to resolve
+        for feature in features[::2]:
+            Vote.objects.create(user=self.user, feature=feature)
+        return features
+
+    def _count_list_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.feature_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries), response
+
+    def test_list_query_count_is_independent_of_page_size(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        self._create_features(2)
+        small_page_queries, response = self._count_list_queries()
+        self.assertEqual(len(response.data['results']), 2)
+
+        self._create_features(8)
+        full_page_queries, response = self._count_list_queries()
+        self.assertEqual(len(response.data['results']), 10)
+
+        self.assertEqual(small_page_queries, full_page_queries)
+
+    def test_list_resolves_counts_and_has_voted_in_bulk(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        features = self._create_features(4)
+        _, response = self._count_list_queries()
+
+        voted_ids = {str(feature.id) for feature in features[::2]}
+        for item in response.data['results']:
+            self.assertEqual(item['has_voted'], item['id'] in voted_ids)
+            self.assertEqual(item['vote_count'], 1 if item['id'] in voted_ids else 0)
+
+    def test_list_reuses_cached_counts(self):
+        features = self._create_features(3)
+        cache.set(f'feature:{features[0].id}:votes', 42)
+        response = self.client.get(self.feature_list_url)
+        counts = {item['id']: item['vote_count'] for item in response.data['results']}
+        self.assertEqual(counts[str(features[0].id)], 42)
+        self.assertEqual(counts[str(features[1].id)], 0)
+        self.assertEqual(cache.get(f'feature:{features[1].id}:votes'), 0)
+
+
+class VoteCountColumnTest(TestCase):
+    """
+    Testes unitários para a coluna desnormalizada Feature.vote_count.
+    """
+    def setUp(self):
+        self.user1 = User.objects.create_user(username='user1', email='u1@example.com', password='password')
+        self.user2 = User.objects.create_user(username='user2', email='u2@example.com', password='password')
+        self.feature = Feature.objects.create(title='Counted Feature', description='Desc.', created_by=self.user1)
+        cache.clear()
+
+    def test_vote_create_and_delete_update_column(self):
+        vote = Vote.objects.create(user=self.user1, feature=self.feature)
+        Vote.objects.create(user=self.user2, feature=self.feature)
+        self.feature.refresh_from_db()
+        self.assertEqual(self.feature.vote_count, 2)
+
+        vote.delete()
+        self.feature.refresh_from_db()
+        self.assertEqual(self.feature.vote_count, 1)
+
+    def test_failed_duplicate_vote_does_not_change_column(self):
+        Vote.objects.create(user=self.user1, feature=self.feature)
+        with self.assertRaises(IntegrityError):
+            Vote.objects.create(user=self.user1, feature=self.feature)
+        self.feature.refresh_from_db()
+        self.assertEqual(self.feature.vote_count, 1)
+
+    def test_expired_cache_key_is_reseeded_from_column(self):
+        Vote.objects.create(user=self.user1, feature=self.feature)
+        cache.delete(f'feature:{self.feature.id}:votes') # Simulate expiry
+        Vote.objects.create(user=self.user2, feature=self.feature)
+        self.assertEqual(cache.get(f'feature:{self.feature.id}:votes'), 2)
+
+    def test_get_vote_count_cache_miss_reads_column(self):
+        Vote.objects.create(user=self.user1, feature=self.feature)
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.feature.get_vote_count(), 1)
+
+    def test_reconcile_command_fixes_drift(self):
+        Vote.objects.create(user=self.user1, feature=self.feature)
+        Feature.objects.filter(pk=self.feature.pk).update(vote_count=7) # Introduce drift
+        other = Feature.objects.create(title='Other', description='Desc.', created_by=self.user2)
+
+        out = StringIO()
+        call_command('reconcile_vote_counts', chunk_size=1, stdout=out)
+        self.feature.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.feature.vote_count, 1)
+        self.assertEqual(other.vote_count, 0)
+        self.assertEqual(cache.get(f'feature:{self.feature.id}:votes'), 1)
+        self.assertIn('Checked 2 features. Fixed 1', out.getvalue())
+
+    def test_saving_a_stale_instance_keeps_votes_cast_since_it_was_loaded(self):
+        feature = Feature.objects.get(pk=self.feature.pk)
+        hot_score = feature.hot_score
+        Vote.objects.create(user=self.user1, feature=self.feature) # Cast by another request
+        feature.title = 'Renamed'
+        feature.save()
+        feature.refresh_from_db()
+        self.assertEqual((feature.title, feature.vote_count), ('Renamed', 1))
+        self.assertGreater(feature.hot_score, hot_score)
+
+    def test_reconcile_command_dry_run_only_reports(self):
+        Feature.objects.filter(pk=self.feature.pk).update(vote_count=3)
+        out = StringIO()
+        call_command('reconcile_vote_counts', dry_run=True, stdout=out)
+        self.feature.refresh_from_db()
+        self.assertEqual(self.feature.vote_count, 3)
+        self.assertIn(f'Feature {self.feature.pk}: stored 3, actual 0', out.getvalue())
+
+
+class LeaderboardAPITest(TestCase):
+    """
+    Testes de API para o ranking de features mais votadas.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.users = [
+            User.objects.create_user(username=f'voter{i}', email=f'voter{i}@example.com', password='password')
+            for i in range(3)
+        ]
+        self.low = Feature.objects.create(title='Low', description='Desc.', created_by=self.users[0])
+        self.high = Feature.objects.create(title='High', description='Desc.', created_by=self.users[0])
+        self.planned = Feature.objects.create(title='Planned', description='Desc.', created_by=self.users[0], status='Planned')
+        cache.clear()
+        self.top_url = '/api/features/top/'
+
+    def _vote(self, feature, voters):
+        for user in voters:
+            Vote.objects.create(user=user, feature=feature)
+
+    def _top_titles(self, **params):
+        response = self.client.get(self.top_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['title'] for item in response.data]
+
+    def test_top_rebuilds_from_db_on_cold_start(self):
+        self._vote(self.high, self.users)
+        self._vote(self.low, self.users[:1])
+        cache.clear() # Cold start: no sorted set yet
+        self.assertEqual(self._top_titles(status='Open'), ['High', 'Low'])
+        self.assertEqual(self._top_titles(status='Planned'), ['Planned'])
+
+    def test_top_follows_votes_and_unvotes(self):
+        self._top_titles(status='Open') # Builds the sorted set, later votes update it in place
+        self._vote(self.low, self.users[:2])
+        self._vote(self.high, self.users[:1])
+        self.assertEqual(self._top_titles(status='Open'), ['Low', 'High'])
+
+        for vote in Vote.objects.filter(feature=self.low):
+            vote.delete()
+        self.assertEqual(self._top_titles(status='Open'), ['High', 'Low'])
+
+    def test_top_respects_limit(self):
+        self._vote(self.high, self.users[:1])
+        self.assertEqual(self._top_titles(status='Open', limit=1), ['High'])
+
+    def test_top_follows_status_changes_and_deletes(self):
+        self._top_titles(status='Open')
+        self._top_titles(status='Planned')
+
+        login_response = self.client.post('/api/token/', {'username': 'voter0', 'password': 'password'}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {login_response.data["access"]}')
+        self.client.patch(f'/api/features/{self.high.id}/', {'status': 'Planned'}, format='json')
+        self.client.delete(f'/api/features/{self.low.id}/')
+
+        self.assertEqual(self._top_titles(status='Open'), [])
+        self.assertEqual(sorted(self._top_titles(status='Planned')), ['High', 'Planned'])
+
+    @skipUnless(get_connection() is not None, 'The leaderboard is kept in Redis')
+    def test_votes_during_a_status_change_are_kept(self):
+        self._vote(self.planned, self.users[:2])
+        self._vote(self.high, self.users[:1])
+        self._top_titles(status='Open')
+        self._top_titles(status='Planned')
+
+        move_feature = leaderboard.move_feature
+        def vote_then_move(*args):
+            # Votes committed after the view loaded the feature, before the leaderboard moves it
+            self._vote(self.high, self.users[1:])
+            move_feature(*args)
+
+        login_response = self.client.post('/api/token/', {'username': 'voter0', 'password': 'password'}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {login_response.data["access"]}')
+        with mock.patch.object(leaderboard, 'move_feature', vote_then_move):
+            self.client.patch(f'/api/features/{self.high.id}/', {'status': 'Planned'}, format='json')
+
+        self.assertEqual(self._top_titles(status='Planned'), ['High', 'Planned'])
+        self.assertEqual(get_connection().zscore(leaderboard._key('Planned'), str(self.high.id)), 3)
+
+    @skipUnless(get_connection() is not None, 'The leaderboard is kept in Redis')
+    def test_status_change_of_a_feature_missing_from_the_old_set(self):
+        self._vote(self.high, self.users)
+        self._top_titles(status='Planned')
+        leaderboard.remove_feature(self.high.id, 'Open') # e.g. the Open set was never built
+        Feature.objects.filter(pk=self.high.pk).update(status='Planned')
+        leaderboard.move_feature(self.high.id, 'Open', 'Planned')
+        self.assertEqual(get_connection().zscore(leaderboard._key('Planned'), str(self.high.id)), 3)
+
+    def test_top_invalid_status(self):
+        response = self.client.get(self.top_url, {'status': 'Unknown'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FeatureCursorPaginationTest(TestCase):
+    """
+    Testes de API para a paginação por cursor (keyset) da listagem de features.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='pager', email='pager@example.com', password='password')
+        Feature.objects.bulk_create([
+            Feature(title=f'Feature {i}', description='Desc.', created_by=self.user) for i in range(25)
+        ])
+        # Same timestamp for every feature, so ordering relies on the id tie-breaker
+        Feature.objects.update(created_at=timezone.now())
+        cache.clear()
+        self.feature_list_url = '/api/features/'
+
+    def test_cursor_pagination_walks_all_features_once(self):
+        seen = []
+        url = f'{self.feature_list_url}?pagination=cursor'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+    def test_cursor_pagination_skips_count_query(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.feature_list_url, {'pagination': 'cursor'})
+        self.assertFalse(any('COUNT(' in query['sql'].upper() for query in context.captured_queries))
+
+    def test_page_number_pagination_remains_default(self):
+        response = self.client.get(self.feature_list_url, {'page': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 5)
+
+
+@override_settings(VOTE_INGESTION_MODE='queued')
+class QueuedVoteIngestionTest(TestCase):
+    """
+    Testes da ingestão de votos com escrita diferida (fila no Redis).
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.users = [
+            User.objects.create_user(username=f'queued{i}', email=f'queued{i}@example.com', password='password')
+            for i in range(20)
+        ]
+        self.feature = Feature.objects.create(title='Queued Feature', description='Desc.', created_by=self.users[0])
+        self.other = Feature.objects.create(title='Other Feature', description='Desc.', created_by=self.users[0])
+        cache.clear()
+        login_response = self.client.post('/api/token/', {'username': 'queued0', 'password': 'password'}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {login_response.data["access"]}')
+        self.upvote_url = lambda pk: f'/api/features/{pk}/upvote/'
+        self.unvote_url = lambda pk: f'/api/features/{pk}/unvote/'
+
+    def _drain(self):
+        call_command('flush_vote_queue', once=True, batch_size=7, stdout=StringIO())
+
+    def test_upvote_is_accepted_then_flushed(self):
+        response = self.client.post(self.upvote_url(self.feature.id))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(Vote.objects.exists()) # Not written until the worker runs
+
+        self._drain()
+        self.assertTrue(Vote.objects.filter(user=self.users[0], feature=self.feature).exists())
+        self.feature.refresh_from_db()
+        self.assertEqual(self.feature.vote_count, 1)
+        self.assertEqual(self.feature.get_vote_count(), 1)
+
+    def test_duplicate_upvote_is_rejected_by_dedupe(self):
+        self.client.post(self.upvote_url(self.feature.id))
+        response = self.client.post(self.upvote_url(self.feature.id))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], 'You have already upvoted this feature.')
+
+    def test_upvote_then_unvote_in_same_batch(self):
+        self.client.post(self.upvote_url(self.feature.id))
+        response = self.client.post(self.unvote_url(self.feature.id))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self._drain()
+        self.assertFalse(Vote.objects.exists())
+        self.feature.refresh_from_db()
+        self.assertEqual(self.feature.vote_count, 0)
+
+    def test_upvote_missing_feature(self):
+        response = self.client.post(self.upvote_url(uuid.uuid4()))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_concurrent_votes_converge(self):
+        def toggle(user):
+            # Every user double-taps upvote on both features; odd users then unvote the first one
+            for feature in (self.feature, self.other):
+                vote_queue.enqueue_upvote(user.pk, feature.pk)
+                vote_queue.enqueue_upvote(user.pk, feature.pk)
+            if user.pk % 2:
+                vote_queue.enqueue_unvote(user.pk, self.feature.pk)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(toggle, self.users))
+        self._drain()
+
+        expected_first = sum(1 for user in self.users if not user.pk % 2)
+        self.assertEqual(Vote.objects.filter(feature=self.feature).count(), expected_first)
+        self.assertEqual(Vote.objects.filter(feature=self.other).count(), len(self.users))
+        for feature in (self.feature, self.other):
+            feature.refresh_from_db()
+            self.assertEqual(feature.vote_count, feature.votes.count())
+            self.assertEqual(cache.get(f'feature:{feature.id}:votes'), feature.vote_count)
+
+
+class VoteResponseTest(TestCase):
+    """
+    Testes da resposta compacta de upvote e comparação do número de queries com ?expand=feature.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(username='user1', email='u1@example.com', password='password')
+        self.user2 = User.objects.create_user(username='user2', email='u2@example.com', password='password')
+        self.feature1 = Feature.objects.create(title='Feat A', description='Desc A', created_by=self.user2)
+        self.feature2 = Feature.objects.create(title='Feat B', description='Desc B', created_by=self.user2)
+        Vote.objects.create(user=self.user2, feature=self.feature1)
+        cache.clear()
+        login_response = self.client.post('/api/token/', {'username': 'user1', 'password': 'password'}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {login_response.data["access"]}')
+        self.upvote_url = lambda pk: f'/api/features/{pk}/upvote/'
+
+    def test_compact_upvote_response(self):
+        response = self.client.post(self.upvote_url(self.feature1.id))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(set(response.data), {'id', 'feature', 'vote_count', 'has_voted'})
+        self.assertEqual(response.data['feature'], str(self.feature1.id))
+        self.assertEqual(response.data['vote_count'], 2)
+        self.assertTrue(response.data['has_voted'])
+
+    def test_expanded_upvote_response_keeps_full_shape(self):
+        response = self.client.post(self.upvote_url(self.feature1.id) + '?expand=feature')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['user']['username'], 'user1')
+        self.assertEqual(response.data['feature']['title'], 'Feat A')
+        self.assertEqual(response.data['feature']['vote_count'], 2)
+        self.assertTrue(response.data['feature']['has_voted'])
+
+    def test_compact_response_uses_fewer_queries(self):
+        with CaptureQueriesContext(connection) as compact:
+            self.client.post(self.upvote_url(self.feature1.id))
+        with CaptureQueriesContext(connection) as expanded:
+            self.client.post(self.upvote_url(self.feature2.id) + '?expand=feature')
+        # Benchmark figure: the expanded shape re-reads the creator and has_voted for the nested feature
+        self.assertLess(len(compact.captured_queries), len(expanded.captured_queries))
+
+
+class UnvoteStatementTest(TestCase):
+    """
+    Testes do unvote em um único DELETE com decremento condicional dos contadores.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        self.user = User.objects.create_user(username='user1', email='u1@example.com', password='password')
+        self.feature = Feature.objects.create(title='Feat A', description='Desc A', created_by=self.user)
+        Vote.objects.create(user=self.user, feature=self.feature)
+        login_response = self.client.post('/api/token/', {'username': 'user1', 'password': 'password'}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {login_response.data["access"]}')
+        self.unvote_url = lambda pk: f'/api/features/{pk}/unvote/'
+
+    def test_unvote_does_not_load_feature_or_vote(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.unvote_url(self.feature.id))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].upper().startswith('SELECT') and ('features_feature' in query['sql'] or 'features_vote' in query['sql'])
+        ]
+        self.assertEqual(selects, [])
+
+    def test_double_unvote_decrements_once(self):
+        self.assertTrue(Vote.remove(self.user, self.feature.id))
+        self.assertFalse(Vote.remove(self.user, self.feature.id))
+        self.feature.refresh_from_db()
+        self.assertEqual(self.feature.vote_count, 0)
+        self.assertEqual(cache.get(f'feature:{self.feature.id}:votes'), 0)
+
+    def test_unvote_expired_cache_key_is_reseeded(self):
+        cache.delete(f'feature:{self.feature.id}:votes')
+        self.client.post(self.unvote_url(self.feature.id))
+        self.assertEqual(cache.get(f'feature:{self.feature.id}:votes'), 0)
+
+    def test_unvote_distinguishes_missing_feature_and_missing_vote(self):
+        response = self.client.post(self.unvote_url(uuid.uuid4()))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post(self.unvote_url('not-a-uuid'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.post(self.unvote_url(self.feature.id))
+        response = self.client.post(self.unvote_url(self.feature.id))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], 'You have not upvoted this feature.')
+
+
+class BulkVoteTest(TestCase):
+    """
+    Testes da API de votos em lote e do comando import_votes.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='bulk', email='bulk@example.com', password='password')
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='password')
+        self.features = Feature.objects.bulk_create([
+            Feature(title=f'Feature {i}', description='Desc.', created_by=self.admin) for i in range(6)
+        ])
+        Vote.objects.create(user=self.user, feature=self.features[0])
+        cache.clear()
+        self.bulk_url = '/api/features/bulk-vote/'
+
+    def _login(self, username):
+        login_response = self.client.post('/api/token/', {'username': username, 'password': 'password'}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {login_response.data["access"]}')
+
+    def test_bulk_vote_reports_per_item_results(self):
+        self._login('bulk')
+        votes = [
+            {'feature': str(self.features[0].id), 'action': 'upvote'},
+            {'feature': str(self.features[1].id), 'action': 'upvote'},
+            {'feature': str(self.features[1].id), 'action': 'upvote'},
+            {'feature': str(self.features[0].id), 'action': 'unvote'},
+            {'feature': str(self.features[2].id), 'action': 'unvote'},
+            {'feature': str(uuid.uuid4()), 'action': 'upvote'},
+            {'feature': 'not-a-uuid', 'action': 'upvote'},
+            {'feature': str(self.features[3].id), 'action': 'downvote'},
+        ]
+        response = self.client.post(self.bulk_url, {'votes': votes}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['result'] for item in response.data['results']],
+            ['already_voted', 'created', 'already_voted', 'removed', 'not_voted', 'not_found', 'invalid', 'invalid']
+        )
+        self.assertEqual(
+            set(Vote.objects.filter(user=self.user).values_list('feature_id', flat=True)),
+            {self.features[1].id}
+        )
+        for feature, expected in ((self.features[0], 0), (self.features[1], 1)):
+            feature.refresh_from_db()
+            self.assertEqual(feature.vote_count, expected)
+            self.assertEqual(cache.get(f'feature:{feature.id}:votes'), expected)
+
+    def test_bulk_vote_query_count_is_independent_of_batch_size(self):
+        self._login('bulk')
+        def count_queries(features):
+            votes = [{'feature': str(feature.id), 'action': 'upvote'} for feature in features]
+            cache.clear() # Same cold user cache for both batches
+            with CaptureQueriesContext(connection) as context:
+                self.client.post(self.bulk_url, {'votes': votes}, format='json')
+            return len(context.captured_queries)
+        self.assertEqual(count_queries(self.features[1:2]), count_queries(self.features[2:6]))
+
+    def test_bulk_vote_for_another_user_requires_admin(self):
+        votes = [{'feature': str(self.features[1].id), 'action': 'upvote'}]
+        self._login('bulk')
+        response = self.client.post(self.bulk_url, {'user': self.admin.pk, 'votes': votes}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self._login('admin')
+        response = self.client.post(self.bulk_url, {'user': self.user.pk, 'votes': votes}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(Vote.objects.filter(user=self.user, feature=self.features[1]).exists())
+
+    def test_bulk_vote_requires_items(self):
+        self._login('bulk')
+        response = self.client.post(self.bulk_url, {'votes': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_votes_csv_and_jsonl(self):
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'votes.csv')
+            with open(csv_path, 'w') as handle:
+                handle.write('user,feature,action\n')
+                for feature in self.features[1:4]:
+                    handle.write(f'{self.user.pk},{feature.id},upvote\n')
+                handle.write(f'999999,{self.features[4].id},upvote\n')
+            out = StringIO()
+            call_command('import_votes', csv_path, chunk_size=2, stdout=out)
+            self.assertIn('created: 3', out.getvalue())
+            self.assertIn('unknown_user: 1', out.getvalue())
+
+            jsonl_path = os.path.join(directory, 'votes.jsonl')
+            with open(jsonl_path, 'w') as handle:
+                handle.write(json.dumps({'feature': str(self.features[1].id), 'action': 'unvote'}) + '\n')
+            call_command('import_votes', jsonl_path, user='bulk', stdout=StringIO())
+
+        self.assertEqual(Vote.objects.filter(user=self.user).count(), 3)
+        self.features[1].refresh_from_db()
+        self.assertEqual(self.features[1].vote_count, 0)
+
+    def test_import_votes_query_count_is_independent_of_users_per_chunk(self):
+        voters = User.objects.bulk_create([User(username=f'importer{i}', email=f'importer{i}@example.com') for i in range(5)])
+        def count_queries(users, directory):
+            path = os.path.join(directory, f'votes-{len(users)}.csv')
+            with open(path, 'w') as handle:
+                handle.write('user,feature,action\n')
+                for user in users:
+                    for feature in self.features[1:3]:
+                        handle.write(f'{user.pk},{feature.id},upvote\n')
+                handle.write(f'{users[0].pk},{self.features[1].id},unvote\n')
+            with CaptureQueriesContext(connection) as context:
+                call_command('import_votes', path, stdout=StringIO())
+            return [query['sql'] for query in context.captured_queries]
+
+        with tempfile.TemporaryDirectory() as directory:
+            few = count_queries(voters[:1], directory)
+            many = count_queries(voters[1:], directory)
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(sum('INTO "features_vote" (' in sql for sql in many), 1)
+        self.assertEqual(Vote.objects.filter(user__in=voters[1:], feature=self.features[2]).count(), 4)
+        self.features[1].refresh_from_db()
+        self.assertEqual(self.features[1].vote_count, 3) # The first importer of the chunk unvoted it again
+
+
+class ResponseCacheTest(TestCase):
+    """
+    Testes do cache de respostas anônimas da listagem e do detalhe de features.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='user1', email='u1@example.com', password='password')
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='password')
+        self.feature = Feature.objects.create(title='Feat A', description='Desc A', created_by=self.user)
+        self.planned = Feature.objects.create(title='Feat B', description='Desc B', created_by=self.user, status='Planned')
+        cache.clear()
+        self.feature_list_url = '/api/features/'
+        self.feature_detail_url = lambda pk: f'/api/features/{pk}/'
+
+    def _login(self, client, username):
+        login_response = client.post('/api/token/', {'username': username, 'password': 'password'}, format='json')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {login_response.data["access"]}')
+
+    def test_anonymous_list_is_served_from_cache(self):
+        first = self.client.get(self.feature_list_url)
+        self.assertIn('ETag', first)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.feature_list_url)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_if_none_match_returns_304(self):
+        first = self.client.get(self.feature_detail_url(self.feature.id))
+        response = self.client.get(self.feature_detail_url(self.feature.id), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_votes_and_writes_invalidate(self):
+        self.client.get(self.feature_list_url)
+        Vote.objects.create(user=self.user, feature=self.feature)
+        response = self.client.get(self.feature_list_url)
+        counts = {item['id']: item['vote_count'] for item in response.data['results']}
+        self.assertEqual(counts[str(self.feature.id)], 1)
+
+        writer = APIClient()
+        self._login(writer, 'user1')
+        writer.post(self.feature_list_url, {'title': 'New', 'description': 'Desc.'}, format='json')
+        self.assertEqual(self.client.get(self.feature_list_url).data['count'], 3)
+
+        writer.patch(self.feature_detail_url(self.feature.id), {'title': 'Renamed'}, format='json')
+        self.assertEqual(self.client.get(self.feature_detail_url(self.feature.id)).data['title'], 'Renamed')
+
+    def test_status_filtered_list_survives_writes_to_other_statuses(self):
+        self.client.get(self.feature_list_url, {'status': 'Planned'})
+        Vote.objects.create(user=self.user, feature=self.feature) # An 'Open' feature
+        with self.assertNumQueries(0):
+            response = self.client.get(self.feature_list_url, {'status': 'Planned'})
+        self.assertEqual([item['title'] for item in response.data['results']], ['Feat B'])
+
+    def test_authenticated_requests_bypass_cache(self):
+        Vote.objects.create(user=self.user, feature=self.feature)
+        voter = APIClient()
+        self._login(voter, 'user1')
+        voter_data = voter.get(self.feature_detail_url(self.feature.id)).data
+        self.assertTrue(voter_data['has_voted'])
+        self.assertFalse(self.client.get(self.feature_detail_url(self.feature.id)).data['has_voted'])
+
+    def test_cache_stats(self):
+        self.client.get(self.feature_list_url)
+        self.client.get(self.feature_list_url)
+        admin = APIClient()
+        self._login(admin, 'admin')
+        response = admin.get('/api/features/cache-stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['hits'], response.data['misses']), (1, 1))
+
+        self._login(admin, 'user1')
+        self.assertEqual(admin.get('/api/features/cache-stats/').status_code, status.HTTP_403_FORBIDDEN)
+
+
+class VotedSetCacheTest(TestCase):
+    """
+    Testes do cache por usuário dos ids de features votadas (has_voted).
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='user1', email='u1@example.com', password='password')
+        self.features = Feature.objects.bulk_create([
+            Feature(title=f'Feature {i}', description='Desc.', created_by=self.user) for i in range(4)
+        ])
+        Vote.objects.create(user=self.user, feature=self.features[0])
+        cache.clear()
+
+    def test_warm_set_answers_without_queries(self):
+        self.assertEqual(Vote.voted_feature_ids(self.user, self.features), {self.features[0].id})
+        with self.assertNumQueries(0):
+            self.assertEqual(Vote.voted_feature_ids(self.user, self.features), {self.features[0].id})
+
+    def test_user_without_votes_is_cached(self):
+        other = User.objects.create_user(username='user2', email='u2@example.com', password='password')
+        self.assertEqual(Vote.voted_feature_ids(other, self.features), set())
+        with self.assertNumQueries(0):
+            self.assertEqual(Vote.voted_feature_ids(other, self.features), set())
+
+    def test_set_follows_vote_writes(self):
+        Vote.voted_feature_ids(self.user, self.features) # Build the set
+        Vote.objects.create(user=self.user, feature=self.features[1])
+        Vote.remove(self.user, self.features[0].id)
+        with self.assertNumQueries(0):
+            self.assertEqual(Vote.voted_feature_ids(self.user, self.features), {self.features[1].id})
+
+        apply_bulk_votes(self.user.pk, [(self.features[2].id, 'upvote')])
+        self.assertEqual(
+            Vote.voted_feature_ids(self.user, self.features),
+            {self.features[1].id, self.features[2].id}
+        )
+
+    def test_power_users_fall_back_to_db(self):
+        for feature in self.features[1:]:
+            Vote.objects.create(user=self.user, feature=feature)
+        with mock.patch.object(voted_sets, 'MAX_MEMBERS', 2):
+            self.assertEqual(len(Vote.voted_feature_ids(self.user, self.features)), 4)
+            self.assertFalse(get_connection().exists(f'user:{self.user.pk}:voted'))
+            with self.assertNumQueries(1):
+                self.assertEqual(len(Vote.voted_feature_ids(self.user, self.features)), 4)
+
+    def test_vote_cast_while_the_set_is_built_is_not_lost(self):
+        def load_then_vote(limit):
+            voted_ids = list(Vote.objects.filter(user=self.user).values_list('feature_id', flat=True)[:limit])
+            Vote.objects.create(user=self.user, feature=self.features[1]) # Commits before the set is written
+            return voted_ids
+
+        self.assertEqual(voted_sets.lookup(self.user.pk, [self.features[0].id], load_then_vote), {self.features[0].id})
+        self.assertEqual(
+            Vote.voted_feature_ids(self.user, self.features),
+            {self.features[0].id, self.features[1].id}
+        )
+        with self.assertNumQueries(0):
+            Vote.voted_feature_ids(self.user, self.features) # Built from the second query
+
+    def test_set_growing_past_the_limit_is_dropped(self):
+        with mock.patch.object(voted_sets, 'MAX_MEMBERS', 2):
+            Vote.voted_feature_ids(self.user, self.features) # Built with one member
+            Vote.objects.create(user=self.user, feature=self.features[1])
+            self.assertTrue(get_connection().exists(f'user:{self.user.pk}:voted'))
+            Vote.objects.create(user=self.user, feature=self.features[2])
+            self.assertFalse(get_connection().exists(f'user:{self.user.pk}:voted'))
+            with self.assertNumQueries(1):
+                self.assertEqual(len(Vote.voted_feature_ids(self.user, self.features)), 3)
+
+# Features are edited through the models here, which (unlike the API) leave the anonymous response cache alone
+@override_settings(FEATURE_RESPONSE_CACHE_TIMEOUT=0)
+class FeatureSearchTest(TestCase):
+    """
+    Testes da busca textual (?q=) em títulos e descrições de features.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='user1', email='u1@example.com', password='password')
+        self.dark_mode = Feature.objects.create(
+            title='Dark mode', description='A darker theme for the dashboard.', created_by=self.user
+        )
+        self.export = Feature.objects.create(
+            title='CSV export', description='Export the dashboard as a spreadsheet.', created_by=self.user
+        )
+        self.calendar = Feature.objects.create(
+            title='Calendar sync', description='Sync deadlines with Google Calendar.', created_by=self.user
+        )
+        cache.clear()
+        self.feature_list_url = '/api/features/'
+
+    def _search(self, query, **params):
+        response = self.client.get(self.feature_list_url, {'q': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def _titles(self, query):
+        return [feature['title'] for feature in self._search(query).data['results']]
+
+    def test_matches_titles_and_descriptions(self):
+        self.assertEqual(self._titles('dark mode'), ['Dark mode'])
+        self.assertEqual(self._titles('spreadsheet'), ['CSV export'])
+        self.assertEqual(self._titles('the dashboard'), ['CSV export', 'Dark mode'])
+        self.assertEqual(self._titles('roadmap'), [])
+
+    def test_title_matches_and_votes_rank_higher(self):
+        # 'dashboard' is in both descriptions; a title match outranks them
+        board = Feature.objects.create(title='Dashboard widgets', description='Widgets.', created_by=self.user)
+        self.assertEqual(self._titles('dashboard')[0], 'Dashboard widgets')
+
+        twin = Feature.objects.create(title='Dark mode', description='A darker theme for the dashboard.', created_by=self.user)
+        self.assertEqual(self._titles('dark')[0], twin.title) # Newest first among equal ranks
+        voters = [User.objects.create_user(username=f'voter{i}', password='password') for i in range(3)]
+        for voter in voters:
+            Vote.objects.create(user=voter, feature=self.dark_mode)
+        results = self._search('dark').data['results']
+        self.assertEqual([feature['id'] for feature in results], [str(self.dark_mode.id), str(twin.id)])
+        self.assertNotIn(str(board.id), [feature['id'] for feature in results])
+
+    def test_index_follows_edits_and_deletes(self):
+        self._search('calendar') # Build the index
+        self.calendar.title = 'Outlook sync'
+        self.calendar.description = 'Sync deadlines with Outlook.'
+        self.calendar.save()
+        self.assertEqual(self._titles('calendar'), [])
+        self.assertEqual(self._titles('outlook'), ['Outlook sync'])
+
+        self.export.delete()
+        self.assertEqual(self._titles('spreadsheet'), [])
+
+    def test_combines_with_status_filter(self):
+        self.export.status = 'Planned'
+        self.export.save(update_fields=['status'])
+        self.assertEqual(self._titles('dashboard'), ['CSV export', 'Dark mode'])
+        response = self._search('dashboard', status='Planned')
+        self.assertEqual([feature['title'] for feature in response.data['results']], ['CSV export'])
+
+    def test_search_uses_page_numbers_even_with_cursor_requested(self):
+        response = self._search('dashboard', pagination='cursor')
+        self.assertIn('count', response.data)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_bulk_writes_are_picked_up_after_rebuild(self):
+        self._search('dark') # Build the index
+        Feature.objects.bulk_create([Feature(title='Offline drafts', description='Work offline.', created_by=self.user)])
+        self.assertEqual(self._titles('offline'), []) # bulk_create bypasses Feature.save
+
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 4 features.', out.getvalue())
+        self.assertEqual(self._titles('offline'), ['Offline drafts'])
+
+    @skipIf(search.USE_POSTGRES_SEARCH, 'Ranking of the in-process fallback index')
+    @mock.patch.object(search, 'LOOKUP_CHUNK_SIZE', 2)
+    @mock.patch.object(search, 'MAX_FALLBACK_RESULTS', 3)
+    def test_fallback_returns_the_best_ranked_matches(self):
+        features = [
+            Feature.objects.create(title='Sync' if i % 3 == 0 else 'Other', description='Sync now.', created_by=self.user)
+            for i in range(9)
+        ]
+        voters = [User.objects.create_user(username=f'voter{i}', password='password') for i in range(4)]
+        for i, feature in enumerate(features):
+            for voter in voters[:i % 5]:
+                Vote.objects.create(user=voter, feature=feature)
+        # Every description matches once, 'Sync' titles once more; only the best 3 of the 9 are returned
+        expected = sorted(
+            Feature.objects.filter(pk__in=[feature.pk for feature in features]),
+            key=lambda feature: (
+                (search.DESCRIPTION_WEIGHT + search.TITLE_WEIGHT * (feature.title == 'Sync'))
+                * (1 + search.VOTE_BOOST * math.log1p(feature.vote_count)),
+                feature.created_at, feature.pk
+            ),
+            reverse=True
+        )[:3]
+        ranked = list(search.search(Feature.objects.all(), 'sync'))
+        self.assertEqual([feature.pk for feature in ranked], [feature.pk for feature in expected])
+
+    def test_saving_during_a_redis_outage(self):
+        self._search('calendar') # Build the index
+        redis_client.breaker.reset()
+        self.addCleanup(redis_client.breaker.reset)
+        with redis_down():
+            self.calendar.title = 'Outlook sync'
+            self.calendar.save()
+            self.assertEqual(self._titles('outlook'), ['Outlook sync'])
+        self.assertEqual(self._titles('outlook'), ['Outlook sync'])
+
+    def test_benchmark_command_rolls_back_seeded_features(self):
+        out = StringIO()
+        call_command('benchmark_search', sizes=[200], queries=['dark mode'], repeat=2, stdout=out)
+        self.assertIn('200 features: index built', out.getvalue())
+        self.assertIn("q='dark mode': search median", out.getvalue())
+        self.assertEqual(Feature.objects.count(), 3)
+        self.assertEqual(self._titles('dark mode'), ['Dark mode'])
+
+class DuplicateDetectionTest(TestCase):
+    """
+    Testes da detecção de features duplicadas no momento da criação (MinHash/LSH).
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='user1', email='u1@example.com', password='password')
+        self.dark_mode = Feature.objects.create(
+            title='Dark mode for the dashboard',
+            description='Add a dark theme to the dashboard so it is easier on the eyes at night.',
+            created_by=self.user
+        )
+        Feature.objects.create(
+            title='CSV export', description='Export the vote report as a CSV spreadsheet.', created_by=self.user
+        )
+        cache.clear()
+        duplicates.rebuild()
+        login_response = self.client.post('/api/token/', {'username': 'user1', 'password': 'password'}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {login_response.data["access"]}')
+        self.feature_list_url = '/api/features/'
+        self.feature_detail_url = lambda pk: f'/api/features/{pk}/'
+
+    def _create(self, title, description):
+        response = self.client.post(self.feature_list_url, {'title': title, 'description': description}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response
+
+    def _duplicate_ids(self, title, description):
+        return [match['id'] for match in duplicates.find_duplicates(title, description)]
+
+    def test_near_identical_submission_is_flagged(self):
+        response = self._create(
+            'Dark mode for dashboard',
+            'Please add a dark theme to the dashboard so it is easier on the eyes at night.'
+        )
+        matches = response.data['possible_duplicates']
+        self.assertEqual([match['id'] for match in matches], [self.dark_mode.id])
+        self.assertGreaterEqual(matches[0]['similarity'], duplicates.SIMILARITY_THRESHOLD)
+
+    def test_unrelated_submission_has_no_duplicates(self):
+        response = self._create('Calendar sync', 'Sync deadlines with Google Calendar.')
+        self.assertEqual(response.data['possible_duplicates'], [])
+
+    def test_created_features_are_indexed(self):
+        created = self._create('Offline drafts', 'Keep drafts of new features while offline and sync them later.')
+        self.assertEqual(
+            self._duplicate_ids('Offline drafts', 'Keep drafts of features while offline and sync them later.'),
+            [uuid.UUID(created.data['id'])]
+        )
+
+    def test_index_follows_edits_and_archiving(self):
+        text = ('Dark mode for the dashboard', 'Add a dark theme to the dashboard so it is easier on the eyes at night.')
+        detail_url = self.feature_detail_url(self.dark_mode.id)
+
+        self.client.patch(detail_url, {'status': 'Archived'}, format='json')
+        self.assertEqual(self._duplicate_ids(*text), [])
+        self.client.patch(detail_url, {'status': 'Planned'}, format='json')
+        self.assertEqual(self._duplicate_ids(*text), [self.dark_mode.id])
+
+        self.client.patch(detail_url, {'title': 'Keyboard shortcuts', 'description': 'Shortcuts for voting.'}, format='json')
+        self.assertEqual(self._duplicate_ids(*text), [])
+        self.assertEqual(self._duplicate_ids('Keyboard shortcuts', 'Shortcuts for voting.'), [self.dark_mode.id])
+
+        self.client.delete(detail_url)
+        self.assertEqual(self._duplicate_ids('Keyboard shortcuts', 'Shortcuts for voting.'), [])
+
+    def test_lookup_is_a_single_query(self):
+        with self.assertNumQueries(1):
+            duplicates.find_duplicates(self.dark_mode.title, self.dark_mode.description)
+
+    def test_rebuild_command_restores_the_index(self):
+        cache.clear()
+        self.assertEqual(self._duplicate_ids(self.dark_mode.title, self.dark_mode.description), [])
+        out = StringIO()
+        call_command('rebuild_duplicate_index', stdout=out)
+        self.assertIn('Indexed 2 features.', out.getvalue())
+        self.assertEqual(self._duplicate_ids(self.dark_mode.title, self.dark_mode.description), [self.dark_mode.id])
+
+class HotOrderingTest(TestCase):
+    """
+    Testes da ordenação por popularidade recente (?ordering=hot).
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='user1', email='u1@example.com', password='password')
+        self.voters = [User.objects.create_user(username=f'voter{i}', password='password') for i in range(5)]
+        self.start = timezone.now()
+        cache.clear()
+        self.feature_list_url = '/api/features/'
+
+    def _at(self, moment):
+        return mock.patch('django.utils.timezone.now', return_value=moment)
+
+    def _expected_score(self, feature):
+        feature.refresh_from_db()
+        voted_at = Vote.objects.filter(feature=feature).values_list('created_at', flat=True)
+        return hot.score(feature.created_at, voted_at)
+
+    def test_recent_votes_outrank_older_popularity(self):
+        ten_days_ago = self.start - timedelta(days=10)
+        with self._at(ten_days_ago):
+            old = Feature.objects.create(title='Old favourite', description='Desc.', created_by=self.user)
+            for voter in self.voters:
+                Vote.objects.create(user=voter, feature=old)
+        with self._at(self.start - timedelta(days=1)):
+            recent = Feature.objects.create(title='Rising', description='Desc.', created_by=self.user)
+        with self._at(self.start):
+            for voter in self.voters[:2]:
+                Vote.objects.create(user=voter, feature=recent)
+            newest = Feature.objects.create(title='Brand new', description='Desc.', created_by=self.user)
+
+        response = self.client.get(self.feature_list_url, {'ordering': 'hot'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [feature['id'] for feature in response.data['results']],
+            [str(recent.id), str(newest.id), str(old.id)]
+        )
+        default = self.client.get(self.feature_list_url)
+        self.assertEqual(default.data['results'][0]['id'], str(newest.id))
+
+    def test_upvotes_update_the_score_incrementally(self):
+        feature = Feature.objects.create(title='Feature', description='Desc.', created_by=self.user)
+        for offset, voter in enumerate(self.voters):
+            with self._at(self.start + timedelta(hours=offset * 7)):
+                Vote.objects.create(user=voter, feature=feature)
+        feature.refresh_from_db()
+        self.assertAlmostEqual(feature.hot_score, self._expected_score(feature), places=6)
+
+    def test_unvotes_are_corrected_by_the_refresh_job(self):
+        feature = Feature.objects.create(title='Feature', description='Desc.', created_by=self.user)
+        for voter in self.voters:
+            Vote.objects.create(user=voter, feature=feature)
+        Vote.remove(self.voters[0], feature.id)
+        self.voters[1].votes.get().delete()
+        apply_bulk_votes(self.voters[2].pk, [(feature.id, 'unvote')])
+        feature.refresh_from_db()
+        self.assertGreater(feature.hot_score, self._expected_score(feature))
+
+        out = StringIO()
+        call_command('refresh_hot_scores', stdout=out)
+        self.assertIn('Recomputed hot scores for 1 features.', out.getvalue())
+        feature.refresh_from_db()
+        self.assertAlmostEqual(feature.hot_score, self._expected_score(feature), places=6)
+
+    @skipUnless(get_connection() is not None, 'The stale queue is kept in Redis')
+    def test_stale_features_stay_queued_until_recomputed(self):
+        feature = Feature.objects.create(title='Feature', description='Desc.', created_by=self.user)
+        Vote.objects.create(user=self.voters[0], feature=feature)
+        Vote.remove(self.voters[0], feature.id)
+        with mock.patch.object(hot, 'score', side_effect=RuntimeError('worker died')):
+            with self.assertRaises(RuntimeError):
+                call_command('refresh_hot_scores', stdout=StringIO())
+        self.assertEqual(list(hot.stale_features()), [str(feature.id)])
+
+        # An unvote while the score is recomputed queues the feature again
+        recompute = hot.recompute
+
+        def recompute_during_an_unvote(feature_ids):
+            updated = recompute(feature_ids)
+            hot.mark_stale([feature.id])
+            return updated
+
+        with mock.patch.object(hot, 'recompute', recompute_during_an_unvote):
+            call_command('refresh_hot_scores', stdout=StringIO())
+        self.assertEqual(list(hot.stale_features()), [str(feature.id)])
+        call_command('refresh_hot_scores', stdout=StringIO())
+        self.assertEqual(hot.stale_features(), {})
+
+    def test_refresh_all_scores_bulk_created_features(self):
+        Feature.objects.bulk_create([Feature(title='Imported', description='Desc.', created_by=self.user)])
+        imported = Feature.objects.get(title='Imported')
+        self.assertEqual(imported.hot_score, 0)
+        call_command('refresh_hot_scores', '--all', stdout=StringIO())
+        imported.refresh_from_db()
+        self.assertAlmostEqual(imported.hot_score, self._expected_score(imported), places=6)
+
+    def test_hot_list_does_not_aggregate_votes(self):
+        Feature.objects.create(title='Feature', description='Desc.', created_by=self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.feature_list_url, {'ordering': 'hot'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in ctx.captured_queries if 'features_vote' in query['sql']])
+        self.assertTrue(any('ORDER BY "features_feature"."hot_score" DESC' in query['sql'] for query in ctx.captured_queries))
+
+    def test_invalid_ordering_is_rejected(self):
+        response = self.client.get(self.feature_list_url, {'ordering': 'votes'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ordering', response.data)
+
+class VoteTrendTest(TestCase):
+    """
+    Testes dos agregados de votos por hora/dia e do endpoint de tendência.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='user1', email='u1@example.com', password='password')
+        self.voters = [User.objects.create_user(username=f'voter{i}', password='password') for i in range(4)]
+        self.feature = Feature.objects.create(title='Feat A', description='Desc A', created_by=self.user)
+        self.day = timezone.now().replace(hour=10, minute=0, second=0, microsecond=0) - timedelta(days=1)
+        cache.clear()
+        self.trend_url = lambda pk: f'/api/features/{pk}/trend/'
+
+    def _at(self, moment):
+        return mock.patch('django.utils.timezone.now', return_value=moment)
+
+    def _cast_votes(self):
+        # Yesterday: 3 votes at 10:xx, 1 vote and 1 unvote at 11:xx
+        with self._at(self.day + timedelta(minutes=5)):
+            for voter in self.voters[:3]:
+                Vote.objects.create(user=voter, feature=self.feature)
+        with self._at(self.day + timedelta(hours=1, minutes=20)):
+            Vote.objects.create(user=self.voters[3], feature=self.feature)
+            Vote.remove(self.voters[0], self.feature.id)
+
+    def _hourly(self):
+        return {
+            rollup.bucket_start.astimezone(self.day.tzinfo).hour: (rollup.votes, rollup.unvotes)
+            for rollup in HourlyVoteRollup.objects.filter(feature=self.feature)
+        }
+
+    def test_events_are_rolled_up_by_hour_and_day(self):
+        self._cast_votes()
+        self.assertEqual(rollups.roll_up(), 5)
+        self.assertEqual(self._hourly(), {10: (3, 0), 11: (1, 1)})
+        daily = DailyVoteRollup.objects.get(feature=self.feature)
+        self.assertEqual((daily.votes, daily.unvotes), (4, 1))
+
+    def test_watermark_counts_each_event_once(self):
+        self._cast_votes()
+        rollups.roll_up()
+        self.assertEqual(rollups.roll_up(), 0)
+        with self._at(self.day + timedelta(hours=1, minutes=40)):
+            Vote.remove(self.voters[1], self.feature.id)
+        self.assertEqual(rollups.roll_up(), 1)
+        self.assertEqual(self._hourly(), {10: (3, 0), 11: (1, 2)})
+
+    def test_recent_events_wait_for_the_commit_lag(self):
+        Vote.objects.create(user=self.voters[0], feature=self.feature)
+        self.assertEqual(rollups.roll_up(), 0)
+        self.assertEqual(rollups.roll_up(now=timezone.now() + rollups.COMMIT_LAG), 1)
+
+    def test_processed_events_are_pruned_after_retention(self):
+        self._cast_votes()
+        rollups.roll_up()
+        self.assertEqual(VoteEvent.objects.count(), 5)
+        rollups.roll_up(now=timezone.now() + rollups.EVENT_RETENTION + timedelta(days=1))
+        self.assertEqual(VoteEvent.objects.count(), 0)
+
+    def test_batch_writes_log_only_actual_changes(self):
+        Vote.objects.create(user=self.voters[0], feature=self.feature)
+        other = Feature.objects.create(title='Feat B', description='Desc B', created_by=self.user)
+        apply_bulk_votes(self.voters[0].pk, [
+            (self.feature.id, 'upvote'), # Already voted
+            (other.id, 'upvote'),
+        ])
+        apply_bulk_votes(self.voters[1].pk, [(self.feature.id, 'unvote')]) # Never voted
+        apply_bulk_votes(self.voters[0].pk, [(self.feature.id, 'unvote')])
+        self.assertEqual(
+            sorted(VoteEvent.objects.values_list('feature_id', 'delta')),
+            sorted([(self.feature.id, 1), (other.id, 1), (self.feature.id, -1)])
+        )
+
+    def test_trend_endpoint_serves_rollups_with_bounded_queries(self):
+        self._cast_votes()
+        rollups.roll_up()
+        with self.assertNumQueries(2): # Feature existence + one rollup range scan
+            response = self.client.get(self.trend_url(self.feature.id), {'bucket': 'day', 'periods': 7})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['bucket'], 'day')
+        points = response.data['points']
+        self.assertEqual(len(points), 7)
+        self.assertEqual((points[-2]['votes'], points[-2]['unvotes'], points[-2]['net']), (4, 1, 3))
+        self.assertEqual(sum(point['votes'] for point in points), 4)
+
+        response = self.client.get(self.trend_url(self.feature.id), {'bucket': 'hour'})
+        self.assertEqual(len(response.data['points']), 48)
+        self.assertEqual(sum(point['net'] for point in response.data['points']), 3)
+
+    def test_trend_validates_parameters(self):
+        response = self.client.get(self.trend_url(self.feature.id), {'bucket': 'week'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.trend_url(self.feature.id), {'periods': 'many'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.trend_url(uuid.uuid4()))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rollup_command_backfills_existing_votes_once(self):
+        with self._at(self.day):
+            Vote.objects.create(user=self.voters[0], feature=self.feature)
+        VoteEvent.objects.all().delete() # As if the vote predates the event log
+        out = StringIO()
+        call_command('rollup_votes', '--backfill', stdout=out)
+        self.assertIn('Backfilled 1 existing votes.', out.getvalue())
+        self.assertEqual(DailyVoteRollup.objects.get(feature=self.feature).votes, 1)
+        with self.assertRaises(CommandError):
+            call_command('rollup_votes', '--backfill', stdout=StringIO())
+
+@override_settings(LIVE_UPDATES_BROKER='local')
+class LiveVoteCountsTest(TestCase):
+    """
+    Testes do stream SSE de contagens de votos (coalescidas por janela).
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='user1', email='u1@example.com', password='password')
+        self.voters = [User.objects.create_user(username=f'voter{i}', password='password') for i in range(20)]
+        self.feature = Feature.objects.create(title='Feat A', description='Desc A', created_by=self.user)
+        self.other = Feature.objects.create(title='Feat B', description='Desc B', created_by=self.user)
+        cache.clear()
+        self.live_url = '/api/features/live/'
+        window = mock.patch.object(live_updates, 'WINDOW_SECONDS', 0.01)
+        window.start()
+        self.addCleanup(window.stop)
+
+    def _events(self, chunk):
+        events = []
+        for block in chunk.split('\n\n'):
+            data = [line[len('data: '):] for line in block.split('\n') if line.startswith('data: ')]
+            if data:
+                events.append(json.loads(data[0]))
+        return events
+
+    def _open(self, *features):
+        response = self.client.get(self.live_url, {'ids': ','.join(str(feature.id) for feature in features)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.addCleanup(self._close, response)
+        return response, iter(response.streaming_content)
+
+    def _close(self, response):
+        # Closing fires request_finished, whose close_old_connections would close the
+        # connection mid-transaction on PostgreSQL and break the tests that follow
+        with mock.patch.object(connection, 'close_if_unusable_or_obsolete'):
+            response.close()
+
+    def _next(self, chunks):
+        return self._events(next(chunks).decode())
+
+    def test_stream_starts_with_current_counts(self):
+        Vote.objects.create(user=self.voters[0], feature=self.feature)
+        _, chunks = self._open(self.feature, self.other)
+        self.assertEqual(self._next(chunks), [{str(self.feature.id): 1, str(self.other.id): 0}])
+
+    def test_burst_of_votes_is_coalesced_into_one_event(self):
+        _, chunks = self._open(self.feature)
+        self._next(chunks) # Initial counts
+        for voter in self.voters:
+            Vote.objects.create(user=voter, feature=self.feature)
+        Vote.remove(self.voters[0], self.feature.id)
+        self.assertEqual(self._next(chunks), [{str(self.feature.id): 19}])
+
+    def test_only_subscribed_features_are_sent(self):
+        _, chunks = self._open(self.feature)
+        self._next(chunks)
+        Vote.objects.create(user=self.voters[0], feature=self.other)
+        apply_bulk_votes(self.voters[1].pk, [(self.feature.id, 'upvote'), (self.other.id, 'upvote')])
+        self.assertEqual(self._next(chunks), [{str(self.feature.id): 1}])
+
+    def test_idle_stream_sends_heartbeats(self):
+        with mock.patch.object(live_updates, 'HEARTBEAT_SECONDS', 0.01):
+            _, chunks = self._open(self.feature)
+            self._next(chunks)
+            self.assertEqual(next(chunks).decode(), ': keep-alive\n\n')
+
+    def test_closing_the_stream_unsubscribes(self):
+        response, chunks = self._open(self.feature)
+        self._next(chunks)
+        self.assertEqual(live_updates.hub.subscriber_count(), 1)
+        self._close(response)
+        self.assertEqual(live_updates.hub.subscriber_count(), 0)
+
+    def test_invalid_ids_are_rejected(self):
+        for ids in ['', 'not-a-uuid', ','.join(str(uuid.uuid4()) for _ in range(live_updates.MAX_SUBSCRIBED_IDS + 1))]:
+            response = self.client.get(self.live_url, {'ids': ids})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_asgi_stream_is_sent_incrementally(self):
+        response = await AsyncClient().get(self.live_url, {'ids': str(self.feature.id)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        chunks = asyncio.Queue()
+
+        async def consume():
+            async for chunk in response.streaming_content:
+                await chunks.put(chunk)
+
+        consumer = asyncio.create_task(consume())
+        try:
+            # Each event arrives while the stream is still open (no thread held while waiting)
+            initial = await asyncio.wait_for(chunks.get(), timeout=5)
+            self.assertEqual(self._events(initial.decode()), [{str(self.feature.id): 0}])
+            self.assertEqual(live_updates.hub.subscriber_count(), 1)
+            await sync_to_async(lambda: [Vote.objects.create(user=voter, feature=self.feature) for voter in self.voters[:3]])()
+            counts = []
+            while counts[-1:] != [3]: # The votes may span more than one window
+                update = await asyncio.wait_for(chunks.get(), timeout=5)
+                counts += [event[str(self.feature.id)] for event in self._events(update.decode())]
+            self.assertEqual(counts, sorted(counts))
+        finally:
+            # A client disconnect cancels the response task, as the ASGI handler does
+            with mock.patch.object(connection, 'close_if_unusable_or_obsolete'):
+                consumer.cancel()
+                await asyncio.gather(consumer, return_exceptions=True)
+        self.assertEqual(live_updates.hub.subscriber_count(), 0)
+
+    @skipUnless(get_connection() is not None, 'Publishing goes through Redis pub/sub')
+    @override_settings(LIVE_UPDATES_BROKER='redis')
+    def test_redis_publishes_are_coalesced_per_window(self):
+        with mock.patch.object(live_updates, 'WINDOW_SECONDS', 60):
+            for voter in self.voters[:5]:
+                Vote.objects.create(user=voter, feature=self.feature)
+            Vote.objects.create(user=self.voters[0], feature=self.other)
+            live_updates.publisher._timer.cancel()
+        connection_class = type(get_connection())
+        with mock.patch.object(connection_class, 'publish') as publish:
+            live_updates.publisher.flush()
+        publish.assert_called_once()
+        channel, message = publish.call_args.args
+        self.assertEqual(channel, live_updates.CHANNEL)
+        self.assertEqual(json.loads(message), {'counts': {str(self.feature.id): 5, str(self.other.id): 1}})
+
+class AsyncFeatureViewsTest(TestCase):
+    """
+    Testes das variantes assíncronas (ASGI) de listagem, detalhe, upvote e unvote.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='user1', email='u1@example.com', password='password')
+        self.other = User.objects.create_user(username='user2', email='u2@example.com', password='password')
+        self.features = [
+            Feature.objects.create(title=f'Feature {i}', description='Desc.', created_by=self.user) for i in range(12)
+        ]
+        Vote.objects.create(user=self.user, feature=self.features[-1])
+        Vote.objects.create(user=self.other, feature=self.features[-1])
+        cache.clear()
+        self.token = str(AccessToken.for_user(self.user))
+        self.async_client = AsyncClient()
+        self.auth = {'Authorization': f'Bearer {self.token}'}
+        self.sync_client = APIClient()
+        self.sync_client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def _sync_get(self, url):
+        return json.loads(json.dumps(self.sync_client.get(url).data))
+
+    async def test_list_matches_sync_payload(self):
+        response = await self.async_client.get('/api/async/features/?page=2', headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = await sync_to_async(self._sync_get)('/api/features/?page=2')
+        self.assertEqual(response.json()['results'], expected['results'])
+        self.assertEqual(response.json()['count'], 12)
+        self.assertTrue(response.json()['previous'].endswith('/api/async/features/'))
+        self.assertIsNone(response.json()['next'])
+
+        first_page = (await self.async_client.get('/api/async/features/', headers=self.auth)).json()['results']
+        newest = first_page[0]
+        self.assertEqual((newest['id'], newest['vote_count'], newest['has_voted']), (str(self.features[-1].id), 2, True))
+
+    async def test_retrieve_matches_sync_payload(self):
+        url = f'/api/features/{self.features[-1].id}/'
+        response = await self.async_client.get(f'/api/async{url[4:]}', headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), await sync_to_async(self._sync_get)(url))
+
+        response = await self.async_client.get(f'/api/async/features/{uuid.uuid4()}/', headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_anonymous_reads_and_invalid_tokens(self):
+        response = await AsyncClient().get('/api/async/features/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any(feature['has_voted'] for feature in response.json()['results']))
+
+        response = await AsyncClient().get('/api/async/features/', headers={'Authorization': 'Bearer not-a-token'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_upvote_and_unvote(self):
+        feature = self.features[0]
+        response = await self.async_client.post(f'/api/async/features/{feature.id}/upvote/', headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.json()['feature'], response.json()['vote_count']), (str(feature.id), 1))
+        response = await self.async_client.post(f'/api/async/features/{feature.id}/upvote/', headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = await self.async_client.post(f'/api/async/features/{feature.id}/unvote/', headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = await self.async_client.post(f'/api/async/features/{feature.id}/unvote/', headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(await Vote.objects.filter(feature=feature).acount(), 0)
+
+    async def test_votes_require_authentication_and_an_existing_feature(self):
+        response = await AsyncClient().post(f'/api/async/features/{self.features[0].id}/upvote/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        for action in ('upvote', 'unvote'):
+            response = await self.async_client.post(f'/api/async/features/{uuid.uuid4()}/{action}/', headers=self.auth)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            response = await self.async_client.post(f'/api/async/features/not-a-uuid/{action}/', headers=self.auth)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_list_search_and_ordering_match_sync_payload(self):
+        for query in ('?q=Feature+1', '?ordering=hot', '?status=Open&ordering=new&page=2'):
+            response = await self.async_client.get(f'/api/async/features/{query}', headers=self.auth)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            expected = await sync_to_async(self._sync_get)(f'/api/features/{query}')
+            self.assertEqual(response.json()['results'], expected['results'])
+            self.assertEqual(response.json()['count'], expected['count'])
+
+    async def test_unsupported_list_parameters_are_rejected(self):
+        for query in ('?pagination=cursor', '?cursor=abc', '?ordering=votes'):
+            response = await self.async_client.get(f'/api/async/features/{query}', headers=self.auth)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_has_voted_falls_back_to_the_database_when_redis_fails(self):
+        redis_client.breaker.reset()
+        self.addCleanup(redis_client.breaker.reset)
+        with mock.patch.object(voted_sets, 'alookup', side_effect=redis.ConnectionError):
+            response = await self.async_client.get(f'/api/async/features/{self.features[-1].id}/', headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()['has_voted'])
+
+class BenchmarkHarnessTest(TestCase):
+    """
+    Testes do harness de benchmark (features/benchmark.py) e dos comandos benchmark_api e compare_benchmarks.
+    """
+    def setUp(self):
+        cache.clear()
+        self.dataset = benchmark.seed(users=4, features=6, votes=5)
+
+    def test_seed_creates_the_dataset_with_counters(self):
+        self.assertEqual(len(self.dataset['user_ids']), 4)
+        self.assertEqual(len(self.dataset['feature_ids']), 6)
+        self.assertEqual(Vote.objects.filter(feature_id__in=self.dataset['feature_ids']).count(), 5)
+        self.assertEqual(
+            sum(Feature.objects.filter(pk__in=self.dataset['feature_ids']).values_list('vote_count', flat=True)), 5
+        )
+        benchmark.cleanup(self.dataset)
+        self.assertFalse(get_user_model().objects.filter(username__startswith=self.dataset['prefix']).exists())
+        self.assertFalse(Feature.objects.filter(pk__in=self.dataset['feature_ids']).exists())
+
+    def test_scenarios_succeed_and_report_metrics(self):
+        for scenario in benchmark.SCENARIOS:
+            requests = benchmark.build_requests(scenario, self.dataset, 8)
+            metrics = benchmark.run_scenario(scenario, requests, clients=1)
+            self.assertEqual((scenario, metrics['requests'], metrics['errors']), (scenario, 8, 0))
+            self.assertLessEqual(metrics['p50_ms'], metrics['p95_ms'])
+            self.assertLessEqual(metrics['p95_ms'], metrics['p99_ms'])
+            self.assertGreater(metrics['throughput_rps'], 0)
+            self.assertGreater(metrics['queries_per_request'], 0)
+        # unvote removed exactly the votes upvote cast
+        self.assertEqual(Vote.objects.filter(feature_id__in=self.dataset['feature_ids']).count(), 5)
+
+    def test_upvote_pairs_skip_seeded_votes(self):
+        requests = benchmark.build_requests('upvote', self.dataset, 100)
+        self.assertEqual(len(requests), 4 * 6 - 5)
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        baseline = {'scenarios': {'list': {
+            'errors': 0, 'p50_ms': 10, 'p95_ms': 20, 'p99_ms': 30, 'throughput_rps': 100, 'queries_per_request': 3,
+        }}}
+        within = {'scenarios': {'list': {
+            'errors': 0, 'p50_ms': 12, 'p95_ms': 24, 'p99_ms': 36, 'throughput_rps': 80, 'queries_per_request': 3,
+        }}}
+        self.assertEqual(benchmark.compare(baseline, within), [])
+
+        regressed = {'scenarios': {'list': {
+            'errors': 1, 'p50_ms': 10, 'p95_ms': 30, 'p99_ms': 30, 'throughput_rps': 60, 'queries_per_request': 4,
+        }}}
+        regressions = benchmark.compare(baseline, regressed)
+        self.assertEqual(len(regressions), 4)
+        self.assertTrue(any('p95_ms' in message for message in regressions))
+        self.assertTrue(any('queries_per_request' in message for message in regressions))
+
+    def test_commands_write_and_compare_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            call_command(
+                'benchmark_api', users=3, features=4, votes=2, requests=3, clients=1,
+                scenarios=['list', 'retrieve'], output=path, stdout=StringIO()
+            )
+            with open(path) as results:
+                report = json.load(results)
+            self.assertEqual(set(report['scenarios']), {'list', 'retrieve'})
+            self.assertEqual(report['environment']['database'], connection.vendor)
+
+            out = StringIO()
+            call_command('compare_benchmarks', path, path, stdout=out)
+            self.assertIn('No regressions', out.getvalue())
+
+            report['scenarios']['list']['queries_per_request'] += 1
+            worse = os.path.join(directory, 'current.json')
+            with open(worse, 'w') as results:
+                json.dump(report, results)
+            with self.assertRaises(CommandError):
+                call_command('compare_benchmarks', path, worse, stdout=StringIO())
+
+@override_settings(REQUEST_METRICS_SAMPLE_RATE=1.0)
+class RequestMetricsTest(TestCase):
+    """
+    Testes da instrumentação por requisição (Server-Timing) e do endpoint /metrics.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='user1', email='u1@example.com', password='password')
+        self.feature = Feature.objects.create(title='Feature', description='Desc.', created_by=self.user)
+        cache.clear()
+        metrics.registry.reset()
+
+    def _timings(self, response):
+        """
+        Parses a Server-Timing header into {name: (duration, description)}.
+        """
+        timings = {}
+        for entry in response['Server-Timing'].split(', '):
+            name, *params = entry.split(';')
+            params = dict(param.split('=', 1) for param in params)
+            timings[name] = (float(params['dur']), params.get('desc', '').strip('"'))
+        return timings
+
+    def test_server_timing_counts_queries_and_cache_lookups(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/features/')
+        timings = self._timings(response)
+        self.assertEqual(timings['db'][1], f'{len(queries)} queries')
+        self.assertIn('serialize', timings)
+        self.assertGreaterEqual(timings['total'][0], timings['db'][0])
+
+        # The anonymous list is now in the response cache
+        timings = self._timings(self.client.get('/api/features/'))
+        self.assertEqual(timings['db'][1], '0 queries')
+        self.assertRegex(timings['cache'][1], r'^\d+ ops [1-9]\d*/\d+ hits$')
+
+    def test_redis_commands_are_counted(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(f'/api/features/{self.feature.id}/upvote/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(self._timings(response)['redis'][1], '0 commands')
+
+    @override_settings(THROTTLE_RATES={}) # Only the vote's own updates
+    def test_vote_side_effects_share_one_redis_round_trip(self):
+        # Live counts, leaderboard, voted set, hot score queue and response cache generations
+        self.client.force_authenticate(user=self.user)
+        for action in ('upvote', 'unvote'):
+            response = self.client.post(f'/api/features/{self.feature.id}/{action}/')
+            self.assertLess(response.status_code, 400)
+            self.assertEqual(self._timings(response)['redis'][1], '1 commands')
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_measured(self):
+        self.assertNotIn('Server-Timing', self.client.get('/api/features/'))
+        self.assertNotIn('feature_voting_request_duration_seconds_count', self.client.get('/metrics').content.decode())
+
+    async def test_async_views_are_measured(self):
+        response = await AsyncClient().get('/api/async/features/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+    def test_metrics_endpoint_exposes_histograms(self):
+        self.client.get('/api/features/')
+        self.client.get('/api/features/')
+        self.client.get(f'/api/features/{self.feature.id}/')
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('# TYPE feature_voting_request_duration_seconds histogram', body)
+        self.assertIn('feature_voting_request_duration_seconds_count{view="feature-list",method="GET"} 2', body)
+        self.assertIn('feature_voting_request_db_queries_bucket{view="feature-detail",method="GET",le="+Inf"} 1', body)
+        self.assertIn('feature_voting_cache_hits_total{view="feature-list"}', body)
+        self.assertIn('feature_voting_request_metrics_sample_rate 1', body)
+
+    @override_settings(METRICS_AUTH_TOKEN='scrape-secret')
+    def test_metrics_endpoint_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+def redis_down():
+    """
+    Simulates Redis going away: every command fails to get a connection
+    (patched on the pool class the cache is configured with).
+    """
+    conn = get_connection()
+    pool_class = type(conn.connection_pool) if conn is not None else redis.ConnectionPool
+    return mock.patch.object(pool_class, 'get_connection', side_effect=redis.exceptions.ConnectionError('Redis is down'))
+
+class RedisOutageTest(TestCase):
+    """
+    Testes do contador resiliente: circuit breaker, fallback no banco e replay do journal após uma queda do Redis.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.users = [
+            User.objects.create_user(username=f'user{i}', email=f'u{i}@example.com', password='password') for i in range(12)
+        ]
+        self.features = [
+            Feature.objects.create(title=f'Feature {i}', description='Desc.', created_by=self.users[0]) for i in range(3)
+        ]
+        cache.clear()
+        redis_client.breaker.reset()
+        self.addCleanup(redis_client.breaker.reset)
+
+    def _redis_down(self):
+        return redis_down()
+
+    def _vote(self, user, feature, action):
+        self.client.force_authenticate(user=user)
+        response = self.client.post(f'/api/features/{feature.id}/{action}/')
+        self.client.force_authenticate(user=None)
+        return response
+
+    def _list_counts(self):
+        response = self.client.get('/api/features/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {feature['id']: feature['vote_count'] for feature in response.data['results']}
+
+    def _expected_counts(self):
+        return {str(feature.id): Vote.objects.filter(feature=feature).count() for feature in self.features}
+
+    def test_counts_converge_after_an_outage_mid_load(self):
+        # Load run: every user upvotes a feature, then some switch; Redis dies a third of the way through
+        plan = [(user, self.features[i % 3], 'upvote') for i, user in enumerate(self.users)]
+        plan += [(user, self.features[i % 3], 'unvote') for i, user in enumerate(self.users) if i % 4 == 0]
+        plan += [(user, self.features[(i + 1) % 3], 'upvote') for i, user in enumerate(self.users) if i % 2 == 0]
+        outage = self._redis_down()
+        for index, (user, feature, action) in enumerate(plan):
+            if index == len(plan) // 3:
+                outage.start()
+                self.addCleanup(mock.patch.stopall)
+            if index == 2 * len(plan) // 3:
+                # Reads keep working from the database while Redis is down
+                self.assertEqual(self._list_counts(), self._expected_counts())
+            response = self._vote(user, feature, action)
+            self.assertIn(response.status_code, (status.HTTP_201_CREATED, status.HTTP_204_NO_CONTENT), (index, action))
+        self.assertTrue(redis_client.breaker.is_open)
+        self.assertGreater(CounterJournalEntry.objects.count(), 0)
+        outage.stop()
+
+        # The first request after the reset timeout probes Redis, closes the circuit and replays the journal
+        with mock.patch.object(redis_client, 'RESET_SECONDS', 0):
+            counts = self._list_counts()
+        self.assertFalse(redis_client.breaker.is_open)
+        self.assertFalse(CounterJournalEntry.objects.exists())
+
+        expected = self._expected_counts()
+        self.assertEqual(counts, expected)
+        for feature in self.features:
+            feature.refresh_from_db()
+            self.assertEqual(feature.vote_count, expected[str(feature.id)])
+            self.assertEqual(cache.get(f'feature:{feature.id}:votes'), feature.vote_count)
+        # The leaderboard holds the replayed scores (ties may come in any order)
+        top = leaderboard.top_feature_ids('Open', 3)
+        self.assertCountEqual(top, [feature.id for feature in self.features])
+        scores = [expected[str(feature_id)] for feature_id in top]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+        # Voted sets written before the outage were dropped, so has_voted reflects the outage's votes
+        self.client.force_authenticate(user=self.users[0])
+        has_voted = {feature['id']: feature['has_voted'] for feature in self.client.get('/api/features/').data['results']}
+        for feature in self.features:
+            self.assertEqual(
+                has_voted[str(feature.id)], Vote.objects.filter(user=self.users[0], feature=feature).exists()
+            )
+
+    def test_open_circuit_skips_redis(self):
+        with self._redis_down() as get_connection:
+            for user in self.users[:redis_client.FAILURE_THRESHOLD]:
+                self.assertEqual(self._vote(user, self.features[0], 'upvote').status_code, status.HTTP_201_CREATED)
+            self.assertTrue(redis_client.breaker.is_open)
+            attempts = get_connection.call_count
+            response = self._vote(self.users[-1], self.features[0], 'upvote')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.data['vote_count'], redis_client.FAILURE_THRESHOLD + 1)
+            self.assertEqual(get_connection.call_count, attempts)
+        self.assertEqual(CounterJournalEntry.objects.count(), redis_client.FAILURE_THRESHOLD + 1)
+
+    def test_failed_probe_reopens_the_circuit(self):
+        with self._redis_down():
+            for _ in range(redis_client.FAILURE_THRESHOLD):
+                self._list_counts()
+            self.assertTrue(redis_client.breaker.is_open)
+            with mock.patch.object(redis_client, 'RESET_SECONDS', 0):
+                self._list_counts()
+            self.assertTrue(redis_client.breaker.is_open)
+
+    def test_probe_failing_for_another_reason_lets_the_next_call_probe(self):
+        with self._redis_down():
+            for _ in range(redis_client.FAILURE_THRESHOLD):
+                self._list_counts()
+        self.assertTrue(redis_client.breaker.is_open)
+
+        def broken_call():
+            raise ValueError('not a Redis error')
+
+        with mock.patch.object(redis_client, 'RESET_SECONDS', 0):
+            with self.assertRaises(ValueError):
+                redis_client.guard(broken_call, lambda: None)
+            self.assertTrue(redis_client.breaker.is_open)
+            # Redis is back: the next call probes it and closes the circuit
+            self.assertEqual(redis_client.guard(lambda: 'redis', lambda: 'fallback'), 'redis')
+        self.assertFalse(redis_client.breaker.is_open)
+
+    async def test_cancelled_async_probe_lets_the_next_call_probe(self):
+        for _ in range(redis_client.FAILURE_THRESHOLD):
+            redis_client.breaker.record_failure()
+
+        async def cancelled_call():
+            raise asyncio.CancelledError()
+
+        with mock.patch.object(redis_client, 'RESET_SECONDS', 0):
+            with self.assertRaises(asyncio.CancelledError):
+                await redis_client.aguard(cancelled_call, lambda: None)
+
+            async def call():
+                return 'redis'
+
+            self.assertEqual(await redis_client.aguard(call, lambda: 'fallback'), 'redis')
+        self.assertFalse(redis_client.breaker.is_open)
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=1)
+    def test_metrics_flush_is_kept_for_later(self):
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+        with self._redis_down(), mock.patch.object(metrics, 'FLUSH_INTERVAL_SECONDS', 0):
+            self.assertEqual(self.client.get('/api/features/').status_code, status.HTTP_200_OK)
+        # Buffered during the outage, sent by the first flush once Redis is back
+        with mock.patch.object(redis_client, 'RESET_SECONDS', 0):
+            body = metrics.render()
+        self.assertIn('feature_voting_request_duration_seconds_count{view="feature-list",method="GET"} 1', body)
+
+    def test_authentication_falls_back_to_the_database(self):
+        token = str(AccessToken.for_user(self.users[1]))
+        with self._redis_down():
+            response = self.client.get('/api/users/me/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['username'], 'user1')
+
+    def _top_ids(self, feature_status):
+        response = self.client.get('/api/features/top/', {'status': feature_status})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [feature['id'] for feature in response.data]
+
+    def test_feature_writes_are_journaled_during_an_outage(self):
+        # Built before the outage, so they hold the soon stale entries
+        self.assertEqual(len(self._top_ids('Open')), 3)
+        self.assertEqual(self._top_ids('Planned'), [])
+        self.client.force_authenticate(user=self.users[0])
+        with self._redis_down():
+            created = self.client.post(
+                '/api/features/', {'title': 'Offline drafts', 'description': 'Write drafts without a connection.'}, format='json'
+            )
+            self.assertEqual(created.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(created.data['possible_duplicates'], [])
+            updated = self.client.patch(f'/api/features/{self.features[0].id}/', {'status': 'Planned'}, format='json')
+            self.assertEqual(updated.status_code, status.HTTP_200_OK)
+            deleted = self.client.delete(f'/api/features/{self.features[1].id}/')
+            self.assertEqual(deleted.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Feature.objects.filter(pk=self.features[1].id).exists())
+        self.assertCountEqual(
+            CounterJournalEntry.objects.values_list('feature_id', 'user_id', 'delta'),
+            [(uuid.UUID(created.data['id']), None, 0), (self.features[0].id, None, 0)]
+        )
+        self.client.force_authenticate(user=None)
+
+        # The first request after the reset timeout replays the journal
+        with mock.patch.object(redis_client, 'RESET_SECONDS', 0):
+            self._list_counts()
+        self.assertFalse(CounterJournalEntry.objects.exists())
+        self.assertCountEqual(self._top_ids('Open'), [created.data['id'], str(self.features[2].id)])
+        self.assertEqual(self._top_ids('Planned'), [str(self.features[0].id)])
+        self.assertEqual(
+            [match['id'] for match in duplicates.find_duplicates('Offline drafts', 'Write drafts without a connection.')],
+            [uuid.UUID(created.data['id'])]
+        )
+
+    def test_registration_and_login_during_an_outage(self):
+        with self._redis_down():
+            response = self.client.post(
+                '/api/users/register/', {'username': 'newcomer', 'email': 'new@example.com', 'password': 'password'}, format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            response = self.client.post('/api/token/', {'username': 'newcomer', 'password': 'password'}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = response.data['access']
+        self.assertEqual(
+            self.client.get('/api/users/me/', HTTP_AUTHORIZATION=f'Bearer {token}').data['username'], 'newcomer'
+        )
+
+    def test_revocations_made_during_an_outage_are_written_once_redis_is_back(self):
+        self.addCleanup(authentication._revocations.update, loaded_at=0.0, entries={})
+        deactivated, deleted = self.users[1], self.users[2]
+        token = str(AccessToken.for_user(deactivated))
+        with self._redis_down():
+            deactivated.is_active = False
+            deactivated.save()
+            deleted_id = deleted.pk
+            deleted.delete()
+            # This process rejects the token at once
+            response = self.client.get('/api/users/me/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(get_connection().hexists(authentication.REVOCATIONS_KEY, str(deactivated.pk)))
+
+        # The next reload of the revocation list writes them for the other processes
+        authentication._revocations['loaded_at'] = 0.0
+        self.assertEqual(self.client.get('/api/features/').status_code, status.HTTP_200_OK)
+        self.client.get('/api/users/me/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        for user_id in (deactivated.pk, deleted_id):
+            self.assertTrue(get_connection().hexists(authentication.REVOCATIONS_KEY, str(user_id)))
+        self.assertEqual(authentication._pending_revocations, {})
+
+    def test_recovery_revokes_accounts_deactivated_by_other_processes(self):
+        self.addCleanup(authentication._revocations.update, loaded_at=0.0, entries={})
+        # Deactivated without going through save, as if by a process that couldn't reach Redis
+        User.objects.filter(pk=self.users[3].pk).update(is_active=False)
+        token = str(AccessToken.for_user(self.users[3]))
+        with self._redis_down():
+            for _ in range(redis_client.FAILURE_THRESHOLD):
+                self._list_counts()
+        self.assertTrue(redis_client.breaker.is_open)
+        with mock.patch.object(redis_client, 'RESET_SECONDS', 0):
+            self._list_counts()
+        self.assertFalse(redis_client.breaker.is_open)
+        self.assertTrue(get_connection().hexists(authentication.REVOCATIONS_KEY, str(self.users[3].pk)))
+        # Rejected even on the actions that only read the token's claims
+        response = self.client.post(f'/api/features/{self.features[0].id}/upvote/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_replay_command(self):
+        with self._redis_down():
+            self._vote(self.users[0], self.features[0], 'upvote')
+        self.assertEqual(CounterJournalEntry.objects.count(), 1)
+        with self._redis_down(), self.assertRaises(CommandError):
+            call_command('replay_counter_journal', stdout=StringIO())
+        self.assertEqual(CounterJournalEntry.objects.count(), 1)
+
+        out = StringIO()
+        call_command('replay_counter_journal', stdout=out)
+        self.assertIn('Replayed 1', out.getvalue())
+        self.assertEqual(cache.get(f'feature:{self.features[0].id}:votes'), 1)
+
+class ExportTest(TestCase):
+    """
+    Testes da exportação em streaming de features e votos (endpoint de admin e comando export_votes).
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='password')
+        self.users = [
+            User.objects.create_user(username=f'voter{i}', email=f'voter{i}@example.com', password='password') for i in range(5)
+        ]
+        self.features = [
+            Feature.objects.create(title=f'Feature {i}', description='Line one,\n"quoted"', created_by=self.admin) for i in range(3)
+        ]
+        for i, user in enumerate(self.users):
+            for feature in self.features[:i % 3 + 1]:
+                Vote.objects.create(user=user, feature=feature)
+        cache.clear()
+
+    def _download(self, **params):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/features/export/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b''.join(response.streaming_content)
+
+    def test_features_ndjson_has_vote_counts_aggregated_in_sql(self):
+        response, body = self._download()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('filename="features.ndjson"', response['Content-Disposition'])
+        rows = {row['id']: row for row in map(json.loads, body.decode().splitlines())}
+        self.assertEqual(len(rows), 3)
+        for feature in self.features:
+            row = rows[str(feature.id)]
+            self.assertEqual(row['vote_count'], Vote.objects.filter(feature=feature).count())
+            self.assertEqual(row['created_by'], 'admin')
+            self.assertEqual(row['description'], 'Line one,\n"quoted"')
+
+    def test_keyset_chunks_without_server_side_cursors(self):
+        # As behind PgBouncer: each chunk is its own query instead of a cursor fetch
+        with mock.patch.dict(connection.settings_dict, {'DISABLE_SERVER_SIDE_CURSORS': True}), \
+                CaptureQueriesContext(connection) as queries:
+            chunks = list(export.rows('votes', chunk_size=4))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 1])
+        self.assertEqual(len(queries), 3)
+        ids = [row[0] for chunk in chunks for row in chunk]
+        self.assertEqual(ids, sorted(Vote.objects.values_list('id', flat=True)))
+
+    def test_votes_csv(self):
+        response, body = self._download(dataset='votes', format='csv')
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual(len(rows), Vote.objects.count())
+        self.assertEqual(
+            {(row['feature_id'], int(row['user_id'])) for row in rows},
+            {(str(feature_id), user_id) for feature_id, user_id in Vote.objects.values_list('feature_id', 'user_id')}
+        )
+
+    @skipUnless(export.parquet_available(), 'pyarrow is not installed')
+    def test_parquet_has_one_row_group_per_chunk(self):
+        import pyarrow.parquet as pq
+
+        body = b''.join(export.stream('votes', 'parquet', chunk_size=4))
+        parquet_file = pq.ParquetFile(io.BytesIO(body))
+        self.assertEqual(parquet_file.metadata.num_rows, Vote.objects.count())
+        self.assertEqual(parquet_file.metadata.num_row_groups, -(-Vote.objects.count() // 4))
+        table = parquet_file.read()
+        self.assertEqual(set(table.column('id').to_pylist()), {str(pk) for pk in Vote.objects.values_list('pk', flat=True)})
+
+    def test_export_is_admin_only(self):
+        self.client.force_authenticate(user=self.users[0])
+        self.assertEqual(self.client.get('/api/features/export/').status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get('/api/features/export/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_unknown_dataset(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/features/export/', {'dataset': 'users'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rows_are_fetched_in_chunks(self):
+        chunks = export.stream('votes', 'ndjson', chunk_size=2)
+        with CaptureQueriesContext(connection) as queries:
+            first = next(chunks)
+        self.assertEqual(len(first.splitlines()), 2)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(sum(len(chunk.splitlines()) for chunk in chunks), Vote.objects.count() - 2)
+
+    async def test_asgi_export_is_streamed_chunk_by_chunk(self):
+        produced = []
+        original_rows = export.rows
+
+        def small_chunks(dataset, chunk_size):
+            for chunk in original_rows(dataset, chunk_size=4):
+                produced.append(len(chunk))
+                yield chunk
+
+        token = await sync_to_async(lambda: str(AccessToken.for_user(self.admin)))()
+        with mock.patch.object(export, 'rows', small_chunks):
+            response = await AsyncClient().get(
+                '/api/features/export/', {'dataset': 'votes'}, headers={'Authorization': f'Bearer {token}'}
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.is_async)
+            chunks = aiter(response.streaming_content)
+            first = await anext(chunks)
+            # Sent before the next chunks are read from the database
+            self.assertEqual(len(first.splitlines()), 4)
+            self.assertEqual(produced, [4])
+            rest = [chunk async for chunk in chunks]
+        self.assertEqual(produced, [4, 4, 1])
+        self.assertEqual(sum(len(chunk.splitlines()) for chunk in [first, *rest]), await Vote.objects.acount())
+
+    def test_memory_does_not_grow_with_the_table(self):
+        def peak_memory():
+            tracemalloc.start()
+            try:
+                for _ in export.stream('votes', 'csv', chunk_size=50):
+                    pass
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        feature = self.features[0]
+        extra_users = User.objects.bulk_create([
+            User(username=f'bulk{i}', email=f'bulk{i}@example.com') for i in range(2000)
+        ])
+        Vote.objects.bulk_create([Vote(user=user, feature=feature) for user in extra_users[:200]])
+        small = peak_memory()
+        Vote.objects.bulk_create([Vote(user=user, feature=feature) for user in extra_users[200:]])
+        large = peak_memory()
+        # 10x the rows, about the same peak: only one chunk is held at a time
+        self.assertLess(large, small * 2)
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'votes.ndjson')
+            out = StringIO()
+            call_command('export_votes', '--output', path, '--chunk-size', '3', stdout=out)
+            with open(path) as exported:
+                rows = [json.loads(line) for line in exported]
+        self.assertEqual(len(rows), Vote.objects.count())
+        self.assertIn('Exported votes', out.getvalue())
+
+        out = StringIO()
+        call_command('export_votes', '--dataset', 'features', '--format', 'csv', stdout=out)
+        self.assertEqual(len(list(csv.DictReader(io.StringIO(out.getvalue())))), 3)
+        with self.assertRaises(CommandError):
+            call_command('export_votes', '--format', 'parquet', stdout=StringIO())
+
+class VoteStorageTest(TestCase):
+    """
+    Testes dos ids ordenados no tempo (UUIDv7), dos índices de Vote e do particionamento opcional.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='user1', email='u1@example.com', password='password')
+        self.feature = Feature.objects.create(title='Feature', description='Desc.', created_by=self.user)
+
+    def test_uuid7_is_time_ordered(self):
+        before = int(timezone.now().timestamp() * 1000)
+        ids = [uuid7() for _ in range(5000)] # Many per millisecond, exercising the counter
+        after = int(timezone.now().timestamp() * 1000)
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+        for value in (ids[0], ids[-1]):
+            self.assertEqual(value.version, 7)
+            self.assertEqual(value.variant, uuid.RFC_4122)
+        self.assertGreaterEqual(ids[0].int >> 80, before)
+        self.assertLessEqual(ids[-1].int >> 80, after + 1)
+
+    def test_votes_get_uuid7_ids(self):
+        first = Vote.objects.create(user=self.user, feature=self.feature)
+        second = Vote.objects.create(
+            user=User.objects.create_user(username='user2', email='u2@example.com', password='password'),
+            feature=self.feature
+        )
+        self.assertEqual(first.id.version, 7)
+        self.assertLess(first.id, second.id)
+
+    def test_migration_reissues_uuid4_vote_ids_in_creation_order(self):
+        reissue = importlib.import_module('features.migrations.0009_reissue_vote_ids_as_uuid7')
+        voters = [User.objects.create_user(username=f'voter{i}', password='password') for i in range(5)]
+        start = timezone.now() - timedelta(days=30)
+        for i, voter in enumerate(voters):
+            vote = Vote.objects.create(id=uuid.uuid4(), user=voter, feature=self.feature)
+            Vote.objects.filter(pk=vote.pk).update(created_at=start + timedelta(minutes=i))
+        recent = Vote.objects.create(user=self.user, feature=self.feature)
+
+        with mock.patch.object(reissue, 'BATCH_SIZE', 2), CaptureQueriesContext(connection) as context:
+            reissue.reissue_vote_ids(django_apps, mock.Mock(connection=connection))
+        updates = [query['sql'] for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        # PostgreSQL rewrites each batch of 2 in one statement, SQLite one row at a time
+        self.assertEqual(len(updates), 3 if connection.vendor == 'postgresql' else 5)
+        votes = list(Vote.objects.order_by('created_at'))
+        self.assertEqual(len(votes), 6)
+        self.assertTrue(all(vote.id.version == 7 for vote in votes))
+        self.assertEqual([vote.id for vote in votes], sorted(vote.id for vote in votes))
+        self.assertEqual(votes[0].id.int >> 80, int(start.timestamp() * 1000))
+        self.assertEqual(votes[-1].id, recent.id) # Already time-ordered ids are kept
+
+        # A resumed run reads no reissued ids: its first batch query comes back empty
+        with CaptureQueriesContext(connection) as context:
+            reissue.reissue_vote_ids(django_apps, mock.Mock(connection=connection))
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_vote_indexes(self):
+        # Each foreign key is the leading column of a composite index instead of having its own
+        self.assertFalse(Vote._meta.get_field('user').db_index)
+        self.assertFalse(Vote._meta.get_field('feature').db_index)
+        self.assertIn(('user', 'feature'), Vote._meta.unique_together)
+        (index,) = Vote._meta.indexes
+        self.assertEqual(index.fields, ['feature', 'user'])
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Vote._meta.db_table)
+        self.assertEqual(constraints[index.name]['columns'][:2], ['feature_id', 'user_id'])
+
+    @skipIf(partitioning.is_supported(), 'needs a database without partitioning support')
+    def test_partition_command_requires_postgres(self):
+        with self.assertRaises(CommandError):
+            call_command('partition_votes', stdout=StringIO())
+
+    @skipUnless(partitioning.is_supported(), 'needs PostgreSQL')
+    def test_partition_command_dry_run(self):
+        out = StringIO()
+        call_command('partition_votes', '--partitions', '4', '--dry-run', stdout=out)
+        sql = out.getvalue()
+        self.assertIn('PARTITION BY HASH (feature_id)', sql)
+        self.assertEqual(sql.count('PARTITION OF'), 4)
+        self.assertIn('PRIMARY KEY (id, feature_id)', sql)
+        self.assertFalse(partitioning.is_partitioned())
+
+    def test_storage_benchmark_leaves_no_data(self):
+        votes, users = Vote.objects.count(), User.objects.count()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'votes.json')
+            out = StringIO()
+            call_command(
+                'benchmark_vote_storage', '--votes', '60', '--users', '10', '--features', '8',
+                '--batch-size', '25', '--lookups', '5', '--output', output, stdout=out
+            )
+            with open(output) as result_file:
+                results = json.load(result_file)
+        self.assertEqual(set(results['schemes']), {'uuid4', 'uuid7'})
+        self.assertGreater(results['schemes']['uuid7']['inserts_per_second'], 0)
+        self.assertIn('has-voted median', out.getvalue())
+        self.assertEqual((Vote.objects.count(), User.objects.count()), (votes, users))
+
+class ReadReplicaRoutingTest(TransactionTestCase):
+    """
+    Testes do roteamento de leituras para réplicas (stickiness após escrita e fallback por lag).
+    Sem transação de teste: as réplicas só enxergam dados commitados.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='user1', email='u1@example.com', password='password')
+        self.other = User.objects.create_user(username='user2', email='u2@example.com', password='password')
+        self.feature = Feature.objects.create(title='Feature', description='Desc.', created_by=self.user)
+        cache.clear()
+        db_router._lag_checks.clear()
+        self.addCleanup(db_router._lag_checks.clear)
+
+    def _lags(self, lags):
+        return mock.patch.object(db_router, 'replica_lag', side_effect=lambda alias: lags[alias])
+
+    def test_primary_without_replicas(self):
+        with override_settings(REPLICA_DATABASES=[]):
+            self.assertIsNone(db_router.replica_for(self.user))
+
+    @override_settings(REPLICA_DATABASES=['replica1', 'replica2'], REPLICA_MAX_LAG_SECONDS=5)
+    def test_lagging_replicas_fall_back_to_the_primary(self):
+        with self._lags({'replica1': 30, 'replica2': 0.5}):
+            self.assertEqual(db_router.replica_for(), 'replica2')
+        db_router._lag_checks.clear()
+        with self._lags({'replica1': 30, 'replica2': 8}):
+            self.assertIsNone(db_router.replica_for())
+        db_router._lag_checks.clear()
+        with mock.patch.object(db_router, 'replica_lag', side_effect=DatabaseError('replica is down')):
+            self.assertIsNone(db_router.replica_for())
+
+    @override_settings(REPLICA_DATABASES=['replica1'])
+    def test_lag_is_checked_at_most_once_per_interval(self):
+        with self._lags({'replica1': 0}) as replica_lag:
+            for _ in range(5):
+                self.assertEqual(db_router.replica_for(), 'replica1')
+            self.assertEqual(replica_lag.call_count, 1)
+            with mock.patch.object(db_router, 'LAG_CHECK_SECONDS', 0):
+                db_router.replica_for()
+            self.assertEqual(replica_lag.call_count, 2)
+
+    @override_settings(REPLICA_DATABASES=['replica1'])
+    def test_writers_are_pinned_to_the_primary(self):
+        self.client.force_authenticate(user=self.user)
+        with self._lags({'replica1': 0}):
+            self.assertEqual(db_router.replica_for(self.user), 'replica1')
+            response = self.client.post(f'/api/features/{self.feature.id}/upvote/')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertIsNone(db_router.replica_for(self.user))
+            self.assertEqual(db_router.replica_for(self.other), 'replica1')
+            self.assertEqual(db_router.replica_for(), 'replica1')
+
+            # Failed writes don't pin
+            self.client.force_authenticate(user=self.other)
+            response = self.client.post(f'/api/features/{uuid.uuid4()}/upvote/')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            self.assertEqual(db_router.replica_for(self.other), 'replica1')
+
+    @override_settings(REPLICA_DATABASES=['replica1'])
+    def test_redis_outage_reads_from_the_primary(self):
+        redis_client.breaker.reset()
+        self.addCleanup(redis_client.breaker.reset)
+        with self._lags({'replica1': 0}), redis_down():
+            # The pin can't be checked, so authenticated reads stay on the primary
+            self.assertIsNone(db_router.replica_for(self.user))
+            self.assertEqual(db_router.replica_for(), 'replica1')
+
+    @override_settings(REPLICA_DATABASES=['replica1'])
+    def test_open_transactions_read_from_the_primary(self):
+        with self._lags({'replica1': 0}):
+            with transaction.atomic():
+                self.assertIsNone(db_router.replica_for())
+            self.assertEqual(db_router.replica_for(), 'replica1')
+
+    def test_router(self):
+        router = db_router.ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Feature))
+        with db_router.reading_from('replica1'):
+            self.assertEqual(router.db_for_read(Feature), 'replica1')
+            self.assertEqual(router.db_for_write(Feature), 'default')
+        self.assertIsNone(router.db_for_read(Feature))
+        with override_settings(REPLICA_DATABASES=['replica1']):
+            self.assertFalse(router.allow_migrate('replica1', 'features'))
+            self.assertTrue(router.allow_migrate('default', 'features'))
+
+    @skipUnless(settings.REPLICA_DATABASES, 'set FEATURE_VOTING_REPLICA_HOSTS to run against a replica')
+    def test_list_and_retrieve_read_from_the_replica(self):
+        replica = settings.REPLICA_DATABASES[0]
+        self.client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connections[replica]) as replica_queries, \
+                CaptureQueriesContext(connection) as primary_queries:
+            self.assertEqual(self.client.get('/api/features/').status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(f'/api/features/{self.feature.id}/').status_code, status.HTTP_200_OK)
+        self.assertGreater(len(replica_queries), 0)
+        self.assertEqual(len(primary_queries), 0)
+
+        self.client.post(f'/api/features/{self.feature.id}/upvote/')
+        with CaptureQueriesContext(connections[replica]) as replica_queries:
+            response = self.client.get(f'/api/features/{self.feature.id}/')
+        self.assertEqual(len(replica_queries), 0)
+        self.assertTrue(response.data['has_voted'])
+
+class ConnectionHandlingTest(TransactionTestCase):
+    """
+    Testes dos modos de conexão (por requisição, persistente, pool) e do comando benchmark_connections.
+    """
+    databases = '__all__' # List requests may read from a configured replica
+    def setUp(self):
+        cache.clear()
+        self.dataset = benchmark.seed(users=3, features=4, votes=2)
+
+    def test_modes_set_the_connection_lifetime_and_restore_it(self):
+        saved = dict(connection.settings_dict)
+        with benchmark.connection_mode('persistent', max_age=30):
+            self.assertEqual(connection.settings_dict['CONN_MAX_AGE'], 30)
+            self.assertTrue(connection.settings_dict['CONN_HEALTH_CHECKS'])
+        with benchmark.connection_mode('per-request'):
+            self.assertEqual(connection.settings_dict['CONN_MAX_AGE'], 0)
+        self.assertEqual(connection.settings_dict, saved)
+        with self.assertRaises(ValueError):
+            with benchmark.connection_mode('sometimes'):
+                pass
+
+    def test_per_request_mode_drops_idle_redis_connections(self):
+        pool = get_connection().connection_pool
+        requests = benchmark.build_requests('list', self.dataset, 3)
+        for mode, disconnects in (('persistent', 0), ('per-request', 3)):
+            with mock.patch.object(pool, 'disconnect') as disconnect, \
+                    benchmark.connection_mode(mode) as after_request:
+                metrics = benchmark.run_scenario('list', requests, clients=1, after_request=after_request)
+            self.assertEqual((mode, metrics['errors'], disconnect.call_count), (mode, 0, disconnects))
+
+    @skipUnless(connection.vendor == 'postgresql', 'connection pools need PostgreSQL')
+    def test_pool_mode(self):
+        if not benchmark.pool_available():
+            self.skipTest('psycopg 3 and psycopg_pool are not installed')
+        requests = benchmark.build_requests('retrieve', self.dataset, 4)
+        with benchmark.connection_mode('pool') as after_request:
+            self.assertIn('pool', connection.settings_dict['OPTIONS'])
+            metrics = benchmark.run_scenario('retrieve', requests, clients=2, after_request=after_request)
+        self.assertEqual(metrics['errors'], 0)
+        self.assertNotIn('pool', connection.settings_dict['OPTIONS'])
+
+    def test_command_compares_modes(self):
+        benchmark.cleanup(self.dataset)
+        output = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'connections.json')
+            call_command(
+                'benchmark_connections', users=3, features=4, votes=2, requests=3, clients=1,
+                scenarios=['list', 'upvote', 'unvote'], modes=['per-request', 'persistent'], output=path, stdout=output
+            )
+            with open(path) as results:
+                report = json.load(results)
+        self.assertEqual(list(report['modes']), ['per-request', 'persistent'])
+        for scenarios in report['modes'].values():
+            self.assertEqual({scenario: result['errors'] for scenario, result in scenarios.items()}, {'list': 0, 'upvote': 0, 'unvote': 0})
+        self.assertIn('faster than per-request', output.getvalue())
+        self.assertFalse(Feature.objects.exists())
+
+class ThrottlingTest(TestCase):
+    """
+    Testes do throttling por token bucket (voto, cadastro e login), no Redis e no fallback em processo.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='user1', email='u1@example.com', password='password')
+        self.other = User.objects.create_user(username='user2', email='u2@example.com', password='password')
+        self.features = [
+            Feature.objects.create(title=f'Feature {i}', description='Desc.', created_by=self.user) for i in range(2)
+        ]
+        cache.clear()
+        throttling.local_buckets.clear()
+        redis_client.breaker.reset()
+        self.addCleanup(redis_client.breaker.reset)
+
+    def _vote(self, user, feature, action='upvote'):
+        self.client.force_authenticate(user=user)
+        return self.client.post(f'/api/features/{feature.id}/{action}/')
+
+    @override_settings(THROTTLE_RATES={'vote': {'user': '3/min'}})
+    def test_vote_toggling_is_limited_per_user(self):
+        for action in ('upvote', 'unvote', 'upvote'):
+            self.assertLess(self._vote(self.user, self.features[0], action).status_code, 400)
+        response = self._vote(self.user, self.features[0], 'unvote')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # The throttled unvote never reached the database
+        self.assertTrue(Vote.objects.filter(user=self.user, feature=self.features[0]).exists())
+
+        self.assertEqual(self._vote(self.other, self.features[0]).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.get('/api/features/').status_code, status.HTTP_200_OK) # Reads aren't throttled
+
+    @override_settings(THROTTLE_RATES={'vote': {'user': '5/min', 'feature': '1/min'}})
+    def test_vote_limits_per_feature_and_all_or_nothing(self):
+        self.assertEqual(self._vote(self.user, self.features[0]).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._vote(self.other, self.features[0]).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self._vote(self.other, self.features[1]).status_code, status.HTTP_201_CREATED)
+
+        # A rejected request takes no token from its other buckets
+        buckets = [('throttle:test:a', 2, 1 / 60), ('throttle:test:b', 1, 1 / 60)]
+        self.assertEqual(throttling.take(buckets), 0)
+        self.assertGreater(throttling.take(buckets), 0)
+        self.assertEqual(throttling.take(buckets[:1]), 0)
+        self.assertGreater(throttling.take(buckets[:1]), 0)
+
+    def test_buckets_refill_over_time(self):
+        buckets = [('throttle:test:refill', 2, 1 / 30)] # 2 per minute
+        with mock.patch.object(throttling.time, 'time', return_value=1000.0):
+            self.assertEqual(throttling.take(buckets), 0)
+            self.assertEqual(throttling.take(buckets), 0)
+            self.assertAlmostEqual(throttling.take(buckets), 30)
+        with mock.patch.object(throttling.time, 'time', return_value=1015.0):
+            self.assertAlmostEqual(throttling.take(buckets), 15)
+        with mock.patch.object(throttling.time, 'time', return_value=1030.0):
+            self.assertEqual(throttling.take(buckets), 0)
+            self.assertGreater(throttling.take(buckets), 0)
+
+    @override_settings(THROTTLE_RATES={'register': {'ip': '2/hour'}})
+    def test_registration_is_limited_per_ip(self):
+        def register(index, address):
+            return self.client.post('/api/users/register/', {
+                'username': f'new{index}', 'email': f'new{index}@example.com', 'password': 'password123',
+            }, REMOTE_ADDR=address)
+
+        self.assertEqual(register(1, '10.0.0.1').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(register(2, '10.0.0.1').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(register(3, '10.0.0.1').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(User.objects.filter(username='new3').exists())
+        self.assertEqual(register(4, '10.0.0.2').status_code, status.HTTP_201_CREATED)
+
+    @override_settings(THROTTLE_RATES={'register': {'ip': '2/hour'}})
+    def test_spoofed_forwarded_for_shares_the_client_bucket(self):
+        def register(index, forwarded_for, **extra):
+            return self.client.post('/api/users/register/', {
+                'username': f'new{index}', 'email': f'new{index}@example.com', 'password': 'password123',
+            }, REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=forwarded_for, **extra)
+
+        self.assertEqual(register(1, '203.0.113.1').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(register(2, '203.0.113.2').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(register(3, '203.0.113.3').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Behind one trusted proxy, the address it appended is the client's
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            self.assertEqual(register(4, 'spoofed, 203.0.113.4').status_code, status.HTTP_201_CREATED)
+            self.assertEqual(register(5, 'spoofed, 203.0.113.4').status_code, status.HTTP_201_CREATED)
+            self.assertEqual(register(6, 'other, 203.0.113.4').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(THROTTLE_RATES={'token': {'username': '2/min'}})
+    def test_logins_are_limited_per_targeted_account(self):
+        for password in ('wrong', 'wrong'):
+            response = self.client.post('/api/token/', {'username': 'user1', 'password': password})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        # Even the right password waits, whatever the username's case
+        response = self.client.post('/api/token/', {'username': 'User1', 'password': 'password'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        response = self.client.post('/api/token/', {'username': 'user2', 'password': 'password'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(THROTTLE_RATES={'token': {'username': '2/min'}})
+    def test_failed_logins_elsewhere_do_not_lock_the_owner_out(self):
+        for _ in range(3):
+            response = self.client.post('/api/token/', {'username': 'user1', 'password': 'wrong'}, REMOTE_ADDR='198.51.100.7')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        response = self.client.post('/api/token/', {'username': 'user1', 'password': 'password'}, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(THROTTLE_RATES={'vote': {'user': '2/min'}})
+    def test_redis_outage_falls_back_to_process_buckets(self):
+        with redis_down():
+            self.assertEqual(self._vote(self.user, self.features[0]).status_code, status.HTTP_201_CREATED)
+            self.assertEqual(self._vote(self.user, self.features[1]).status_code, status.HTTP_201_CREATED)
+            self.assertEqual(self._vote(self.user, self.features[0], 'unvote').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(Vote.objects.filter(user=self.user).count(), 2)
+
+    @override_settings(THROTTLE_RATES={'vote': {'user': '1/min'}})
+    async def test_async_votes_are_throttled(self):
+        client = AsyncClient()
+        auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        response = await client.post(f'/api/async/features/{self.features[0].id}/upvote/', headers=auth)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = await client.post(f'/api/async/features/{self.features[0].id}/unvote/', headers=auth)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        # Anonymous requests still get their 401
+        response = await client.post(f'/api/async/features/{self.features[0].id}/unvote/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
@@ -0,0 +1,217 @@
+# features/throttling.py
+"""
+Abuse throttling for votes, registration and login (token) requests.
+
+Each action has token buckets per scope, configured in settings.THROTTLE_RATES
+(e.g. votes per user, per client IP and per feature). A 'N/period' bucket
+holds up to N tokens and refills continuously at N per period, so short
+bursts pass and sustained traffic is held to the rate. A request takes one
+token from each of its buckets, or from none of them when any is empty; it
+is then answered 429 with the seconds until a token is back (Retry-After).
+
+All of a request's buckets are checked and updated by one Lua script, i.e.
+one atomic round trip. Without Redis the same buckets are kept in the
+process' cache (e.g. locmem), and while Redis is unavailable in process
+memory, so limits then apply per process.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+from .redis_client import aguard, breaker, get_connection, guard, run_script
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+LOCAL_MAX_BUCKETS = 10000 # Per process; the least recently used buckets are dropped beyond it
+
+# KEYS: bucket keys. ARGV: now, then capacity and tokens per second of each bucket.
+# Returns the seconds to wait as a string (Lua numbers are truncated in integer replies), '0' once taken.
+_TAKE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', key, 'tokens', 'at')
+    local tokens = tonumber(bucket[1]) or capacity
+    local at = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - at) * rate)
+    levels[i] = tokens
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) / rate)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', key, 'tokens', levels[i] - 1, 'at', now)
+    -- A bucket left alone this long is full again, same as a missing one
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))
+end
+return '0'
+"""
+
+def parse_rate(rate):
+    """
+    Parses 'requests/period' (period: s, m, h or d, e.g. '30/min') into (capacity, tokens per second).
+    """
+    count, period = rate.split('/')
+    return int(count), int(count) / PERIODS[period[0]]
+
+def _ip(request, feature_id):
+    # REMOTE_ADDR, or the client address trusted proxies put in X-Forwarded-For (NUM_PROXIES)
+    return BaseThrottle().get_ident(request)
+
+def _username(request, feature_id):
+    """
+    The account a login attempt targets, from the attempt's client IP: attempts
+    from elsewhere can't use up its owner's bucket and lock them out.
+    """
+    data = getattr(request, 'data', None)
+    username = data.get('username') if hasattr(data, 'get') else None
+    if not isinstance(username, str) or not username.strip():
+        return None
+    return f'{username.strip().lower()}:{_ip(request, feature_id)}'
+
+# scope -> identity of the request in that scope (None: the scope doesn't apply)
+SCOPES = {
+    'user': lambda request, feature_id: request.user.pk if request.user.is_authenticated else None,
+    'ip': _ip,
+    'feature': lambda request, feature_id: feature_id,
+    'username': _username,
+}
+
+def get_buckets(action, request, feature_id=None):
+    """
+    The request's buckets for an action, as [(key, capacity, tokens per second)].
+    """
+    buckets = []
+    for scope, rate in getattr(settings, 'THROTTLE_RATES', {}).get(action, {}).items():
+        ident = SCOPES[scope](request, feature_id) if rate else None
+        if ident is not None:
+            buckets.append((f'throttle:{action}:{scope}:{ident}', *parse_rate(rate)))
+    return buckets
+
+class LocalBuckets:
+    """
+    Token buckets in process memory, used while Redis is unavailable. The same
+    algorithm as _TAKE_SCRIPT, made atomic by a lock.
+    """
+    def __init__(self, max_buckets=LOCAL_MAX_BUCKETS):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict() # key -> (tokens, updated at)
+        self.max_buckets = max_buckets
+
+    def _load(self, keys):
+        return {key: self._buckets[key] for key in keys if key in self._buckets}
+
+    def _save(self, states):
+        """
+        states: [(key, (tokens, updated at), seconds until the bucket is full again)].
+        """
+        for key, state, _ in states:
+            self._buckets[key] = state
+            self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+
+    def take(self, buckets, now):
+        with self._lock:
+            stored = self._load([key for key, _, _ in buckets])
+            levels = []
+            wait = 0
+            for key, capacity, rate in buckets:
+                tokens, at = stored.get(key, (capacity, now))
+                tokens = min(capacity, tokens + max(0, now - at) * rate)
+                levels.append(tokens)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / rate)
+            if wait:
+                return wait
+            self._save([
+                (key, (tokens - 1, now), capacity / rate) for (key, capacity, rate), tokens in zip(buckets, levels)
+            ])
+            return 0
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+class CacheBuckets(LocalBuckets):
+    """
+    Token buckets in a cache that isn't Redis (e.g. locmem), so they expire and
+    are cleared with it. Only atomic within the process, like the cache itself.
+    """
+    def _load(self, keys):
+        return cache.get_many(keys)
+
+    def _save(self, states):
+        for key, state, timeout in states:
+            cache.set(key, state, timeout=timeout)
+
+local_buckets = LocalBuckets()
+cache_buckets = CacheBuckets()
+# Buckets counted during an outage don't carry over once Redis is back
+breaker.add_recovery_hook(local_buckets.clear)
+
+def _script_arguments(buckets, now):
+    keys = [key for key, _, _ in buckets]
+    args = [now] + [value for _, capacity, rate in buckets for value in (capacity, rate)]
+    return keys, args
+
+def take(buckets):
+    """
+    Takes a token from every bucket, all or nothing.
+    Returns 0 when taken, otherwise the seconds until the request would pass.
+    """
+    if not buckets:
+        return 0
+    now = time.time()
+    if get_connection() is None:
+        return cache_buckets.take(buckets, now)
+    keys, args = _script_arguments(buckets, now)
+    return guard(lambda: float(run_script(_TAKE_SCRIPT, keys, args)), lambda: local_buckets.take(buckets, now))
+
+async def atake(buckets):
+    """
+    Async variant of take, on the asyncio Redis client.
+    """
+    from .async_redis import get_async_connection # Local import, only the async views need it
+
+    if not buckets:
+        return 0
+    conn = get_async_connection()
+    if conn is None:
+        return await sync_to_async(take)(buckets)
+    now = time.time()
+    keys, args = _script_arguments(buckets, now)
+
+    async def take_from_redis():
+        return float(await conn.eval(_TAKE_SCRIPT, len(keys), *keys, *args))
+
+    return await aguard(take_from_redis, lambda: local_buckets.take(buckets, now))
+
+class ActionThrottle(BaseThrottle):
+    """
+    Throttles the requests of the view's throttle_action: an action name, or a
+    dict mapping viewset actions to action names (unmapped actions pass).
+    """
+    def allow_request(self, request, view):
+        action = getattr(view, 'throttle_action', None)
+        if isinstance(action, dict):
+            action = action.get(getattr(view, 'action', None))
+        if action is None:
+            return True
+        self._wait = take(get_buckets(action, request, view.kwargs.get('pk')))
+        return not self._wait
+
+    def wait(self):
+        return self._wait
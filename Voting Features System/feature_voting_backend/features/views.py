@@ -2,25 +2,48 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny, SAFE_METHODS
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.shortcuts import get_object_or_404
+from django.http import Http404, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.db import IntegrityError # For handling unique constraints
 
 from .models import Feature, Vote
-from .serializers import FeatureSerializer, VoteSerializer, UserSerializer, UserRegisterSerializer, CustomTokenObtainPairSerializer
+from . import counter_journal, db_router, duplicates, export, leaderboard, live_updates, response_cache, rollups, search, vote_queue
+from .throttling import ActionThrottle
+from .pagination import FeatureCursorPagination
+from .redis_client import guard
+from .renderers import CSVRenderer, EventStreamRenderer, NDJSONRenderer, ParquetRenderer
+from .bulk_votes import apply_bulk_votes
+from .serializers import FeatureSerializer, VoteSerializer, VoteResultSerializer, BulkVoteSerializer, UserSerializer, UserRegisterSerializer, CustomTokenObtainPairSerializer
 from users.models import CustomUser # Import your custom user model
+import uuid
+
+TOP_FEATURES_DEFAULT_LIMIT = 10
+TOP_FEATURES_MAX_LIMIT = 100
+# ?ordering= modes of the feature list; the default is newest first (Feature.Meta.ordering)
+FEATURE_LIST_ORDERINGS = {
+    'new': ('-created_at', '-id'),
+    'hot': ('-hot_score', '-created_at', '-id'),
+}
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     """
     Custom JWT login view that uses our CustomTokenObtainPairSerializer.
     """
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [ActionThrottle]
+    throttle_action = 'token' # Password checks are expensive; also slows down credential stuffing
 
 class UserViewSet(viewsets.ViewSet):
     """
     A simple ViewSet for user registration and retrieving the current user's profile.
     """
+    throttle_classes = [ActionThrottle]
+    throttle_action = {'register': 'register'} # Viewset action -> THROTTLE_RATES action
     # Permissions are set per action for granularity
     def get_permissions(self):
         if self.action == 'register':
@@ -53,7 +76,9 @@ class UserViewSet(viewsets.ViewSet):
         """
         Retrieves the profile of the currently authenticated user.
         """
-        serializer = UserSerializer(request.user)
+        # Authentication only loads a few fields of the user, the profile is read here
+        user = CustomUser.objects.get(pk=request.user.pk) if request.user.is_authenticated else request.user
+        serializer = UserSerializer(user)
         return Response(serializer.data)
 
     # You could add 'update_profile' or 'change_password' actions here if needed
@@ -63,19 +88,122 @@ class FeatureViewSet(viewsets.ModelViewSet):
     A ViewSet for viewing and editing features.
     Provides list, retrieve, create, update, delete, upvote, and unvote actions.
     """
-    queryset = Feature.objects.all()
+    # select_related avoids one extra query per feature for the nested creator
+    queryset = Feature.objects.select_related('created_by')
+    if search.USE_POSTGRES_SEARCH:
+        queryset = queryset.defer('search_vector') # Only read inside SQL, never serialized
     serializer_class = FeatureSerializer
+    # Actions that only need the token claims (see users.authentication.CachedJWTAuthentication)
+    stateless_auth_actions = ('list', 'retrieve', 'top', 'trend', 'live', 'upvote', 'unvote')
+    throttle_classes = [ActionThrottle]
+    # Scripted vote toggling loads both the database and the Redis counters
+    throttle_action = {'upvote': 'vote', 'unvote': 'vote'}
+
+    @property
+    def paginator(self):
+        """
+        Page-number pagination by default; keyset pagination when the client
+        opts in with ?pagination=cursor. Search results (?q=) and ?ordering=hot are
+        ordered by scores that have no stable keyset, so they always use page numbers.
+        """
+        if not hasattr(self, '_paginator'):
+            if (
+                self.request is not None
+                and FeatureCursorPagination.is_requested(self.request)
+                and not self._search_query()
+                and self.request.query_params.get('ordering', 'new') == 'new'
+            ):
+                self._paginator = FeatureCursorPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
+    def get_queryset(self):
+        """
+        Supports filtering the feature list by status, e.g. ?status=Open,
+        full-text search over titles and descriptions, e.g. ?q=dark+mode,
+        and ordering by time-decayed popularity with ?ordering=hot.
+        """
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        feature_status = self.request.query_params.get('status')
+        if feature_status:
+            queryset = queryset.filter(status=feature_status)
+        query = self._search_query()
+        if query:
+            queryset = search.search(queryset, query)
+        ordering = self.request.query_params.get('ordering')
+        if ordering:
+            if ordering not in FEATURE_LIST_ORDERINGS:
+                raise ValidationError({'ordering': f"Must be one of: {', '.join(FEATURE_LIST_ORDERINGS)}."})
+            queryset = queryset.order_by(*FEATURE_LIST_ORDERINGS[ordering])
+        return queryset
+
+    def _search_query(self):
+        return self.request.query_params.get('q', '').strip()
+
+    def list(self, request, *args, **kwargs):
+        feature_status = request.query_params.get('status')
+        statuses = [feature_status] if feature_status else None
+        # Served from a read replica unless the user just wrote (see features/db_router.py)
+        with db_router.reading_from(db_router.replica_for(request.user)):
+            return self._cached_response(request, statuses, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        # The feature's status is unknown until it is loaded, so every status generation applies
+        with db_router.reading_from(db_router.replica_for(request.user)):
+            return self._cached_response(request, None, super().retrieve, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """
+        Keeps the reads of a user who just wrote (voted, created or edited a
+        feature) on the primary for a while, so they see their own writes.
+        """
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method not in SAFE_METHODS and response.status_code < 400 and request.user.is_authenticated:
+            db_router.pin_to_primary(request.user.pk)
+        return response
+
+    def _cached_response(self, request, statuses, render, *args, **kwargs):
+        """
+        Serves anonymous list/retrieve requests from the response cache, with
+        ETag/If-None-Match support. Authenticated requests are never cached
+        because they carry per-user fields (has_voted). While Redis is
+        unavailable responses are rendered uncached.
+        """
+        if request.user.is_authenticated or not response_cache.is_enabled():
+            return render(request, *args, **kwargs)
+
+        key = guard(lambda: response_cache.build_key(request, statuses), lambda: None)
+        entry = guard(lambda: response_cache.get(key), lambda: None) if key is not None else None
+        if entry is None:
+            response = render(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK or key is None:
+                return response
+            entry = guard(
+                lambda: response_cache.store(key, response.data),
+                lambda: response_cache.make_entry(response.data)
+            )
+
+        headers = {'ETag': entry['etag'], 'Vary': 'Authorization'}
+        if request.headers.get('If-None-Match') == entry['etag']:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(entry['data'], headers=headers)
 
     def get_permissions(self):
         """
         Set permissions based on the action.
-        - list/retrieve (view features): AllowAny (publicly accessible)
+        - list/retrieve/top/trend/live (view features): AllowAny (publicly accessible)
         - create (post feature): IsAuthenticated (only logged-in users)
         - update/partial_update/destroy (edit/delete feature): IsAuthenticated (and potentially IsOwner or IsAdmin)
-        - upvote/unvote: IsAuthenticated
+        - upvote/unvote/bulk_vote: IsAuthenticated (bulk_vote for another user: admins only)
+        - cache_stats/export_data: IsAdminUser
         """
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'top', 'trend', 'live']:
             permission_classes = [AllowAny]
+        elif self.action in ['cache_stats', 'export_data']:
+            permission_classes = [IsAdminUser]
         elif self.action in ['create', 'upvote', 'unvote']:
             permission_classes = [IsAuthenticated]
         elif self.action in ['update', 'partial_update', 'destroy']:
@@ -95,24 +223,211 @@ class FeatureViewSet(viewsets.ModelViewSet):
             permission_classes = [IsAuthenticated] # Default for any other custom action
         return [permission() for permission in permission_classes]
 
+    def create(self, request, *args, **kwargs):
+        """
+        Creates the feature and lists likely duplicates of it (possible_duplicates),
+        so clients can suggest voting on an existing feature instead.
+        """
+        response = super().create(request, *args, **kwargs)
+        response.data['possible_duplicates'] = self.possible_duplicates
+        return response
+
     def perform_create(self, serializer):
         """
         When creating a feature, automatically set the 'created_by' to the current user.
         """
-        serializer.save(created_by=self.request.user)
+        # Checked before saving, so the new feature doesn't match itself (skipped while Redis is unavailable)
+        self.possible_duplicates = guard(
+            lambda: duplicates.find_duplicates(serializer.validated_data['title'], serializer.validated_data['description']),
+            lambda: []
+        )
+        # By id: the response then reads the creator's profile from the database, not the partly loaded request.user
+        feature = serializer.save(created_by_id=self.request.user.pk)
+
+        def propagate():
+            leaderboard.add_feature(feature.pk, feature.status)
+            duplicates.add_feature(feature.pk, feature.title, feature.description, feature.status)
+            response_cache.bump([feature.status])
+
+        self._propagate_edit(feature.pk, propagate)
+
+    def perform_update(self, serializer):
+        """
+        Keeps the leaderboard, the duplicate index and the response cache in step when a feature changes.
+        """
+        instance = serializer.instance
+        old = (instance.title, instance.description, instance.status)
+        feature = serializer.save()
+
+        def propagate():
+            if feature.status != old[2]:
+                leaderboard.move_feature(feature.pk, old[2], feature.status)
+            duplicates.update_feature(feature.pk, old, (feature.title, feature.description, feature.status))
+            response_cache.bump({old[2], feature.status})
+
+        self._propagate_edit(feature.pk, propagate)
+
+    def perform_destroy(self, instance):
+        feature_id, title, description, feature_status = instance.pk, instance.title, instance.description, instance.status
+        instance.delete()
+
+        def propagate():
+            leaderboard.remove_feature(feature_id, feature_status)
+            duplicates.remove_feature(feature_id, title, description)
+            response_cache.bump([feature_status])
+
+        # Nothing to journal while Redis is unavailable (the entry would go with the feature): top drops
+        # stale leaderboard members, duplicate lookups only return existing features, and every
+        # status' cached responses are invalidated once Redis is back
+        guard(propagate, lambda: None)
+
+    def _propagate_edit(self, feature_id, propagate):
+        """
+        Runs the Redis side of a committed feature write. While Redis is
+        unavailable the edit is journaled instead (see features/counter_journal.py).
+        """
+        guard(propagate, lambda: counter_journal.record([(feature_id, None, 0)]))
+
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, request):
+        """
+        Hit/miss counters of the anonymous response cache (admins only).
+        """
+        return Response(response_cache.stats())
+
+    @action(detail=False, methods=['get'], url_path='export', renderer_classes=[NDJSONRenderer, CSVRenderer, ParquetRenderer])
+    def export_data(self, request):
+        """
+        Streams a whole table for analytics (admins only), e.g.
+        /api/features/export/?dataset=votes&format=csv. dataset is features
+        (with their vote counts) or votes; format is ndjson (default), csv or
+        parquet. See features/export.py.
+        """
+        dataset = request.query_params.get('dataset', 'features')
+        export_format = request.accepted_renderer.format
+        try:
+            # As for live: an async iterator on ASGI, which would otherwise buffer the whole export
+            chunks = (export.astream if isinstance(request._request, ASGIRequest) else export.stream)(dataset, export_format)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(chunks, content_type=export.FORMATS[export_format][0])
+        response['Content-Disposition'] = f'attachment; filename="{export.filename(dataset, export_format)}"'
+        return response
+
+    @action(detail=False, methods=['get'], url_path='top')
+    def top(self, request):
+        """
+        Returns the top-voted features for a status, e.g. /api/features/top/?status=Open&limit=50.
+        Served from the Redis sorted-set leaderboard instead of scanning every feature.
+        """
+        feature_status = request.query_params.get('status', 'Open')
+        if feature_status not in dict(Feature.STATUS_CHOICES):
+            return Response(
+                {'detail': f'Invalid status: {feature_status}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = int(request.query_params.get('limit', TOP_FEATURES_DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'detail': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, TOP_FEATURES_MAX_LIMIT))
+
+        feature_ids = leaderboard.top_feature_ids(feature_status, limit)
+        features_by_id = self.get_queryset().in_bulk(feature_ids)
+        features = []
+        for feature_id in feature_ids:
+            feature = features_by_id.get(feature_id)
+            if feature is None:
+                # Deleted without going through the API (e.g. cascades); drop the stale member
+                leaderboard.remove_feature(feature_id, feature_status)
+            else:
+                features.append(feature)
+        serializer = self.get_serializer(features, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='live', renderer_classes=[EventStreamRenderer, JSONRenderer])
+    def live(self, request):
+        """
+        Server-sent events with the vote counts of the given features, e.g.
+        /api/features/live/?ids=<uuid>,<uuid>. Sends the current counts first, then
+        the changed counts at most once per 250 ms window, so clients no longer
+        need to poll the list.
+        """
+        raw_ids = [raw_id for raw_id in request.query_params.get('ids', '').split(',') if raw_id]
+        if not raw_ids or len(raw_ids) > live_updates.MAX_SUBSCRIBED_IDS:
+            return Response(
+                {'detail': f'ids must list between 1 and {live_updates.MAX_SUBSCRIBED_IDS} feature ids.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            feature_ids = {uuid.UUID(raw_id) for raw_id in raw_ids}
+        except ValueError:
+            return Response({'detail': 'ids must be feature UUIDs.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        def load_counts():
+            return Feature.get_vote_counts(Feature.objects.filter(pk__in=feature_ids).only('pk', 'vote_count'))
+
+        # Under ASGI an async iterator keeps the open stream off the worker threads
+        # (Django would otherwise buffer a sync one in full before sending it)
+        stream = live_updates.astream if isinstance(request._request, ASGIRequest) else live_updates.stream
+        response = StreamingHttpResponse(
+            stream(feature_ids, load_counts),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no' # Disable proxy buffering (nginx)
+        return response
+
+    @action(detail=True, methods=['get'], url_path='trend')
+    def trend(self, request, pk=None):
+        """
+        Votes and unvotes per bucket for a feature's trend chart, e.g.
+        /api/features/{id}/trend/?bucket=day&periods=30. Served from the rollups
+        maintained by the rollup_votes job, so the cost is bounded by the number
+        of buckets rather than the number of votes.
+        """
+        bucket = request.query_params.get('bucket', 'day')
+        if bucket not in rollups.BUCKETS:
+            return Response(
+                {'detail': f"bucket must be one of: {', '.join(rollups.BUCKETS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        _, _, _, default_periods, max_periods = rollups.BUCKETS[bucket]
+        try:
+            periods = int(request.query_params.get('periods', default_periods))
+        except ValueError:
+            return Response({'detail': 'periods must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        periods = max(1, min(periods, max_periods))
+
+        feature_id = self._parse_feature_id(pk)
+        if not Feature.objects.filter(pk=feature_id).exists():
+            raise Http404
+        return Response({
+            'feature': feature_id,
+            'bucket': bucket,
+            'points': rollups.trend(feature_id, bucket, periods),
+        })
 
     @action(detail=True, methods=['post'], url_path='upvote')
     def upvote(self, request, pk=None):
         """
         Custom action to upvote a specific feature.
+        Responds with a compact VoteResultSerializer payload; ?expand=feature
+        returns the full VoteSerializer shape (nested user and feature) instead.
         """
+        if vote_queue.is_enabled():
+            return self._queue_vote(request, pk, vote_queue.UPVOTE)
+
         feature = get_object_or_404(Feature, pk=pk)
         user = request.user
 
         try:
             # Attempt to create a new vote record
-            vote = Vote.objects.create(user=user, feature=feature)
-            serializer = VoteSerializer(vote)
+            vote = Vote.objects.create(user_id=user.pk, feature=feature) # user may be a claims-only TokenUser
+            if request.query_params.get('expand') == 'feature':
+                serializer = VoteSerializer(vote, context={'request': request})
+            else:
+                serializer = VoteResultSerializer(vote)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except IntegrityError:
             # If IntegrityError occurs, it means the unique_together constraint was violated (duplicate vote)
@@ -126,19 +441,71 @@ class FeatureViewSet(viewsets.ModelViewSet):
         """
         Custom action to remove an upvote for a specific feature.
         """
-        feature = get_object_or_404(Feature, pk=pk)
-        user = request.user
+        if vote_queue.is_enabled():
+            return self._queue_vote(request, pk, vote_queue.UNVOTE)
 
-        # Find and delete the existing vote
-        vote = Vote.objects.filter(user=user, feature=feature).first()
-        if not vote:
+        feature_id = self._parse_feature_id(pk)
+        # Single DELETE; the feature is only looked up to tell the two error cases apart
+        if not Vote.remove(request.user, feature_id):
+            if not Feature.objects.filter(pk=feature_id).exists():
+                raise Http404
             return Response(
                 {'detail': 'You have not upvoted this feature.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-
-        vote.delete() # This will trigger the delete hook to decrement Redis
         return Response(
             {'detail': 'Vote removed successfully.'},
             status=status.HTTP_204_NO_CONTENT # 204 for successful deletion with no content
-        )
\ No newline at end of file
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk-vote')
+    def bulk_vote(self, request):
+        """
+        Applies many upvotes/unvotes in one request, e.g. when importing votes
+        from other trackers or syncing offline clients. Returns a per-item result.
+        """
+        serializer = BulkVoteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        user = serializer.validated_data.get('user', request.user)
+        if user.pk != request.user.pk and not request.user.is_staff:
+            return Response(
+                {'detail': 'Only admins can submit votes for another user.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        items = [(item.get('feature'), item.get('action')) for item in serializer.validated_data['votes']]
+        results = apply_bulk_votes(user.pk, items)
+        return Response({'user': user.pk, 'results': results}, status=status.HTTP_200_OK)
+
+    def _parse_feature_id(self, pk):
+        """
+        Validates the pk from the URL without a database round trip.
+        """
+        try:
+            return uuid.UUID(str(pk))
+        except ValueError:
+            raise Http404
+
+    def _queue_vote(self, request, pk, vote_action):
+        """
+        Write-behind path (VOTE_INGESTION_MODE = 'queued'): the vote is deduplicated
+        and queued in Redis, then written by the flush_vote_queue worker.
+        """
+        feature_id = self._parse_feature_id(pk)
+        # Cheap indexed read; unlike the synchronous path it takes no row locks
+        if not Feature.objects.filter(pk=feature_id).exists():
+            raise Http404
+
+        if vote_action == vote_queue.UPVOTE:
+            if not vote_queue.enqueue_upvote(request.user.pk, feature_id):
+                return Response(
+                    {'detail': 'You have already upvoted this feature.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            vote_queue.enqueue_unvote(request.user.pk, feature_id)
+        return Response(
+            {'detail': 'Vote accepted.', 'feature': str(feature_id), 'action': vote_action},
+            status=status.HTTP_202_ACCEPTED
+        )
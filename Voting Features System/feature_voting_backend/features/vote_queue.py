@@ -0,0 +1,143 @@
+# features/vote_queue.py
+"""
+Write-behind vote ingestion, enabled with VOTE_INGESTION_MODE = 'queued'.
+
+Requests do a Redis-side dedupe check on (user, feature) and append the
+vote to a Redis stream, in one atomic round trip (Lua script). The
+flush_vote_queue command drains the stream in batches, writing votes with
+bulk_create(ignore_conflicts=True), and recomputes each touched feature's
+counter once per batch instead of once per vote.
+"""
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from redis.exceptions import ResponseError
+
+from .models import Feature, Vote
+from .redis_client import get_connection
+
+STREAM_KEY = 'votes:ingest'
+CONSUMER_GROUP = 'vote-flushers'
+DEDUPE_TTL = 24 * 3600 # Seconds; duplicates past this window are still dropped by ignore_conflicts
+
+UPVOTE = 'up'
+UNVOTE = 'down'
+
+# Marks the vote as seen and queues it, unless the user already has a pending/accepted upvote
+_UPVOTE_SCRIPT = """
+if redis.call('SET', KEYS[1], 1, 'NX', 'EX', ARGV[1]) then
+    redis.call('XADD', KEYS[2], '*', 'action', 'up', 'user', ARGV[2], 'feature', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+# Clears the dedupe marker and queues the removal
+_UNVOTE_SCRIPT = """
+redis.call('DEL', KEYS[1])
+redis.call('XADD', KEYS[2], '*', 'action', 'down', 'user', ARGV[1], 'feature', ARGV[2])
+return 1
+"""
+
+def is_enabled():
+    return getattr(settings, 'VOTE_INGESTION_MODE', 'sync') == 'queued'
+
+def _dedupe_key(user_id, feature_id):
+    return f'votes:dedupe:{user_id}:{feature_id}'
+
+def _get_connection():
+    conn = get_connection()
+    if conn is None:
+        raise ImproperlyConfigured("VOTE_INGESTION_MODE = 'queued' requires the django-redis cache backend.")
+    return conn
+
+def enqueue_upvote(user_id, feature_id):
+    """
+    Accepts an upvote for later flushing. Returns False if it is a duplicate.
+    """
+    conn = _get_connection()
+    script = conn.register_script(_UPVOTE_SCRIPT)
+    return bool(script(
+        keys=[_dedupe_key(user_id, feature_id), STREAM_KEY],
+        args=[DEDUPE_TTL, user_id, str(feature_id)]
+    ))
+
+def enqueue_unvote(user_id, feature_id):
+    """
+    Accepts an unvote for later flushing.
+    """
+    conn = _get_connection()
+    script = conn.register_script(_UNVOTE_SCRIPT)
+    script(keys=[_dedupe_key(user_id, feature_id), STREAM_KEY], args=[user_id, str(feature_id)])
+    return True
+
+def apply_events(events):
+    """
+    Applies an ordered list of (action, user_id, feature_id) events with set-based SQL.
+    Only the last action per (user, feature) matters within a batch. Events for
+    features or users that no longer exist are dropped.
+    Returns a dict mapping touched feature id -> new vote count.
+    """
+    final = {}
+    for action, user_id, feature_id in events:
+        final[(user_id, feature_id)] = action
+    if not final:
+        return {}
+
+    feature_ids = {feature_id for _, feature_id in final}
+    user_ids = {user_id for user_id, _ in final}
+    existing_features = set(Feature.objects.filter(pk__in=feature_ids).values_list('pk', flat=True))
+    existing_users = set(get_user_model().objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+
+    upvotes, unvotes = [], []
+    for (user_id, feature_id), action in final.items():
+        if feature_id not in existing_features or user_id not in existing_users:
+            continue
+        if action == UPVOTE:
+            upvotes.append((user_id, feature_id))
+        else:
+            unvotes.append((user_id, feature_id))
+    return Vote.bulk_apply(upvotes, unvotes)
+
+def _ensure_group(conn):
+    try:
+        conn.xgroup_create(STREAM_KEY, CONSUMER_GROUP, id='0', mkstream=True)
+    except ResponseError as exc:
+        if 'BUSYGROUP' not in str(exc): # Group already exists
+            raise
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+def flush(batch_size=500, block_ms=None, consumer='flusher'):
+    """
+    Flushes one batch from the stream to the database.
+    Entries left pending by a crashed run of the same consumer are retried first.
+    Returns the number of stream entries processed.
+    """
+    conn = _get_connection()
+    _ensure_group(conn)
+
+    response = conn.xreadgroup(CONSUMER_GROUP, consumer, {STREAM_KEY: '0'}, count=batch_size)
+    entries = response[0][1] if response else []
+    if not entries:
+        response = conn.xreadgroup(CONSUMER_GROUP, consumer, {STREAM_KEY: '>'}, count=batch_size, block=block_ms)
+        entries = response[0][1] if response else []
+    if not entries:
+        return 0
+
+    events = []
+    for _, fields in entries:
+        fields = {_decode(key): _decode(value) for key, value in fields.items()}
+        try:
+            events.append((fields['action'], int(fields['user']), uuid.UUID(fields['feature'])))
+        except (KeyError, ValueError):
+            continue # Malformed entry, acknowledged below so it is not retried forever
+    apply_events(events)
+
+    entry_ids = [entry_id for entry_id, _ in entries]
+    conn.xack(STREAM_KEY, CONSUMER_GROUP, *entry_ids)
+    conn.xdel(STREAM_KEY, *entry_ids)
+    return len(entries)
@@ -0,0 +1,139 @@
+# features/voted_sets.py
+"""
+Per-user cache of voted feature ids, kept as a Redis set per user.
+
+A page resolves has_voted for all of its features with one pipelined
+round trip (EXISTS + SMISMEMBER). Sets are built lazily from a single
+query on a miss and maintained by the vote write paths. A sentinel
+member marks a built set, so users without votes are cached too.
+Users with more than MAX_MEMBERS votes are not cached (a flag key
+records that, whether the limit is found on a build or reached by an add);
+their lookups use one feature_id IN (...) query instead, which bounds Redis
+memory per user.
+
+Every write bumps a per-user version key, and a set is only built if the
+version is still the one read before the query: a vote committed while the
+set was being built (which the add/remove couldn't apply to a set that
+didn't exist yet) can't be lost from it.
+"""
+from .redis_client import get_connection, run_script
+
+MAX_MEMBERS = 5000
+TTL = 24 * 3600 # Seconds; also bounds staleness from bulk deletes that bypass the write paths
+SENTINEL = '-'
+
+# KEYS: set, version, too-large flag; ARGV: feature id, TTL, MAX_MEMBERS.
+# Adds a member only to sets that are already built, so a partial set is never
+# created; a set growing past MAX_MEMBERS is dropped and flagged too large.
+_ADD_SCRIPT = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('SADD', KEYS[1], ARGV[1])
+if redis.call('SCARD', KEYS[1]) > tonumber(ARGV[3]) + 1 then -- + 1 for the sentinel
+    redis.call('DEL', KEYS[1])
+    redis.call('SET', KEYS[3], 1, 'EX', ARGV[2])
+end
+return 1
+"""
+
+# KEYS: set, version; ARGV: TTL, version read before loading the members, members.
+# Builds the set unless a write happened since the version was read.
+_BUILD_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[2] or redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('SADD', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+def _key(user_id):
+    return f'user:{user_id}:voted'
+
+def _too_large_key(user_id):
+    return f'user:{user_id}:voted:too-large'
+
+def _version_key(user_id):
+    return f'user:{user_id}:voted:version'
+
+def _bump_versions(conn, user_ids):
+    for user_id in user_ids:
+        conn.incr(_version_key(user_id))
+        conn.expire(_version_key(user_id), TTL)
+
+def lookup(user_id, feature_ids, load_voted_ids):
+    """
+    Returns the subset of feature_ids the user voted for.
+    load_voted_ids(limit) must return up to limit of the user's voted feature ids;
+    it is only called to build the set on a miss. Returns None when the cache
+    can't answer (no Redis, or the user has too many votes to cache).
+    """
+    conn = get_connection()
+    if conn is None or not feature_ids:
+        return None
+
+    members = [str(feature_id) for feature_id in feature_ids]
+    pipe = conn.pipeline(transaction=False)
+    pipe.exists(_key(user_id))
+    pipe.exists(_too_large_key(user_id))
+    pipe.get(_version_key(user_id))
+    pipe.smismember(_key(user_id), members)
+    built, too_large, version, flags = pipe.execute()
+
+    if built:
+        return {feature_id for feature_id, flag in zip(feature_ids, flags) if flag}
+    if too_large:
+        return None
+
+    voted_ids = load_voted_ids(MAX_MEMBERS + 1)
+    if len(voted_ids) > MAX_MEMBERS:
+        conn.set(_too_large_key(user_id), 1, ex=TTL)
+        return None
+    # The query's answer stands for this call even if a concurrent write keeps the set from being built
+    run_script(
+        _BUILD_SCRIPT, [_key(user_id), _version_key(user_id)],
+        [TTL, version.decode() if version is not None else '', SENTINEL, *[str(feature_id) for feature_id in voted_ids]]
+    )
+    voted = {str(feature_id) for feature_id in voted_ids}
+    return {feature_id for feature_id, member in zip(feature_ids, members) if member in voted}
+
+async def alookup(conn, user_id, feature_ids):
+    """
+    Async variant of lookup on an asyncio Redis client. It never builds the set
+    (that needs the sync ORM) and returns None on a miss; the sync paths build it.
+    """
+    if not feature_ids:
+        return set()
+    pipe = conn.pipeline(transaction=False)
+    pipe.exists(_key(user_id))
+    pipe.smismember(_key(user_id), [str(feature_id) for feature_id in feature_ids])
+    built, flags = await pipe.execute()
+    if not built:
+        return None
+    return {feature_id for feature_id, flag in zip(feature_ids, flags) if flag}
+
+def add(user_id, feature_id, pipe=None):
+    run_script(
+        _ADD_SCRIPT, [_key(user_id), _version_key(user_id), _too_large_key(user_id)],
+        [str(feature_id), TTL, MAX_MEMBERS], pipe
+    )
+
+def remove(user_id, feature_id, pipe=None):
+    conn = pipe if pipe is not None else get_connection()
+    if conn is not None:
+        _bump_versions(conn, [user_id])
+        conn.srem(_key(user_id), str(feature_id))
+
+def invalidate(user_ids):
+    """
+    Drops the cached sets (and too-large flags) of the given users, e.g. after a bulk write.
+    """
+    conn = get_connection()
+    if conn is not None and user_ids:
+        pipe = conn.pipeline(transaction=False)
+        _bump_versions(pipe, user_ids) # Sets being built from older queries are discarded too
+        pipe.delete(*[_key(user_id) for user_id in user_ids], *[_too_large_key(user_id) for user_id in user_ids])
+        pipe.execute()
@@ -23,6 +23,7 @@ INSTALLED_APPS = [
 # Add CORS Middleware
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'features.instrumentation.RequestMetricsMiddleware', # Server-Timing headers and /metrics (sampled)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware', # IMPORTANT: Must be placed very high
     'django.middleware.common.CommonMiddleware',
@@ -59,13 +60,70 @@ DATABASES = {
     }
 }
 
+# Local benchmarking (python manage.py benchmark_api) without PostgreSQL: FEATURE_VOTING_DATABASE=sqlite
+if os.environ.get('FEATURE_VOTING_DATABASE') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db.sqlite3'),
+            'OPTIONS': {'timeout': 20}, # Concurrent benchmark clients wait for the write lock
+        }
+    }
+
+# Database connection handling (FEATURE_VOTING_DB_CONNECTIONS); compare them with
+# `python manage.py benchmark_connections`:
+# - 'persistent': each worker thread keeps its connection for CONN_MAX_AGE seconds and checks it
+#   before reusing it after a request (default).
+# - 'pool': a psycopg 3 connection pool per process, shared by its threads (PostgreSQL,
+#   pip install "psycopg[binary,pool]"). Idle connections are checked before being handed out.
+# - 'pgbouncer': behind PgBouncer in transaction mode. Connections to the bouncer are kept, and
+#   server-side cursors are disabled since they don't survive its transactions (the streaming
+#   exports then fetch each chunk client-side).
+# - 'per-request': a new connection for every request.
+DATABASE_CONNECTIONS = os.environ.get('FEATURE_VOTING_DB_CONNECTIONS', 'persistent')
+if DATABASE_CONNECTIONS in ('persistent', 'pgbouncer'):
+    DATABASES['default'].update(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True) # Seconds
+if DATABASE_CONNECTIONS == 'pgbouncer':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+if DATABASE_CONNECTIONS == 'pool' and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    from psycopg_pool import ConnectionPool
+    DATABASES['default']['OPTIONS'] = {
+        **DATABASES['default'].get('OPTIONS', {}),
+        'pool': {
+            'min_size': 2, # Connections opened up front
+            'max_size': 20, # Per process; keep processes * max_size below PostgreSQL's max_connections
+            'timeout': 5, # Seconds a request waits for a free connection before failing
+            'max_idle': 300, # Seconds before idle connections above min_size are closed
+            'check': ConnectionPool.check_connection,
+        },
+    }
+
+# Read replicas serving the feature list and retrieve endpoints (features/db_router.py), e.g.
+# FEATURE_VOTING_REPLICA_HOSTS=replica1.internal,replica2.internal. Each replica gets the primary's
+# settings with its own HOST; the test runner uses them as mirrors of the test database.
+_replica_hosts = [host.strip() for host in os.environ.get('FEATURE_VOTING_REPLICA_HOSTS', '').split(',') if host.strip()]
+for _number, _host in enumerate(_replica_hosts, start=1):
+    DATABASES[f'replica{_number}'] = {**DATABASES['default'], 'HOST': _host, 'TEST': {'MIRROR': 'default'}}
+REPLICA_DATABASES = [f'replica{_number}' for _number in range(1, len(_replica_hosts) + 1)]
+DATABASE_ROUTERS = ['features.db_router.ReplicaRouter']
+# Seconds a user's reads stay on the primary after they vote or edit a feature (read-your-writes)
+READ_YOUR_WRITES_SECONDS = 10
+# Replicas lagging further behind are skipped; the primary serves their reads
+REPLICA_MAX_LAG_SECONDS = 5
+
+# The vote (feature, user) index carries created_at as a covering (INCLUDE) column on PostgreSQL;
+# other backends build it without that column (the index definition, and so the migrations, are the same)
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.CustomUser'
 
 # REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Skips the per-request user query on views' stateless_auth_actions and caches the user elsewhere.
+        # Use 'rest_framework_simplejwt.authentication.JWTAuthentication' to load the user on every request.
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         # Allow authenticated users full access, read-only for unauthenticated
@@ -73,6 +131,9 @@ REST_FRAMEWORK = {
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10, # Number of items per page for list views
+    # Reverse proxies in front of the app. Client IPs (throttling) come from X-Forwarded-For only
+    # behind that many trusted proxies; with 0 the header is ignored, as any client can set it.
+    'NUM_PROXIES': int(os.environ.get('FEATURE_VOTING_NUM_PROXIES', '0')),
 }
 
 # Simple JWT Settings
@@ -106,10 +167,65 @@ SIMPLE_JWT = {
 # Redis Cache Settings
 CACHES = {
     "default": {
-        "BACKEND": "django_redis.cache.RedisCache",
+        "BACKEND": "features.instrumentation.InstrumentedRedisCache", # django-redis, counting operations for /metrics
         "LOCATION": "redis://127.0.0.1:6379/1", # Using database 1 in Redis
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # Fail fast when Redis is slow or down; callers fall back to the database
+            # (see features/redis_client.py's circuit breaker and features/counter_journal.py)
+            "SOCKET_CONNECT_TIMEOUT": 0.25, # Seconds
+            "SOCKET_TIMEOUT": 0.25, # Seconds
+            # Connections are reused across requests. When all are busy a command waits up to
+            # 'timeout' for one, then fails like an unreachable Redis (and falls back).
+            "CONNECTION_POOL_CLASS": "redis.BlockingConnectionPool",
+            "CONNECTION_POOL_KWARGS": {
+                "max_connections": 50, # Per process
+                "timeout": 0.25, # Seconds
+                "health_check_interval": 30, # Seconds idle before a connection is PINGed on reuse
+                "socket_keepalive": True,
+            },
         }
     }
-}
\ No newline at end of file
+}
+
+# Without Redis: FEATURE_VOTING_CACHE=locmem. The Redis-backed helpers (voted sets, vote queue,
+# live updates broker, ...) then fall back to their per-process or database paths.
+if os.environ.get('FEATURE_VOTING_CACHE') == 'locmem':
+    CACHES = {
+        "default": {
+            "BACKEND": "features.instrumentation.InstrumentedLocMemCache",
+        }
+    }
+
+# Vote ingestion mode:
+# - 'sync': upvote/unvote write to PostgreSQL within the request (default).
+# - 'queued': votes are deduplicated in Redis, appended to a Redis stream and answered with
+#   202 Accepted; run `python manage.py flush_vote_queue` to write them to PostgreSQL in batches.
+VOTE_INGESTION_MODE = 'sync'
+
+# Seconds anonymous feature list/retrieve responses are cached (0 disables the response cache).
+# Entries are invalidated on writes through per-status generation counters, so this only bounds memory.
+FEATURE_RESPONSE_CACHE_TIMEOUT = 60
+
+# Broker for live vote counts (/api/features/live/, server-sent events):
+# - 'redis': counts are published on Redis pub/sub and reach streams on every process (default).
+# - 'local': counts are dispatched in-process only (single-process development).
+LIVE_UPDATES_BROKER = 'redis'
+
+# Request instrumentation (features/instrumentation.py): share of requests measured in detail
+# (SQL queries, cache and Redis calls, serializer time), reported in a Server-Timing header and
+# aggregated as histograms on /metrics. 0 disables it.
+REQUEST_METRICS_SAMPLE_RATE = 0.05
+# Bearer token required to scrape /metrics; None leaves it open (e.g. reachable from a private network only).
+METRICS_AUTH_TOKEN = None
+
+# Abuse throttling (features/throttling.py): token buckets per action and scope, as 'requests/period'
+# (period s, min, hour or day). A request must fit in every scope's bucket, otherwise it gets a 429.
+# Scopes: 'user', 'ip' (read from X-Forwarded-For only behind REST_FRAMEWORK's NUM_PROXIES proxies),
+# 'feature' and 'username' (the account a login targets, per client IP so that nobody else can
+# lock its owner out). None disables a scope.
+THROTTLE_RATES = {
+    'vote': {'user': '30/min', 'ip': '300/min', 'feature': '1200/min'}, # upvote and unvote
+    'register': {'ip': '10/hour'},
+    'token': {'ip': '30/min', 'username': '10/min'},
+}
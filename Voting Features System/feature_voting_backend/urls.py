@@ -4,6 +4,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 
+from features import async_views
+from features.metrics import metrics_view
 from features.views import FeatureViewSet, UserViewSet, CustomTokenObtainPairView
 
 router = DefaultRouter()
@@ -15,4 +17,10 @@ urlpatterns = [
     path('api/', include(router.urls)), # Includes paths for features and users (register, me)
     path('api/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'), # Login
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'), # Refresh JWT token
+    # Async variants of the hot feature endpoints, for ASGI deployments (see features/async_views.py)
+    path('api/async/features/', async_views.feature_list, name='async_feature_list'),
+    path('api/async/features/<str:pk>/', async_views.feature_detail, name='async_feature_detail'),
+    path('api/async/features/<str:pk>/upvote/', async_views.feature_upvote, name='async_feature_upvote'),
+    path('api/async/features/<str:pk>/unvote/', async_views.feature_unvote, name='async_feature_unvote'),
+    path('metrics', metrics_view, name='metrics'), # Prometheus scrape endpoint
 ]
\ No newline at end of file
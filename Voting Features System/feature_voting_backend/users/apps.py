@@ -0,0 +1,7 @@
+# users/apps.py
+from django.apps import AppConfig
+
+class UsersConfig(AppConfig):
+    # Pinned so the migrations don't depend on the DEFAULT_AUTO_FIELD setting
+    default_auto_field = 'django.db.models.AutoField'
+    name = 'users'
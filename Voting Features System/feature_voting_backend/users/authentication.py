@@ -0,0 +1,232 @@
+# users/authentication.py
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+USER_CACHE_TIMEOUT = 60 # Seconds a user may be served from cache
+# The only user fields cached: what authentication and permission checks read. Never the password hash.
+CACHED_USER_FIELDS = ('id', 'username', 'is_active', 'is_staff')
+REVOCATION_REFRESH_SECONDS = 30 # Seconds before a process reloads the revocation list
+REVOCATIONS_KEY = 'auth:revoked-users'
+
+# Process-local snapshot of {user_id: revoked_at}, reloaded every REVOCATION_REFRESH_SECONDS
+_revocations = {'loaded_at': 0.0, 'entries': {}}
+# Writes that failed while Redis was unavailable, done by the next reload or the recovery hook
+_pending_revocations = {} # user_id -> revoked_at
+_pending_forgets = set()
+
+def _user_cache_key(user_id):
+    return f'auth:user-fields:{user_id}' # Not auth:user:, which held whole pickled users
+
+def _get_connection():
+    from features.redis_client import get_connection # Local import, features depends on users
+    return get_connection()
+
+def _guard(call, fallback):
+    from features.redis_client import guard
+    return guard(call, fallback)
+
+def forget_user(user_id):
+    """
+    Drops the cached copy of a user, e.g. after the user was saved.
+    """
+    # While Redis is unavailable users are read from the database; the copy is dropped once it is back
+    _guard(lambda: cache.delete(_user_cache_key(user_id)), lambda: _pending_forgets.add(user_id))
+
+def _store_revocations(entries):
+    """
+    Adds {user_id: revoked_at} entries to the shared revocation list.
+    """
+    conn = _get_connection()
+    if conn is not None:
+        conn.hset(REVOCATIONS_KEY, mapping=entries)
+        # Tokens issued before the access token lifetime have expired anyway, prune their entries
+        horizon = time.time() - api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+        expired = [key for key, revoked_at in conn.hgetall(REVOCATIONS_KEY).items() if float(revoked_at) < horizon]
+        if expired:
+            conn.hdel(REVOCATIONS_KEY, *expired)
+    else:
+        revocations = cache.get(REVOCATIONS_KEY) or {}
+        revocations.update(entries)
+        cache.set(REVOCATIONS_KEY, revocations, timeout=None)
+
+def revoke_user(user_id):
+    """
+    Rejects every token issued to the user until now, e.g. on deactivation.
+    Takes effect within REVOCATION_REFRESH_SECONDS in every process (at once in
+    this one). While Redis is unavailable the revocation is written once it is back.
+    """
+    entry = {str(user_id): time.time()}
+    _revocations['entries'].update(entry)
+
+    def store():
+        _store_revocations(entry)
+        forget_user(user_id)
+        _revocations['loaded_at'] = 0.0
+
+    def keep_for_later():
+        _pending_revocations.update(entry)
+        _pending_forgets.add(user_id)
+
+    _guard(store, keep_for_later)
+
+def clear_revocation(user_id):
+    """
+    Removes a revocation entry, for a new account reusing the id of a deleted one.
+    """
+    def clear():
+        conn = _get_connection()
+        if conn is not None:
+            conn.hdel(REVOCATIONS_KEY, str(user_id))
+        else:
+            revocations = cache.get(REVOCATIONS_KEY) or {}
+            if revocations.pop(str(user_id), None) is not None:
+                cache.set(REVOCATIONS_KEY, revocations, timeout=None)
+
+    # Skipped while Redis is unavailable: the entry predates the new account's tokens, so it rejects none of them
+    _guard(clear, lambda: None)
+    _revocations['entries'].pop(str(user_id), None)
+
+def _flush_pending(extra_revocations=None):
+    """
+    Writes the revocations and cache drops that failed while Redis was
+    unavailable, with extra_revocations if given. A Redis error propagates.
+    """
+    pending = dict(_pending_revocations)
+    forgets = set(_pending_forgets)
+    entries = {**pending, **(extra_revocations or {})}
+    if entries:
+        _store_revocations(entries)
+    if forgets:
+        cache.delete_many([_user_cache_key(user_id) for user_id in forgets])
+    for user_id in pending:
+        _pending_revocations.pop(user_id, None)
+    _pending_forgets.difference_update(forgets)
+
+def resync_after_outage():
+    """
+    Circuit breaker recovery hook: flushes this process' pending writes, and
+    revokes every inactive account again for the deactivations other
+    processes couldn't write.
+    """
+    from features.redis_client import REDIS_ERRORS, breaker
+
+    now = time.time()
+    inactive = get_user_model().objects.filter(is_active=False).values_list('pk', flat=True)
+    try:
+        _flush_pending({str(user_id): now for user_id in inactive})
+    except REDIS_ERRORS:
+        breaker.record_failure()
+        return
+    _revocations['loaded_at'] = 0.0
+
+def _add_recovery_hook():
+    from features.redis_client import breaker # Local import, features depends on users
+    breaker.add_recovery_hook(resync_after_outage)
+
+_add_recovery_hook()
+
+def _load_revocations():
+    """
+    Returns the revocation snapshot, reloading it when due. While Redis is
+    unavailable the last snapshot is kept and the reload retried when due again.
+    """
+    now = time.monotonic()
+    if now - _revocations['loaded_at'] >= REVOCATION_REFRESH_SECONDS:
+        def load():
+            if _pending_revocations or _pending_forgets:
+                _flush_pending() # Redis answers again, whether or not the circuit opened meanwhile
+            conn = _get_connection()
+            if conn is not None:
+                return {
+                    (key.decode() if isinstance(key, bytes) else key): float(revoked_at)
+                    for key, revoked_at in conn.hgetall(REVOCATIONS_KEY).items()
+                }
+            return cache.get(REVOCATIONS_KEY) or {}
+
+        entries = _guard(load, lambda: _revocations['entries'])
+        _revocations.update(loaded_at=now, entries=entries)
+    return _revocations['entries']
+
+def is_revoked(user_id, validated_token):
+    revoked_at = _load_revocations().get(str(user_id))
+    if revoked_at is None:
+        return False
+    issued_at = validated_token.get('iat')
+    if issued_at is None:
+        issued_at = validated_token['exp'] - api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    return issued_at <= revoked_at
+
+async def ais_revoked(user_id, validated_token):
+    """
+    Async variant of is_revoked; only the periodic reload of the revocation list leaves the event loop.
+    """
+    if time.monotonic() - _revocations['loaded_at'] >= REVOCATION_REFRESH_SECONDS:
+        await sync_to_async(_load_revocations)()
+    return is_revoked(user_id, validated_token)
+
+def _user_from_fields(fields):
+    """
+    Builds a user from its cached fields; the other fields are deferred and read from the database if accessed.
+    """
+    User = get_user_model()
+    # from_db takes the values in the model's field order
+    names = [field.attname for field in User._meta.concrete_fields if field.attname in CACHED_USER_FIELDS]
+    return User.from_db(None, names, [fields[name] for name in names])
+
+def get_cached_user(user_id):
+    """
+    Returns the user with only CACHED_USER_FIELDS loaded, from a short-TTL
+    cache when possible (from the database while Redis is unavailable).
+    """
+    def load_fields():
+        fields = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values(*CACHED_USER_FIELDS).first()
+        if fields is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        return fields
+
+    def cached_fields():
+        fields = cache.get(_user_cache_key(user_id))
+        if fields is None:
+            fields = load_fields()
+            cache.set(_user_cache_key(user_id), fields, timeout=USER_CACHE_TIMEOUT)
+        return fields
+
+    return _user_from_fields(_guard(cached_fields, load_fields))
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that skips the per-request user query.
+    Views list the actions that only need the token claims in
+    `stateless_auth_actions`; those get a TokenUser built from the claims.
+    Other actions get a user built from a few fields kept in a short-TTL
+    cache, falling back to the database. Deactivated users are rejected within
+    REVOCATION_REFRESH_SECONDS through the revocation list.
+    """
+    def authenticate(self, request):
+        # Kept so get_user can see which view action is being authenticated
+        self.request = request
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        if is_revoked(user_id, validated_token):
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+        view = (getattr(self.request, 'parser_context', None) or {}).get('view')
+        if getattr(view, 'action', None) in getattr(view, 'stateless_auth_actions', ()):
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+
+        user = get_cached_user(user_id)
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
@@ -6,4 +6,25 @@ class CustomUser(AbstractUser):
     # Add any additional fields here if you need them in the future.
     # Example: bio = models.TextField(blank=True, null=True)
     # For now, AbstractUser provides username, email, password, etc.
-    pass
\ No newline at end of file
+
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        super().save(*args, **kwargs)
+        # Keep users.authentication's short-lived copy fresh, and reject the
+        # outstanding tokens of a deactivated account (written once Redis is back
+        # if it is unavailable, so the saved user is never reported as an error)
+        from .authentication import clear_revocation, forget_user, revoke_user
+        if not self.is_active:
+            revoke_user(self.pk)
+        elif is_new:
+            clear_revocation(self.pk) # Databases may reuse the id of a deleted user
+            forget_user(self.pk)
+        else:
+            forget_user(self.pk)
+
+    def delete(self, *args, **kwargs):
+        from .authentication import revoke_user
+        user_id = self.pk
+        result = super().delete(*args, **kwargs)
+        revoke_user(user_id)
+        return result
\ No newline at end of file
@@ -3,6 +3,10 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from features.models import Feature
 import json
 
 User = get_user_model()
@@ -151,4 +155,66 @@ class UserAPITest(TestCase):
         response = self.client.post(self.refresh_token_url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('access', response.data)
-        self.assertNotEqual(login_response.data['access'], response.data['access']) # New access token
\ No newline at end of file
+        self.assertNotEqual(login_response.data['access'], response.data['access']) # New access token
+
+class CachedJWTAuthenticationTest(TestCase):
+    """
+    Testes da autenticação JWT sem consulta do usuário a cada requisição.
+    """
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='statelessuser', email='stateless@example.com', password='password')
+        self.feature = Feature.objects.create(title='Feat A', description='Desc A', created_by=self.user)
+        login_response = self.client.post('/api/token/', {'username': 'statelessuser', 'password': 'password'}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {login_response.data["access"]}')
+
+    def _user_queries(self, context):
+        return [query['sql'] for query in context.captured_queries if 'FROM "users_customuser"' in query['sql']]
+
+    def test_stateless_actions_skip_user_lookup(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(f'/api/features/{self.feature.id}/upvote/')
+            self.client.get('/api/features/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._user_queries(context), [])
+
+    def test_has_voted_with_token_user(self):
+        self.client.post(f'/api/features/{self.feature.id}/upvote/')
+        response = self.client.get(f'/api/features/{self.feature.id}/')
+        self.assertTrue(response.data['has_voted'])
+
+    def test_user_is_cached_between_requests(self):
+        bulk_vote = lambda: self.client.post('/api/features/bulk-vote/', {'votes': [{'feature': self.feature.id, 'action': 'upvote'}]}, format='json')
+        bulk_vote()
+        with CaptureQueriesContext(connection) as context:
+            response = bulk_vote()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._user_queries(context), [])
+
+    def test_cache_holds_only_authentication_fields(self):
+        self.client.get('/api/users/me/')
+        cached = cache.get(f'auth:user-fields:{self.user.id}')
+        self.assertEqual(cached, {'id': self.user.id, 'username': 'statelessuser', 'is_active': True, 'is_staff': False})
+        response = self.client.get('/api/users/me/')
+        self.assertEqual(response.data['email'], 'stateless@example.com')
+
+    def test_created_feature_shows_full_creator(self):
+        self.client.get('/api/users/me/')
+        response = self.client.post('/api/features/', {'title': 'Feat B', 'description': 'Desc B'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created_by']['email'], 'stateless@example.com')
+
+    def test_profile_changes_invalidate_cached_user(self):
+        self.client.get('/api/users/me/')
+        self.user.first_name = 'Changed'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/users/me/').data['first_name'], 'Changed')
+
+    def test_deactivated_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(f'/api/features/{self.feature.id}/upvote/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get('/api/users/me/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)